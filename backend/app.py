@@ -1,3 +1,9 @@
+from dotenv import load_dotenv
+
+# Before the other imports: several modules read their settings from the
+# environment when they are imported
+load_dotenv()
+
 from flask import Flask, jsonify, abort, request, send_from_directory
 from flask_login import LoginManager
 from extensions import limiter
@@ -6,50 +12,23 @@ from routes.statistics import statistics_bp
 from routes.meal_plans import meal_plans_bp
 from routes.auth import auth_bp, User
 from routes.favorites import favorites_bp
-from database import get_db_connection
+from routes.jobs import jobs_bp
+from routes.images import images_bp
+from routes.export import export_bp
+from routes.admin import admin_bp
+from routes.changes import changes_bp
+from database import get_db_connection, DatabaseBusy
+from json_provider import get_json_provider_class
+from compression import init_compression
+from profiling import init_profiling
+from jobs import recover_jobs, resume_queued_jobs
+from migrate import migrate
+from backup import create_backup
+import maintenance
+import scheduler
 from datetime import timedelta
-from dotenv import load_dotenv
 import os
 
-load_dotenv()
-
-app = Flask(__name__)
-
-app.config['JSON_AS_ASCII'] = False
-
-secret_key = os.environ.get('SECRET_KEY')
-if not secret_key:
-    raise RuntimeError(
-        "SECRET_KEY is not set! "
-        "Generate one: python3 -c \"import secrets; print(secrets.token_hex(32))\" "
-        "Then add to .env: SECRET_KEY=your_generated_key"
-    )
-app.config['SECRET_KEY'] = secret_key
-
-app.config['SESSION_COOKIE_HTTPONLY'] = True
-app.config['SESSION_COOKIE_SAMESITE'] = 'Lax'
-# app.config['SESSION_COOKIE_SECURE'] = True    # I will uncomment when will be HTTPS
-app.config['PERMANENT_SESSION_LIFETIME'] = timedelta(hours=2)
-
-limiter.init_app(app)
-
-# Flask login setup
-login_manager = LoginManager()
-login_manager.init_app(app)
-
-@login_manager.user_loader
-def load_user(user_id):
-    conn = get_db_connection()
-    user_row = conn.execute('SELECT * FROM users WHERE id = ?', (user_id,)).fetchone()
-    conn.close()
-    if user_row:
-        return User(user_row['id'], user_row['username'])
-    return None
-
-@login_manager.unauthorized_handler
-def unauthorized():
-    return jsonify({'error': 'Authentication required'}), 401
-
 REACT_DIST = os.path.join(os.path.dirname(__file__), '..', 'frontend-react', 'dist')
 LEGACY_FRONTEND = os.path.join(os.path.dirname(__file__), '..', 'frontend')
 
@@ -59,74 +38,152 @@ if os.path.isdir(REACT_DIST):
 else:
     FRONTEND_FOLDER = LEGACY_FRONTEND
 
-@app.route("/")
-def serve_index():
-    return send_from_directory(FRONTEND_FOLDER, 'index.html')
-
-@app.route("/<path:filename>")
-def serve_static(filename):
-    # For React Router: if the file doesn't exist, serve index.html (client-side routing)
-    full_path = os.path.join(FRONTEND_FOLDER, filename)
-    if os.path.isfile(full_path):
-        return send_from_directory(FRONTEND_FOLDER, filename)
-    if FRONTEND_FOLDER == REACT_DIST:
-        return send_from_directory(FRONTEND_FOLDER, 'index.html')
-    return send_from_directory(FRONTEND_FOLDER, filename)
-
-app.register_blueprint(recipes_bp)
-app.register_blueprint(statistics_bp)
-app.register_blueprint(meal_plans_bp)
-app.register_blueprint(auth_bp)
-app.register_blueprint(favorites_bp)
-
-# Ensure favorites table exists (migration for existing databases)
-with app.app_context():
-    conn = get_db_connection()
-    conn.execute('''
-        CREATE TABLE IF NOT EXISTS favorites (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER NOT NULL,
-            recipe_id INTEGER NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
-            FOREIGN KEY (recipe_id) REFERENCES recipes(id) ON DELETE CASCADE,
-            UNIQUE(user_id, recipe_id)
-        )
-    ''')
-    conn.commit()
-    conn.close()
-
-@app.after_request
-def set_security_headers(response):
-    response.headers['X-Content-Type-Options'] = 'nosniff'
-    response.headers['X-Frame-Options'] = 'DENY'
-    response.headers['X-XSS-Protection'] = '1; mode=block'
-    response.headers['Referrer-Policy'] = 'strict-origin-when-cross-origin'
-
-    if request.path.startswith('/api/'):
-        response.headers['Cache-Control'] = 'no-store, no-cache, must-revalidate, max-age=0'
-
-    return response
 
-@app.errorhandler(429)
-def rate_limit_error(error):
-    return jsonify({'error': str(error.description)}), 429
+def create_app():
+    """
+    The configured app, with the database migrated. Background threads are
+    started separately (start_worker), so gunicorn can preload this in its
+    master and fork the workers from it (see gunicorn.conf.py).
+    """
+    app = Flask(__name__)
 
+    # Flask 3 ignores JSON_AS_ASCII, the provider sends UTF-8 unescaped
+    app.json = get_json_provider_class()(app)
 
-@app.errorhandler(404)
-def request_error(error):
-    return jsonify({
-        "error": "Not found the page",
-        "message": "Requested page doesnt exisits"
-    }),404
+    secret_key = os.environ.get('SECRET_KEY')
+    if not secret_key:
+        raise RuntimeError(
+            "SECRET_KEY is not set! "
+            "Generate one: python3 -c \"import secrets; print(secrets.token_hex(32))\" "
+            "Then add to .env: SECRET_KEY=your_generated_key"
+        )
+    app.config['SECRET_KEY'] = secret_key
+
+    app.config['SESSION_COOKIE_HTTPONLY'] = True
+    app.config['SESSION_COOKIE_SAMESITE'] = 'Lax'
+    # app.config['SESSION_COOKIE_SECURE'] = True    # I will uncomment when will be HTTPS
+    app.config['PERMANENT_SESSION_LIFETIME'] = timedelta(hours=2)
+
+    # The load test (benchmarks/loadtest.py) sends every user from one address
+    app.config['RATELIMIT_ENABLED'] = os.environ.get('RATELIMIT_ENABLED', '1') != '0'
+
+    limiter.init_app(app)
+    init_compression(app)
+
+    # Admins may profile single requests with X-Profile (see profiling.py)
+    app.config['PROFILING'] = os.environ.get('PROFILING', '') == '1'
+    init_profiling(app)
+
+    # Flask login setup
+    login_manager = LoginManager()
+    login_manager.init_app(app)
+
+    @login_manager.user_loader
+    def load_user(user_id):
+        conn = get_db_connection()
+        user_row = conn.execute('SELECT * FROM users WHERE id = ?', (user_id,)).fetchone()
+        conn.close()
+        if user_row:
+            return User(user_row['id'], user_row['username'])
+        return None
+
+    @login_manager.unauthorized_handler
+    def unauthorized():
+        return jsonify({'error': 'Authentication required'}), 401
+
+    @app.route("/")
+    def serve_index():
+        return send_from_directory(FRONTEND_FOLDER, 'index.html')
 
+    @app.route("/<path:filename>")
+    def serve_static(filename):
+        # For React Router: if the file doesn't exist, serve index.html (client-side routing)
+        full_path = os.path.join(FRONTEND_FOLDER, filename)
+        if os.path.isfile(full_path):
+            return send_from_directory(FRONTEND_FOLDER, filename)
+        if FRONTEND_FOLDER == REACT_DIST:
+            return send_from_directory(FRONTEND_FOLDER, 'index.html')
+        return send_from_directory(FRONTEND_FOLDER, filename)
 
-@app.errorhandler(500)
-def server_error(error):
-    return jsonify({
-        "error": "Internal server error",
-        "message": "Requested resource doesnt not exist"
-    }), 500
+    app.register_blueprint(recipes_bp)
+    app.register_blueprint(statistics_bp)
+    app.register_blueprint(meal_plans_bp)
+    app.register_blueprint(auth_bp)
+    app.register_blueprint(favorites_bp)
+    app.register_blueprint(jobs_bp)
+    app.register_blueprint(images_bp)
+    app.register_blueprint(export_bp)
+    app.register_blueprint(admin_bp)
+    app.register_blueprint(changes_bp)
+
+    # Bring the database schema up to date (only one process applies migrations,
+    # the others wait on the lock and find nothing to do; with gunicorn's
+    # preload_app the master does it once before forking)
+    with app.app_context():
+        migrate()
+        recover_jobs()
+
+    # Periodic tasks, off unless configured (e.g. BACKUP_INTERVAL_HOURS=24 in .env)
+    scheduler.schedule('backup', float(os.environ.get('BACKUP_INTERVAL_HOURS', 0)) * 3600, create_backup)
+    scheduler.schedule('maintenance', float(os.environ.get('MAINTENANCE_INTERVAL_MINUTES', 0)) * 60,
+                       maintenance.run)
+
+    @app.after_request
+    def set_security_headers(response):
+        response.headers['X-Content-Type-Options'] = 'nosniff'
+        response.headers['X-Frame-Options'] = 'DENY'
+        response.headers['X-XSS-Protection'] = '1; mode=block'
+        response.headers['Referrer-Policy'] = 'strict-origin-when-cross-origin'
+
+        if request.path.startswith('/api/'):
+            response.headers['Cache-Control'] = 'no-store, no-cache, must-revalidate, max-age=0'
+
+        return response
+
+    @app.errorhandler(429)
+    def rate_limit_error(error):
+        return jsonify({'error': str(error.description)}), 429
+
+    @app.errorhandler(DatabaseBusy)
+    def database_busy_error(error):
+        # The write lock stayed taken through every retry: a burst of writes,
+        # worth trying again in a moment rather than a server error
+        response = jsonify({'error': 'The database is busy, please try again'})
+        response.headers['Retry-After'] = '1'
+        return response, 503
+
+    @app.errorhandler(404)
+    def request_error(error):
+        return jsonify({
+            "error": "Not found the page",
+            "message": "Requested page doesnt exisits"
+        }),404
+
+    @app.errorhandler(500)
+    def server_error(error):
+        return jsonify({
+            "error": "Internal server error",
+            "message": "Requested resource doesnt not exist"
+        }), 500
+
+    return app
+
+
+def start_worker():
+    """
+    Per-process setup, none of which survives a fork: the scheduler thread,
+    and the job pools for jobs still queued from before the restart.
+    """
+    scheduler.start()
+    resume_queued_jobs()
+
+
+app = create_app()
+
+# gunicorn.conf.py sets START_WORKER=0 and calls start_worker() in each
+# worker instead: with preload_app this module is imported by the master
+if os.environ.get('START_WORKER', '1') != '0':
+    start_worker()
 
 
 if __name__ == '__main__':
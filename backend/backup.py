@@ -0,0 +1,194 @@
+"""
+Online backups of recipes.db.
+
+Uses SQLite's backup API (sqlite3.Connection.backup), which copies the
+database a few hundred pages at a time and only holds a read lock during each
+step, so the app keeps serving requests while a backup runs. Unlike `cp`, the
+result is always a consistent snapshot.
+
+Each snapshot is checked with PRAGMA integrity_check, gzipped and rotated.
+
+Usage:
+    python backup.py                         # backup to BACKUP_DIR, keep BACKUP_KEEP
+    python backup.py --dir /home/ubuntu/backups --keep 5 --prefix pre-deploy
+    python backup.py --list
+    python backup.py --verify backups/recipes-20260101-120000-000000.db.gz
+
+Scheduled in-process when BACKUP_INTERVAL_HOURS is set (see app.py).
+"""
+
+import argparse
+import gzip
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from database import DATABASE, get_db_connection
+
+BACKUP_DIR = os.environ.get(
+    'BACKUP_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(DATABASE)), 'backups'),
+)
+BACKUP_KEEP = int(os.environ.get('BACKUP_KEEP', 14))
+
+# Pages copied per step (4 KB each) and the pause between steps, which is
+# when writers get the database back
+PAGES_PER_STEP = 256
+STEP_PAUSE = 0.005
+
+# A write from another connection makes SQLite restart the copy; after each
+# restart we back off longer, and give up after this many
+MAX_RESTARTS = 5
+MAX_BACKOFF = 2.0
+
+
+def snapshot(dest_path, pages=None, pause=None, max_restarts=None):
+    """
+    Copy the live database to dest_path, one batch of pages at a time.
+
+    Each step holds a read lock only for `pages` pages, writers get the
+    database back during the pause in between. We never fall back to a
+    single-step copy, that would block writers for the whole copy; if writes
+    keep restarting the copy, the backup fails and the next run tries again.
+    """
+    pages = pages or PAGES_PER_STEP
+    pause = STEP_PAUSE if pause is None else pause
+    max_restarts = MAX_RESTARTS if max_restarts is None else max_restarts
+
+    source = get_db_connection()
+    dest = sqlite3.connect(dest_path)
+    steps = [0]
+    restarts = [0]
+    last_remaining = [None]
+
+    def progress(status, remaining, total):
+        steps[0] += 1
+        if last_remaining[0] is not None and remaining > last_remaining[0]:
+            restarts[0] += 1
+            if restarts[0] > max_restarts:
+                raise RuntimeError(
+                    f'Backup restarted {restarts[0]} times by concurrent writes, giving up'
+                )
+            # Let the burst of writes finish before starting over
+            time.sleep(min(pause * 2 ** restarts[0] * 10, MAX_BACKOFF))
+        last_remaining[0] = remaining
+        time.sleep(pause)
+
+    try:
+        source.backup(dest, pages=pages, progress=progress)
+    finally:
+        dest.close()
+        source.close()
+    return steps[0]
+
+
+def verify(path):
+    """Run PRAGMA integrity_check on a (possibly gzipped) backup. Returns 'ok' or the errors."""
+    if path.endswith('.gz'):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            plain = os.path.join(tmp_dir, 'verify.db')
+            with gzip.open(path, 'rb') as src, open(plain, 'wb') as dst:
+                shutil.copyfileobj(src, dst)
+            return verify(plain)
+
+    conn = sqlite3.connect(f'file:{path}?mode=ro', uri=True)
+    try:
+        rows = conn.execute('PRAGMA integrity_check').fetchall()
+    finally:
+        conn.close()
+    return '\n'.join(row[0] for row in rows)
+
+
+def create_backup(backup_dir=None, keep=None, prefix='recipes', compress=True):
+    """
+    Take a verified snapshot into backup_dir and delete old ones.
+    Returns a dict describing the backup. Raises RuntimeError if verification fails.
+    """
+    backup_dir = backup_dir or BACKUP_DIR
+    keep = BACKUP_KEEP if keep is None else keep
+    os.makedirs(backup_dir, exist_ok=True)
+
+    started = time.monotonic()
+    name = f"{prefix}-{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}.db"
+    tmp_path = os.path.join(backup_dir, f'.{name}.tmp')
+
+    try:
+        steps = snapshot(tmp_path)
+        result = verify(tmp_path)
+        if result != 'ok':
+            raise RuntimeError(f'Backup failed integrity_check: {result}')
+
+        final_path = os.path.join(backup_dir, name)
+        if compress:
+            final_path += '.gz'
+            with open(tmp_path, 'rb') as src, gzip.open(final_path, 'wb', compresslevel=6) as dst:
+                shutil.copyfileobj(src, dst)
+        else:
+            os.replace(tmp_path, final_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    removed = rotate(backup_dir, prefix, keep)
+    return {
+        'path': final_path,
+        'bytes': os.path.getsize(final_path),
+        'steps': steps,
+        'seconds': round(time.monotonic() - started, 3),
+        'removed': removed,
+    }
+
+
+def list_backups(backup_dir=None, prefix='recipes'):
+    """Backups with this prefix, oldest first (names sort by timestamp)."""
+    backup_dir = backup_dir or BACKUP_DIR
+    if not os.path.isdir(backup_dir):
+        return []
+    return sorted(
+        os.path.join(backup_dir, f) for f in os.listdir(backup_dir)
+        if f.startswith(f'{prefix}-') and (f.endswith('.db') or f.endswith('.db.gz'))
+    )
+
+
+def rotate(backup_dir, prefix, keep):
+    """Delete all but the newest `keep` backups. Returns the removed paths."""
+    backups = list_backups(backup_dir, prefix)
+    old = backups[:-keep] if keep > 0 else []
+    for path in old:
+        os.remove(path)
+    return old
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Online backup of recipes.db')
+    parser.add_argument('--dir', default=BACKUP_DIR, help='backup directory')
+    parser.add_argument('--keep', type=int, default=BACKUP_KEEP, help='backups to keep')
+    parser.add_argument('--prefix', default='recipes', help='file name prefix')
+    parser.add_argument('--no-compress', action='store_true', help="don't gzip the snapshot")
+    parser.add_argument('--list', action='store_true', help='list existing backups')
+    parser.add_argument('--verify', metavar='FILE', help='integrity_check an existing backup')
+    args = parser.parse_args()
+
+    if args.list:
+        for path in list_backups(args.dir, args.prefix):
+            print(f"{path}  {os.path.getsize(path)} bytes")
+        return
+
+    if args.verify:
+        result = verify(args.verify)
+        print(result)
+        sys.exit(0 if result == 'ok' else 1)
+
+    backup = create_backup(args.dir, args.keep, args.prefix, compress=not args.no_compress)
+    print(f"Backup written: {backup['path']} ({backup['bytes']} bytes, "
+          f"{backup['steps']} steps, {backup['seconds']}s)")
+    for path in backup['removed']:
+        print(f"Removed old backup: {path}")
+
+
+if __name__ == '__main__':
+    main()
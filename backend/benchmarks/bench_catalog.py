@@ -0,0 +1,101 @@
+"""
+Benchmark: /api/recipes list pages from the columnar catalog vs SQL.
+
+Builds a throwaway database with synthetic recipes and times, for a few
+filter/sort combinations, GET /api/recipes through the Flask test client with
+the catalog on and off (facet counts included in both).
+
+Usage:
+    python benchmarks/bench_catalog.py [number_of_recipes]
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+
+os.environ['DATABASE_PATH'] = os.path.join(tempfile.mkdtemp(), 'bench_catalog.db')
+os.environ.setdefault('SECRET_KEY', 'bench-only-secret-key')
+os.environ['RATELIMIT_ENABLED'] = '0'
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import catalog  # noqa: E402
+import database  # noqa: E402
+from app import app  # noqa: E402
+
+TAGS = ['Obiad', 'Vege', 'Zupy', 'Dla dzieci', 'Bez laktozy', 'Fit', 'Szybkie', 'Polskie',
+        'Desery', 'Śniadania']
+
+QUERIES = [
+    ('newest', 'page=1'),
+    ('category=dinner', 'category=dinner&page=1'),
+    ('tag=Vege, sort=name', 'tag=Vege&sort=name&page=1'),
+    ('calories<=500, -protein', 'calories_max=500&sort=-protein&page=1'),
+    ('protein/kcal, page 200', 'sort=-protein_per_kcal&page=200'),
+    ('tag=Fit, time<=30, -rating', 'tag=Fit&total_time_max=30&sort=-rating,name&page=1'),
+]
+
+
+def maybe(rng, value):
+    return None if rng.random() < 0.05 else value
+
+
+def populate(conn, total):
+    rng = random.Random(42)
+    conn.executemany(
+        'INSERT INTO recipes (id, name, category, calories_per_serving, protein_per_serving, '
+        'fiber_per_serving, prep_time_minutes, total_time_minutes, rating) '
+        'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+        ((i, f'Przepis {i} {rng.choice(["z kurczakiem", "wege", "z rybą"])}',
+          rng.choice(['breakfast', 'lunch', 'dinner', 'snack', None]),
+          maybe(rng, rng.randint(80, 1200)), maybe(rng, rng.randint(0, 60)), maybe(rng, rng.randint(0, 15)),
+          maybe(rng, rng.randint(5, 60)), maybe(rng, rng.randint(10, 180)), maybe(rng, rng.randint(1, 5)))
+         for i in range(1, total + 1))
+    )
+    conn.executemany(
+        'INSERT INTO recipe_categories (recipe_id, category_name) VALUES (?, ?)',
+        ((i, tag) for i in range(1, total + 1) for tag in rng.sample(TAGS, 3))
+    )
+    conn.execute("INSERT INTO users (username, password_hash) VALUES ('bench', 'x')")
+    conn.commit()
+
+
+def timed(fn, repeat=5):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    if catalog.np is None:
+        sys.exit('numpy is not installed, the catalog is disabled')
+    database.init_db()
+    conn = database.get_db_connection()
+    populate(conn, total)
+
+    build_ms = timed(lambda: catalog.Catalog.build(conn, 0), repeat=1)
+    size_mb = catalog.Catalog.build(conn, 0).nbytes() / 2**20
+    conn.close()
+    print(f'{total} recipes, catalog build {build_ms:.0f} ms (once per data revision), {size_mb:.1f} MiB\n')
+
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = '1'
+    print(f"{'query':>32} {'catalog ms':>11} {'sql ms':>8}")
+    for label, query in QUERIES:
+        url = f'/api/recipes?per_page=20&{query}'
+        catalog.ENABLED = True
+        client.get(url)  # build the catalog for this revision
+        catalog_ms = timed(lambda: client.get(url))
+        catalog.ENABLED = False
+        sql_ms = timed(lambda: client.get(url), repeat=3)
+        print(f'{label:>32} {catalog_ms:>11.2f} {sql_ms:>8.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+"""
+Benchmark: gunicorn cold start, without and with preload + warm-up.
+
+Seeds a throwaway database like loadtest.py, then starts gunicorn with
+gunicorn.conf.py twice: cold (GUNICORN_PRELOAD=0 WARM_UP=0, every worker
+imports the app and builds its caches on its first requests) and warm (the
+defaults). For each it reports the time until the server answers, the
+latency of the first and the slowest of the first requests per endpoint
+(they land on workers that may not have served anything yet), the median
+once everything is warm, and the memory of master + workers (PSS, shared
+pages split between the processes).
+
+Usage:
+    python benchmarks/bench_coldstart.py [number_of_recipes] [workers]
+"""
+
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from loadtest import BACKEND, Client, USER_PREFIX, free_port, prepare_database  # noqa: E402
+
+ENDPOINTS = [
+    ('list + facets', '/api/recipes?page=1&facets=1'),
+    ('tag, -protein', '/api/recipes?tag=Vege&sort=-protein&page=3'),
+    ('tag autocomplete', '/api/recipe-tags?prefix=o'),
+]
+MODES = [
+    ('cold', {'GUNICORN_PRELOAD': '0', 'WARM_UP': '0'}),
+    ('preload + warm-up', {}),
+]
+
+
+def pss_kib(pid):
+    """Proportional set size of `pid` and its children (Linux)."""
+    pids = [pid] + [int(child) for child in open(f'/proc/{pid}/task/{pid}/children').read().split()]
+    total = 0
+    for process in pids:
+        for line in open(f'/proc/{process}/smaps_rollup'):
+            if line.startswith('Pss:'):
+                total += int(line.split()[1])
+    return total
+
+
+def latency(client, label, path):
+    client.request(label, 'GET', path)
+    return client.results[label]['latencies'][-1]
+
+
+def run(db_path, workers, env):
+    port = free_port()
+    env = dict(os.environ, DATABASE_PATH=db_path, RATELIMIT_ENABLED='0', SECRET_KEY='bench',
+               GUNICORN_BIND=f'127.0.0.1:{port}', WEB_CONCURRENCY=str(workers), **env)
+    started = time.perf_counter()
+    server = subprocess.Popen([sys.executable, '-m', 'gunicorn', '--log-level', 'warning'],
+                              cwd=BACKEND, env=env)
+    try:
+        client = Client(f'http://127.0.0.1:{port}', [], seed=1)
+        while client.request('boot', 'GET', '/api/recipe-tags') != 200:
+            if server.poll() is not None or time.perf_counter() - started > 60:
+                raise RuntimeError('gunicorn did not start')
+            time.sleep(0.02)
+        boot = time.perf_counter() - started
+        client.login(f'{USER_PREFIX}0')
+
+        rows = []
+        for label, path in ENDPOINTS:
+            first = [latency(client, label, path) for _ in range(workers * 2)]
+            warm = [latency(client, label, path) for _ in range(20)]
+            rows.append((label, first[0], max(first), statistics.median(warm)))
+        return boot, rows, pss_kib(server.pid)
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    recipes = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    db_path = os.path.join(tempfile.mkdtemp(), 'bench_coldstart.db')
+    prepare_database(db_path, recipes, clients=1)
+    print(f'{recipes} recipes, {workers} workers\n')
+
+    for mode, env in MODES:
+        boot, rows, pss = run(db_path, workers, env)
+        print(f'{mode}: answering after {boot * 1000:.0f} ms, {pss / 1024:.0f} MiB PSS')
+        print(f'  {"endpoint":<18} {"first":>8} {"worst of first":>15} {"warm p50":>9}')
+        for label, first, worst, warm in rows:
+            print(f'  {label:<18} {first * 1000:>5.1f} ms {worst * 1000:>12.1f} ms {warm * 1000:>6.1f} ms')
+        print()
+
+
+if __name__ == '__main__':
+    main()
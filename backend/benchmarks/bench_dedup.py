@@ -0,0 +1,77 @@
+"""
+Benchmark: near-duplicate detection (dedup.py).
+
+Builds a throwaway database with synthetic recipes, about a tenth of them
+reworded re-scrapes of another one, and times indexing the library, checking
+an import batch against it and the full find_clusters() report at a few
+library sizes, to show they grow linearly rather than pairwise.
+
+Usage:
+    python benchmarks/bench_dedup.py [largest_number_of_recipes]
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+
+os.environ['DATABASE_PATH'] = os.path.join(tempfile.mkdtemp(), 'bench_dedup.db')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database  # noqa: E402
+import dedup  # noqa: E402
+
+WORDS = ['kurczak', 'ryż', 'papryka', 'leczo', 'owsianka', 'banan', 'makaron', 'pesto', 'indyk', 'sałatka',
+         'tortilla', 'krem', 'dyni', 'pieczony', 'łosoś', 'kasza', 'jaglana', 'twaróg', 'omlet', 'szpinak']
+# 400 made-up title words, so blocks stay small as on a real library
+TITLE_WORDS = [f'{a[:3]}{b[:2]}' for a in WORDS for b in WORDS]
+INGREDIENTS = [f'{word} {n}' for word in WORDS for n in range(50)]
+
+
+def recipe(rng):
+    return ' '.join(rng.sample(TITLE_WORDS, 3)), rng.sample(INGREDIENTS, 8)
+
+
+def populate(conn, total):
+    rng = random.Random(42)
+    recipes = []
+    for i in range(1, total + 1):
+        if recipes and rng.random() < 0.1:
+            name, ingredients = rng.choice(recipes)
+            name, ingredients = name + ' fit', ingredients[:7] + [rng.choice(INGREDIENTS)]
+        else:
+            name, ingredients = recipe(rng)
+        recipes.append((name, ingredients))
+    conn.executemany('INSERT INTO recipes (id, name) VALUES (?, ?)',
+                     ((i, name) for i, (name, _) in enumerate(recipes, 1)))
+    conn.executemany('INSERT INTO ingredients (recipe_id, name) VALUES (?, ?)',
+                     ((i, name) for i, (_, ingredients) in enumerate(recipes, 1) for name in ingredients))
+    conn.commit()
+    return recipes
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, (time.perf_counter() - start) * 1000
+
+
+def main():
+    largest = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    print(f'{"recipes":>8} {"index":>9} {"5k import":>10} {"report":>9}  clusters')
+    for total in (largest // 4, largest // 2, largest):
+        database.init_db()
+        conn = database.get_db_connection()
+        recipes = populate(conn, total)
+        batch = random.Random(7).sample(recipes, 5000)
+
+        index, index_ms = timed(lambda: dedup.DedupIndex.load(conn))
+        _, import_ms = timed(lambda: [index.find(name, ingredients) for name, ingredients in batch])
+        clusters, report_ms = timed(lambda: dedup.find_clusters(conn))
+        conn.close()
+        print(f'{total:>8} {index_ms:>7.0f} ms {import_ms:>7.0f} ms {report_ms:>6.0f} ms  {len(clusters)}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+"""
+Benchmark: facet counts from the per-revision bitset index vs GROUP BY queries.
+
+Builds a throwaway database with synthetic recipes and times, for a few filter
+sets, facets.facet_counts() against one GROUP BY query per facet.
+
+Usage:
+    python benchmarks/bench_facets.py [number_of_recipes]
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+
+os.environ['DATABASE_PATH'] = os.path.join(tempfile.mkdtemp(), 'bench_facets.db')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database  # noqa: E402
+import facets  # noqa: E402
+
+TAGS = ['Obiad', 'Vege', 'Zupy', 'Dla dzieci', 'Bez laktozy', 'Fit', 'Szybkie', 'Polskie',
+        'Desery', 'Śniadania'] + [f'Tag {i}' for i in range(200)]
+
+GROUP_BY = {
+    'category': 'SELECT r.category, COUNT(*) FROM recipes r {join} WHERE {where} GROUP BY 1',
+    'difficulty': 'SELECT r.difficulty, COUNT(*) FROM recipes r {join} WHERE {where} GROUP BY 1',
+    'source': 'SELECT r.source, COUNT(*) FROM recipes r {join} WHERE {where} GROUP BY 1',
+    'tag': '''SELECT t.category_name, COUNT(*) FROM recipes r {join}
+              JOIN recipe_categories t ON t.recipe_id = r.id WHERE {where} GROUP BY 1''',
+}
+
+
+def populate(conn, total):
+    rng = random.Random(42)
+    conn.executemany(
+        'INSERT INTO recipes (id, name, category, difficulty, source) VALUES (?, ?, ?, ?, ?)',
+        ((i, f'Przepis {i} {rng.choice(["z kurczakiem", "wege", "z rybą"])}',
+          rng.choice(['breakfast', 'lunch', 'dinner', 'snack', None]),
+          rng.choice(['Łatwy', 'Średni', 'Trudny']),
+          rng.choice(['centrumrespo', 'manual', 'instagram']))
+         for i in range(1, total + 1))
+    )
+    conn.executemany(
+        'INSERT INTO recipe_categories (recipe_id, category_name) VALUES (?, ?)',
+        ((i, tag) for i in range(1, total + 1) for tag in rng.sample(TAGS[:10] if i % 3 else TAGS, 3))
+    )
+    conn.commit()
+
+
+def group_by_counts(conn, tag=None, search=None):
+    join, conditions, params = '', ['1'], []
+    if tag:
+        join = 'JOIN recipe_categories rc ON rc.recipe_id = r.id'
+        conditions.append('rc.category_name = ?')
+        params.append(tag)
+    if search:
+        conditions.append('r.name LIKE ?')
+        params.append(f'%{search}%')
+    where = ' AND '.join(conditions)
+    return {
+        facet: dict(conn.execute(sql.format(join=join, where=where), params).fetchall())
+        for facet, sql in GROUP_BY.items()
+    }
+
+
+def timed(fn, repeat=5):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    database.init_db()
+    conn = database.get_db_connection()
+    populate(conn, total)
+
+    build_ms = timed(lambda: facets.FacetIndex.build(conn, 0), repeat=1)
+    print(f'{total} recipes, index build {build_ms:.0f} ms (once per data revision)\n')
+    print(f"{'filters':>28} {'bitset ms':>10} {'group by ms':>12}")
+
+    for label, filters in [
+        ('none', {}),
+        ('category=dinner', {'category': 'dinner'}),
+        ('tag=Vege', {'tag': 'Vege'}),
+        ('search=kurczak', {'search': 'kurczak'}),
+        ('tag=Vege, search=kurczak', {'tag': 'Vege', 'search': 'kurczak'}),
+    ]:
+        index_ms = timed(lambda: facets.facet_counts(conn, **filters))
+        sql_ms = timed(lambda: group_by_counts(conn, filters.get('tag'), filters.get('search')), repeat=3)
+        print(f'{label:>28} {index_ms:>10.2f} {sql_ms:>12.2f}')
+
+    conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""
+Benchmark: maintenance.run() on a fragmented database, and what readers see.
+
+Builds a throwaway database with synthetic recipes, ingredients and tags,
+deletes a share of them like a bulk delete (leaving free pages and stale
+planner statistics), then runs maintenance while a reader thread keeps
+querying. Reports the before/after stats and query timings maintenance logs,
+the time per step, and the reader's latency during the run.
+
+Usage:
+    python benchmarks/bench_maintenance.py [number_of_recipes] [deleted_share]
+"""
+
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+os.environ['DATABASE_PATH'] = os.path.join(tempfile.mkdtemp(), 'bench_maintenance.db')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database  # noqa: E402
+import maintenance  # noqa: E402
+
+TAGS = ['Obiad', 'Vege', 'Zupy', 'Dla dzieci', 'Bez laktozy', 'Fit', 'Szybkie', 'Polskie']
+
+
+def populate(conn, total):
+    rng = random.Random(42)
+    conn.executemany(
+        'INSERT INTO recipes (id, name, category, description, instructions) VALUES (?, ?, ?, ?, ?)',
+        ((i, f'Przepis {i}', rng.choice(['breakfast', 'lunch', 'dinner', 'snack']), 'Opis ' * 40,
+          json.dumps(['Krok 1', 'Krok 2', 'Krok 3'])) for i in range(1, total + 1))
+    )
+    conn.executemany(
+        'INSERT INTO ingredients (recipe_id, name, amount, unit) VALUES (?, ?, ?, ?)',
+        ((i, f'składnik {rng.randint(1, 500)}', 100, 'g') for i in range(1, total + 1) for _ in range(6))
+    )
+    conn.executemany(
+        'INSERT INTO recipe_categories (recipe_id, category_name) VALUES (?, ?)',
+        ((i, tag) for i in range(1, total + 1) for tag in rng.sample(TAGS, 2))
+    )
+    conn.commit()
+
+
+def reader(stop, latencies):
+    conn = database.get_db_connection()
+    conn.execute('PRAGMA busy_timeout = 5000')
+    while not stop.is_set():
+        started = time.perf_counter()
+        conn.execute(maintenance.QUERIES['list_page']).fetchall()
+        latencies.append((time.perf_counter() - started) * 1000)
+        time.sleep(0.001)
+    conn.close()
+
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    share = float(sys.argv[2]) if len(sys.argv) > 2 else 0.4
+    database.init_db()
+    conn = database.get_db_connection()
+    populate(conn, total)
+    maintenance.run()       # statistics for the full library, as if analyzed long ago
+    conn.execute('DELETE FROM recipes WHERE id % 100 < ?', (int(share * 100),))
+    conn.commit()
+    conn.close()
+
+    stop, latencies = threading.Event(), []
+    thread = threading.Thread(target=reader, args=(stop, latencies))
+    thread.start()
+    time.sleep(0.2)
+    baseline = len(latencies)
+    result = maintenance.run(max_seconds=600)
+    stop.set()
+    thread.join()
+
+    print(f'{total} recipes, {share:.0%} deleted\n')
+    print(f'{"":>16} {"before":>10} {"after":>10}')
+    for key in ('page_count', 'freelist_count', 'file_bytes'):
+        print(f'{key:>16} {result["before"][key]:>10} {result["after"][key]:>10}')
+    for name in maintenance.QUERIES:
+        print(f'{name:>16} {result["before"]["query_ms"][name]:>7.2f} ms {result["after"]["query_ms"][name]:>7.2f} ms')
+    print()
+    for step, detail in result['steps'].items():
+        print(f'{step}: {detail}')
+    during = sorted(latencies[baseline:])
+    print(f'\nreader during the run: {len(during)} queries, p50 {statistics.median(during):.2f} ms, '
+          f'p99 {during[int(len(during) * 0.99)]:.2f} ms, max {during[-1]:.2f} ms')
+
+
+if __name__ == '__main__':
+    main()
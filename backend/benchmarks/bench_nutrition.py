@@ -0,0 +1,72 @@
+"""
+Benchmark: full-library nutrition recompute (nutrition.recompute).
+
+Builds a throwaway database with synthetic recipes, each with a handful of
+ingredients drawn from a pool of centrumrespo-style names and units, none of
+them with nutrition, and times recomputing all of them, then a no-op rerun
+and a single-recipe recompute as done on every write.
+
+Usage:
+    python benchmarks/bench_nutrition.py [number_of_recipes]
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+
+os.environ['DATABASE_PATH'] = os.path.join(tempfile.mkdtemp(), 'bench_nutrition.db')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database  # noqa: E402
+import nutrition  # noqa: E402
+
+INGREDIENTS = [
+    ('mięsa z piersi kurczaka', 'g', None), ('czerwonej papryki', 'szt', '85 g'), ('cebuli', 'szt', None),
+    ('oliwy z oliwek', 'łyżka', None), ('ryżu basmati', 'g', None), ('jajka', '', None),
+    ('ząbki czosnku', 'ząbek', None), ('soli', 'szczypta', None), ('jogurtu greckiego', 'g', None),
+    ('płatków owsianych', 'g', None), ('banana', 'szt', '120 g'), ('masła orzechowego', 'łyżeczka', None),
+    ('pomidorów z puszki', 'opakowanie', None), ('sosu BBQ', 'łyżeczka', '30 g'), ('mleka 2%', 'ml', None),
+]
+
+
+def populate(conn, total):
+    rng = random.Random(42)
+    conn.executemany(
+        'INSERT INTO recipes (id, name, servings) VALUES (?, ?, ?)',
+        ((i, f'Przepis {i}', rng.choice([1, 2, 4])) for i in range(1, total + 1))
+    )
+    conn.executemany(
+        'INSERT INTO ingredients (recipe_id, name, amount, unit, notes) VALUES (?, ?, ?, ?, ?)',
+        ((i, f'{name} {rng.randint(0, 300)}' if rng.random() < 0.3 else name, rng.choice([0.5, 1, 2, 100, 150]),
+          unit, notes)
+         for i in range(1, total + 1) for name, unit, notes in rng.sample(INGREDIENTS, 8))
+    )
+    conn.commit()
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, (time.perf_counter() - start) * 1000
+
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    database.init_db()
+    conn = database.get_db_connection()
+    populate(conn, total)
+    names = conn.execute('SELECT COUNT(DISTINCT name) FROM ingredients').fetchone()[0]
+    print(f'{total} recipes, {total * 8} ingredients, {names} distinct names\n')
+
+    for label, ids in [('full library', None), ('full library, no-op', None), ('one recipe', [total // 2])]:
+        changed, ms = timed(lambda: nutrition.recompute(conn.cursor(), ids))
+        conn.commit()
+        print(f'{label:>22} {ms:>9.0f} ms  {changed} recipes updated')
+
+    conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+"""
+Benchmark: JSON encode time and bytes on the wire for recipe list pages.
+
+Builds synthetic recipes shaped like the centrumrespo imports (Polish text,
+6-10 instruction steps, a long article in `notes`) and compares:
+
+    old      - stdlib json, ensure_ascii=True, instructions/tags as JSON strings
+    stdlib   - StdlibJSONProvider (UTF-8, decoded arrays)
+    orjson   - OrjsonProvider (only if orjson is installed)
+
+Usage:
+    python benchmarks/bench_responses.py [number_of_recipes]
+"""
+
+import gzip
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask  # noqa: E402
+from json_provider import StdlibJSONProvider, OrjsonProvider, orjson  # noqa: E402
+from compression import brotli  # noqa: E402
+from serializers import recipe_to_dict  # noqa: E402
+
+WORDS = (
+    "kurczak papryka cebula czosnek śmietana pomidory makaron ryż jajka "
+    "smażyć gotować dodać wymieszać przyprawić sól pieprz łyżka szklanka "
+    "piekarnik minut ząbek pokroić drobno podsmażyć złocisty sos świeży"
+).split()
+
+
+def sentence(rng, n):
+    return ' '.join(rng.choice(WORDS) for _ in range(n)).capitalize() + '.'
+
+
+def make_row(rng, i):
+    """A recipes row as SQLite returns it (JSON columns still strings)."""
+    return {
+        'id': i,
+        'name': f"{sentence(rng, 4)[:-1]} #{i}",
+        'description': sentence(rng, 25),
+        'category': rng.choice(['breakfast', 'lunch', 'dinner', 'snack', None]),
+        'image_url': f"https://centrumrespo.pl/wp-content/uploads/2024/01/przepis-{i}.jpg",
+        'source_url': f"https://centrumrespo.pl/przepisy/przepis-{i}/",
+        'source': 'centrumrespo',
+        'difficulty': rng.choice(['Łatwy', 'Średni', 'Trudny']),
+        'prep_time_minutes': rng.randint(5, 60),
+        'total_time_minutes': rng.randint(10, 120),
+        'servings': rng.randint(1, 6),
+        'instructions': json.dumps(
+            [sentence(rng, rng.randint(10, 30)) for _ in range(rng.randint(6, 10))],
+            ensure_ascii=False,
+        ),
+        'notes': ' '.join(sentence(rng, 20) for _ in range(15)),
+        'tags': json.dumps(['obiad', 'fit'], ensure_ascii=False),
+        'calories_per_serving': round(rng.uniform(150, 900), 1),
+        'protein_per_serving': round(rng.uniform(5, 60), 1),
+        'fat_per_serving': round(rng.uniform(2, 40), 1),
+        'carbs_per_serving': round(rng.uniform(5, 100), 1),
+        'sodium_per_serving': round(rng.uniform(50, 1500), 1),
+        'fiber_per_serving': round(rng.uniform(0, 15), 1),
+        'rating': round(rng.uniform(3, 5), 2),
+        'rating_count': rng.randint(0, 300),
+        'created_at': '2025-01-01 12:00:00',
+    }
+
+
+def timed(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return result, best * 1000
+
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    rng = random.Random(42)
+    rows = [make_row(rng, i) for i in range(total)]
+    decoded = [recipe_to_dict(row) for row in rows]
+
+    app = Flask(__name__)
+    encoders = {
+        'old': lambda page: json.dumps(page[0], ensure_ascii=True, sort_keys=True,
+                                       separators=(',', ':')).encode('utf-8'),
+        'stdlib': lambda page: StdlibJSONProvider(app).dumps(
+            page[1], separators=(',', ':')).encode('utf-8'),
+    }
+    if orjson is not None:
+        encoders['orjson'] = lambda page: OrjsonProvider(app)._dumps_bytes(page[1])
+
+    print(f"{'page':>10} {'encoder':>8} {'encode ms':>10} {'raw KB':>8} "
+          f"{'gzip KB':>8} {'gzip ms':>8} {'br KB':>8} {'br ms':>8}")
+
+    for size in (20, 100, total):
+        page = (
+            {'recipes': rows[:size], 'page': 1, 'per_page': size, 'total': total},
+            {'recipes': decoded[:size], 'page': 1, 'per_page': size, 'total': total},
+        )
+        for name, encode in encoders.items():
+            body, encode_ms = timed(lambda: encode(page), repeat=5)
+            gz, gz_ms = timed(lambda: gzip.compress(body, compresslevel=6), repeat=3)
+            if brotli is not None:
+                br, br_ms = timed(lambda: brotli.compress(body, quality=5), repeat=3)
+                br_cols = f"{len(br) / 1024:>8.1f} {br_ms:>8.2f}"
+            else:
+                br_cols = f"{'-':>8} {'-':>8}"
+            print(f"{size:>10} {name:>8} {encode_ms:>10.2f} {len(body) / 1024:>8.1f} "
+                  f"{len(gz) / 1024:>8.1f} {gz_ms:>8.2f} {br_cols}")
+
+
+if __name__ == '__main__':
+    main()
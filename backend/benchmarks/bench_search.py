@@ -0,0 +1,70 @@
+"""
+Benchmark: fuzzy name search (search.py) vs LIKE on a large library.
+
+Builds a throwaway database with synthetic Polish recipe names and times
+search.fuzzy_matches() and the plain `name LIKE %term%` for a few queries,
+including ones without diacritics and with typos.
+
+Usage:
+    python benchmarks/bench_search.py [number_of_recipes]
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+
+os.environ['DATABASE_PATH'] = os.path.join(tempfile.mkdtemp(), 'bench_search.db')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database  # noqa: E402
+import search  # noqa: E402
+
+DISHES = ['Żurek', 'Pierogi', 'Barszcz', 'Gołąbki', 'Bigos', 'Placki', 'Kotlet', 'Sałatka',
+          'Zupa', 'Makaron', 'Owsianka', 'Gulasz', 'Naleśniki', 'Risotto', 'Curry']
+WITH = ['z kurczakiem', 'z łososiem', 'ruskie', 'z mięsem', 'ze szpinakiem', 'wegańskie',
+        'po staropolsku', 'z pieczarkami', 'z serem', 'w sosie pomidorowym', 'z ciecierzycą']
+# Filler so names aren't all built from the same two dozen words
+_letters = random.Random(1)
+WORDS = [''.join(_letters.choice('abcdefghijklmnoprstuwyząęłóśżź') for _ in range(7))
+         for _ in range(5000)]
+QUERIES = ['zurek', 'pierogii ruskie', 'golabki', 'salatka z lososiem', 'nalesniki', 'gu']
+
+
+def timed(fn, repeat=5):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return result, best * 1000
+
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    rng = random.Random(7)
+    database.init_db()
+    conn = database.get_db_connection()
+    start = time.perf_counter()
+    conn.executemany(
+        'INSERT INTO recipes (name) VALUES (?)',
+        ((f'{rng.choice(DISHES)} {rng.choice(WITH)} {rng.choice(WORDS)} {rng.choice(WORDS)} #{i}',)
+         for i in range(total))
+    )
+    conn.commit()
+    print(f'{total} recipes inserted (with trigram index triggers) in {time.perf_counter() - start:.1f} s\n')
+
+    print(f"{'query':>22} {'fuzzy ms':>9} {'hits':>6} {'LIKE ms':>8} {'hits':>6}  best match")
+    for query in QUERIES:
+        hits, fuzzy_ms = timed(lambda: search.fuzzy_matches(conn, query))
+        like, like_ms = timed(lambda: conn.execute(
+            'SELECT id FROM recipes WHERE name LIKE ?', (f'%{query}%',)).fetchall())
+        best = conn.execute('SELECT name FROM recipes WHERE id = ?', (hits[0][0],)).fetchone()[0] if hits else '-'
+        print(f'{query:>22} {fuzzy_ms:>9.1f} {len(hits):>6} {like_ms:>8.1f} {len(like):>6}  {best}')
+
+    conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,332 @@
+"""
+Load test: many simulated users against a local gunicorn running the real app.
+
+Seeds a throwaway database (or a copy of --db) with recipes and one user per
+client, starts `gunicorn app:app` on it and logs every client in through
+/api/auth/login. Each client is its own process, keeps its own session cookie
+and for --duration seconds picks actions from a weighted mix: browse, search,
+open a recipe, toggle a favorite, add a meal plan, edit a recipe. The report
+has throughput, p50/p99 latency and error rate per endpoint, with the
+"database is locked" errors counted separately.
+
+Rate limiting is switched off in the server (RATELIMIT_ENABLED=0), all
+clients come from one address.
+
+Usage:
+    python benchmarks/loadtest.py --clients 16 --workers 4 --duration 30
+    python benchmarks/loadtest.py --mix browse=1,favorite=1,meal_plan=1 --json report.json
+"""
+
+import argparse
+import http.cookiejar
+import json
+import multiprocessing
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND)
+
+PASSWORD = 'loadtest-password'
+USER_PREFIX = 'loadtest'
+
+# action -> relative weight (reads dominate, like the real app)
+DEFAULT_MIX = {
+    'browse': 40,
+    'search': 20,
+    'recipe': 15,
+    'favorite': 10,
+    'meal_plan': 10,
+    'edit': 5,
+}
+
+DISHES = ['Żurek', 'Pierogi', 'Barszcz', 'Gołąbki', 'Bigos', 'Placki', 'Kotlet', 'Sałatka',
+          'Zupa', 'Makaron', 'Owsianka', 'Gulasz', 'Naleśniki', 'Risotto', 'Curry']
+WITH = ['z kurczakiem', 'z łososiem', 'ruskie', 'z mięsem', 'ze szpinakiem', 'wegańskie',
+        'z pieczarkami', 'z serem', 'w sosie pomidorowym', 'z ciecierzycą']
+TAGS = ['Obiad', 'Vege', 'Zupy', 'Dla dzieci', 'Bez laktozy', 'Fit', 'Szybkie', 'Polskie']
+SEARCHES = ['zurek', 'pierogi', 'golabki', 'salatka z lososiem', 'kurczak', 'curry']
+CATEGORIES = ['breakfast', 'lunch', 'dinner', 'snack']
+
+
+def parse_mix(text):
+    mix = {}
+    for part in text.split(','):
+        name, _, weight = part.partition('=')
+        if name not in DEFAULT_MIX:
+            raise argparse.ArgumentTypeError(f'unknown action {name!r} (valid: {", ".join(DEFAULT_MIX)})')
+        mix[name] = float(weight or 1)
+    return mix
+
+
+# --- Setup ---
+
+def prepare_database(path, recipes, clients, source=None):
+    """Seed (or copy) the database at `path`; returns the recipe ids."""
+    os.environ['DATABASE_PATH'] = path
+    import database
+    from werkzeug.security import generate_password_hash
+    database.DATABASE = path
+
+    if source:
+        shutil.copyfile(source, path)
+        from migrate import migrate
+        migrate()
+    else:
+        database.init_db()
+
+    conn = database.get_db_connection()
+    if not source:
+        rng = random.Random(3)
+        conn.executemany('''
+            INSERT INTO recipes (name, category, prep_time_minutes, calories_per_serving,
+                                 protein_per_serving, instructions)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', ((f'{rng.choice(DISHES)} {rng.choice(WITH)} #{i}', rng.choice(CATEGORIES),
+               rng.randint(5, 90), rng.randint(150, 900), rng.randint(5, 60),
+               json.dumps(['Krok 1', 'Krok 2']))
+              for i in range(recipes)))
+        conn.executemany(
+            'INSERT INTO recipe_categories (recipe_id, category_name) VALUES (?, ?)',
+            ((row[0], tag) for row in conn.execute('SELECT id FROM recipes').fetchall()
+             for tag in rng.sample(TAGS, 2))
+        )
+
+    password_hash = generate_password_hash(PASSWORD)
+    conn.executemany(
+        'INSERT OR IGNORE INTO users (username, password_hash) VALUES (?, ?)',
+        ((f'{USER_PREFIX}{i}', password_hash) for i in range(clients))
+    )
+    conn.commit()
+    ids = [row[0] for row in conn.execute('SELECT id FROM recipes')]
+    conn.close()
+    return ids
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_server(db_path, port, workers, threads):
+    env = dict(os.environ, DATABASE_PATH=db_path, RATELIMIT_ENABLED='0',
+               SECRET_KEY=os.environ.get('SECRET_KEY', 'loadtest'))
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '--bind', f'127.0.0.1:{port}',
+         '--workers', str(workers), '--threads', str(threads), '--log-level', 'warning', 'app:app'],
+        cwd=BACKEND, env=env,
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f'gunicorn exited with code {server.returncode}')
+        try:
+            urllib.request.urlopen(f'http://127.0.0.1:{port}/api/auth/me', timeout=1)
+            return server
+        except OSError:
+            time.sleep(0.2)
+    server.terminate()
+    raise RuntimeError('gunicorn did not start within 30 s')
+
+
+# --- Clients ---
+
+class Client:
+    def __init__(self, base_url, recipe_ids, seed):
+        self.base_url = base_url
+        self.recipe_ids = recipe_ids
+        self.rng = random.Random(seed)
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar())
+        )
+        self.favorites = set()
+        # endpoint -> [latencies (s)], [statuses], locked count
+        self.results = {}
+
+    def request(self, endpoint, method, path, body=None):
+        data = json.dumps(body).encode() if body is not None else None
+        req = urllib.request.Request(self.base_url + path, data=data, method=method)
+        if data is not None:
+            req.add_header('Content-Type', 'application/json')
+
+        start = time.perf_counter()
+        try:
+            with self.opener.open(req, timeout=30) as response:
+                response.read()
+                status, text = response.status, ''
+        except urllib.error.HTTPError as e:
+            status, text = e.code, e.read().decode('utf-8', 'replace')
+        except OSError as e:
+            status, text = 0, str(e)
+        elapsed = time.perf_counter() - start
+
+        stats = self.results.setdefault(endpoint, {'latencies': [], 'statuses': [], 'locked': 0})
+        stats['latencies'].append(elapsed)
+        stats['statuses'].append(status)
+        if 'database is locked' in text:
+            stats['locked'] += 1
+        return status
+
+    def login(self, username):
+        status = self.request('POST /api/auth/login', 'POST', '/api/auth/login',
+                              {'username': username, 'password': PASSWORD})
+        if status != 200:
+            raise RuntimeError(f'login as {username} failed with status {status}')
+
+    def browse(self):
+        params = f'page={self.rng.randint(1, 20)}&per_page=20'
+        if self.rng.random() < 0.3:
+            params += f'&category={self.rng.choice(CATEGORIES)}'
+        self.request('GET /api/recipes', 'GET', f'/api/recipes?{params}')
+
+    def search(self):
+        term = urllib.request.quote(self.rng.choice(SEARCHES))
+        self.request('GET /api/recipes?search', 'GET', f'/api/recipes?search={term}&fuzzy=1&page=1')
+
+    def recipe(self):
+        self.request('GET /api/recipes/<id>', 'GET', f'/api/recipes/{self.rng.choice(self.recipe_ids)}')
+
+    def favorite(self):
+        # Un-favorite about as often as favorite, like a user toggling the heart
+        if self.favorites and self.rng.random() < 0.5:
+            recipe_id = self.rng.choice(sorted(self.favorites))
+        else:
+            recipe_id = self.rng.choice(self.recipe_ids)
+        if recipe_id in self.favorites:
+            self.request('DELETE /api/favorites/<id>', 'DELETE', f'/api/favorites/{recipe_id}')
+            self.favorites.discard(recipe_id)
+        else:
+            self.request('POST /api/favorites/<id>', 'POST', f'/api/favorites/{recipe_id}')
+            self.favorites.add(recipe_id)
+
+    def meal_plan(self):
+        self.request('POST /api/meal-plans', 'POST', '/api/meal-plans', {
+            'date': f'2026-{self.rng.randint(1, 12):02d}-{self.rng.randint(1, 28):02d}',
+            'meal_type': self.rng.choice(CATEGORIES),
+            'recipe_id': self.rng.choice(self.recipe_ids),
+            'servings': 1,
+        })
+
+    def edit(self):
+        self.request('PATCH /api/recipes/<id>', 'PATCH', f'/api/recipes/{self.rng.choice(self.recipe_ids)}',
+                     {'prep_time_minutes': self.rng.randint(5, 90)})
+
+
+def run_client(task):
+    index, base_url, recipe_ids, mix, duration = task
+    client = Client(base_url, recipe_ids, seed=index)
+    client.login(f'{USER_PREFIX}{index}')
+
+    actions = [getattr(client, name) for name in mix]
+    weights = list(mix.values())
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        client.rng.choices(actions, weights)[0]()
+    return client.results
+
+
+# --- Report ---
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, round(fraction * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def merge(results):
+    merged = {}
+    for client_results in results:
+        for endpoint, stats in client_results.items():
+            total = merged.setdefault(endpoint, {'latencies': [], 'statuses': [], 'locked': 0})
+            total['latencies'].extend(stats['latencies'])
+            total['statuses'].extend(stats['statuses'])
+            total['locked'] += stats['locked']
+    return merged
+
+
+def summarize(merged, elapsed):
+    rows = []
+    for endpoint in sorted(merged):
+        stats = merged[endpoint]
+        latencies = sorted(stats['latencies'])
+        errors = sum(1 for status in stats['statuses'] if not 200 <= status < 300)
+        rows.append({
+            'endpoint': endpoint,
+            'requests': len(latencies),
+            'rps': len(latencies) / elapsed,
+            'error_rate': errors / len(latencies),
+            'locked': stats['locked'],
+            'p50_ms': percentile(latencies, 0.50) * 1000,
+            'p99_ms': percentile(latencies, 0.99) * 1000,
+            'max_ms': latencies[-1] * 1000,
+        })
+    return rows
+
+
+def print_report(rows, elapsed, settings):
+    print(f"\n{settings['clients']} clients, {settings['workers']} workers x {settings['threads']} threads, "
+          f"{elapsed:.1f} s\n")
+    print(f"{'endpoint':<28} {'requests':>8} {'req/s':>8} {'errors':>7} {'locked':>6} "
+          f"{'p50 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for row in rows:
+        print(f"{row['endpoint']:<28} {row['requests']:>8} {row['rps']:>8.1f} {row['error_rate']:>7.1%} "
+              f"{row['locked']:>6} {row['p50_ms']:>8.1f} {row['p99_ms']:>8.1f} {row['max_ms']:>8.1f}")
+    total = sum(row['requests'] for row in rows)
+    print(f"{'total':<28} {total:>8} {total / elapsed:>8.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Concurrent load test against a local gunicorn')
+    parser.add_argument('--clients', type=int, default=8, help='simulated users, one process each')
+    parser.add_argument('--duration', type=float, default=20, help='seconds of load per client')
+    parser.add_argument('--workers', type=int, default=2, help='gunicorn worker processes')
+    parser.add_argument('--threads', type=int, default=1, help='threads per gunicorn worker')
+    parser.add_argument('--recipes', type=int, default=2000, help='recipes to seed')
+    parser.add_argument('--db', help='load-test a copy of this database instead of a seeded one')
+    parser.add_argument('--mix', type=parse_mix, default=DEFAULT_MIX,
+                        help='action weights, e.g. browse=4,search=2,favorite=1,meal_plan=1,edit=1')
+    parser.add_argument('--json', help='also write the report to this file')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='loadtest-')
+    db_path = os.path.join(workdir, 'loadtest.db')
+    recipe_ids = prepare_database(db_path, args.recipes, args.clients, source=args.db)
+    if not recipe_ids:
+        sys.exit('The database has no recipes to load-test with.')
+
+    port = free_port()
+    server = start_server(db_path, port, args.workers, args.threads)
+    try:
+        base_url = f'http://127.0.0.1:{port}'
+        tasks = [(i, base_url, recipe_ids, args.mix, args.duration) for i in range(args.clients)]
+        start = time.perf_counter()
+        with multiprocessing.get_context('spawn').Pool(args.clients) as pool:
+            results = pool.map(run_client, tasks)
+        elapsed = time.perf_counter() - start
+    finally:
+        server.terminate()
+        server.wait()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    rows = summarize(merge(results), elapsed)
+    settings = {'clients': args.clients, 'workers': args.workers, 'threads': args.threads,
+                'duration': args.duration, 'mix': args.mix}
+    print_report(rows, elapsed, settings)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'settings': settings, 'elapsed': elapsed, 'endpoints': rows}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,216 @@
+"""
+In-memory columnar catalog for recipe listings (/api/recipes?page=...).
+
+Each worker keeps the columns the listing filters and sorts on as NumPy
+arrays, one entry per recipe in id order: float64 for the nutrition/time
+columns and ratios (NaN = NULL), an int16 code per category (the names
+interned once), the rank of each name, and per tag the positions of its
+recipes. Category, tag and range filters become boolean masks, sorts a
+lexsort, and SQLite is only asked for the page's rows by primary key.
+
+Like facets.py it is rebuilt when data_revision changes, but at most once
+per REBUILD_SECONDS: during a burst of writes requests fall back to SQL
+instead of rebuilding on every one. Needs NumPy (optional, without it or
+with RECIPE_CATALOG=0 every listing uses SQL). Text searches always use SQL.
+
+Results match the SQL path, NULLs included (first when ascending, last when
+descending). A column holding something other than numbers is left to SQL.
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+
+from database import data_revision
+from recipe_filters import RANGE_FILTERS
+from serializers import recipe_to_dict
+
+try:
+    import numpy as np
+except ImportError:  # optional dependency
+    np = None
+
+ENABLED = os.environ.get('RECIPE_CATALOG', '1') != '0'
+REBUILD_SECONDS = 5.0
+
+# filter/sort name -> recipes column. Not the popularity counters: favorites
+# and plans change them without moving data_revision, SQL has them indexed.
+NUMERIC_COLUMNS = {
+    **{name: column.removeprefix('r.') for name, column in RANGE_FILTERS.items()},
+    'rating': 'rating',
+}
+# recipe_filters.RATIOS as (numerator, denominator) names in NUMERIC_COLUMNS
+RATIO_PARTS = {
+    'protein_per_kcal': ('protein', 'calories'),
+    'fiber_per_kcal': ('fiber', 'calories'),
+}
+
+_catalog = None
+_built_at = 0.0
+_lock = threading.Lock()
+
+
+def is_number(value):
+    return value is None or (isinstance(value, (int, float)) and not isinstance(value, bool))
+
+
+class Catalog:
+    def __init__(self, revision, ids, names, categories, numeric, tags):
+        self.revision = revision
+        self.size = len(ids)
+        self.ids = np.asarray(ids, dtype=np.int64)
+
+        # Rank by name, compared like SQLite's BINARY collation (UTF-8 bytes
+        # order = code point order); equal names share a rank
+        self.name_rank = np.empty(self.size, dtype=np.int32)
+        rank, previous = -1, None
+        for position in sorted(range(self.size), key=names.__getitem__):
+            if rank < 0 or names[position] != previous:
+                rank, previous = rank + 1, names[position]
+            self.name_rank[position] = rank
+
+        self.category_codes = {}
+        codes = np.full(self.size, -1, dtype=np.int16)
+        for position, category in enumerate(categories):
+            if category is not None:
+                codes[position] = self.category_codes.setdefault(sys.intern(category), len(self.category_codes))
+        self.category = codes
+
+        # Only columns with nothing but numbers and NULLs can be answered here
+        self.numeric = {}
+        for name, values in numeric.items():
+            if all(is_number(value) for value in values):
+                self.numeric[name] = np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+        for name, (top, bottom) in RATIO_PARTS.items():
+            if top in self.numeric and bottom in self.numeric:
+                denominator = self.numeric[bottom]
+                ratio = np.full(self.size, np.nan)
+                np.divide(self.numeric[top], denominator, out=ratio, where=denominator != 0)
+                self.numeric[name] = ratio
+
+        self.tags = {sys.intern(tag): np.unique(np.asarray(positions, dtype=np.int32))
+                     for tag, positions in tags.items()}
+
+    @classmethod
+    def build(cls, conn, revision):
+        cursor = conn.cursor()
+        cursor.row_factory = None
+        columns = ', '.join(NUMERIC_COLUMNS.values())
+        rows = cursor.execute(f'SELECT id, name, category, {columns} FROM recipes ORDER BY id').fetchall()
+        ids, names, categories, *values = list(zip(*rows)) or [()] * (3 + len(NUMERIC_COLUMNS))
+        numeric = dict(zip(NUMERIC_COLUMNS, values))
+
+        positions = {recipe_id: position for position, recipe_id in enumerate(ids)}
+        tags = {}
+        for recipe_id, tag in cursor.execute('SELECT recipe_id, category_name FROM recipe_categories'):
+            position = positions.get(recipe_id)
+            if position is not None:
+                tags.setdefault(tag, []).append(position)
+
+        return cls(revision, ids, names, categories, numeric, tags)
+
+    def nbytes(self):
+        """Memory held by the arrays (the per-worker cost of the catalog)."""
+        arrays = [self.ids, self.name_rank, self.category, *self.numeric.values(), *self.tags.values()]
+        return sum(array.nbytes for array in arrays)
+
+    def can_answer(self, ranges, sort):
+        names = [name for name, _, _ in ranges] + [name for name, _ in sort]
+        return all(name in ('id', 'name') or name in self.numeric for name in names)
+
+    def matches(self, category=None, tag=None, ranges=()):
+        """Positions of the recipes passing the filters, in id order."""
+        mask = np.ones(self.size, dtype=bool)
+        if category:
+            code = self.category_codes.get(category)
+            if code is None:
+                return np.empty(0, dtype=np.intp)
+            mask &= self.category == code
+        if tag:
+            tagged = np.zeros(self.size, dtype=bool)
+            tagged[self.tags.get(tag, np.empty(0, dtype=np.int32))] = True
+            mask &= tagged
+        for name, operator, value in ranges:
+            # NaN (NULL) compares false both ways, like in SQL
+            column = self.numeric[name]
+            mask &= column >= value if operator == '>=' else column <= value
+        return np.flatnonzero(mask)
+
+    def sort_keys(self, positions, name, descending):
+        """lexsort keys for one sort term, most significant first."""
+        if name == 'id':
+            values = self.ids[positions]
+            return [-values if descending else values]
+        if name == 'name':
+            values = self.name_rank[positions]
+            return [-values if descending else values]
+
+        values = self.numeric[name][positions]
+        null = np.isnan(values)
+        values = np.where(null, 0.0, values)
+        # SQLite puts NULLs first ascending and last descending
+        if descending:
+            return [null, -values]
+        return [~null, values]
+
+    def order(self, positions, sort):
+        if sort == [('id', True)]:
+            return positions[::-1]
+        keys = [key for name, descending in sort for key in self.sort_keys(positions, name, descending)]
+        return positions[np.lexsort(keys[::-1])]
+
+    def page(self, category, tag, ranges, sort, page, per_page):
+        """(total, page, total_pages, ids on the page), the page clamped like the SQL path."""
+        positions = self.matches(category, tag, ranges)
+        total = len(positions)
+        total_pages = max(1, (total + per_page - 1) // per_page)
+        page = max(1, min(page, total_pages))
+        offset = (page - 1) * per_page
+        ordered = self.order(positions, sort)
+        return total, page, total_pages, self.ids[ordered[offset:offset + per_page]].tolist()
+
+
+def get_catalog(conn):
+    """This worker's catalog for the current data revision, or None to use SQL."""
+    global _catalog, _built_at
+    if np is None or not ENABLED:
+        return None
+
+    revision = data_revision(conn)
+    if _catalog is not None and _catalog.revision == revision:
+        return _catalog
+    if time.monotonic() - _built_at < REBUILD_SECONDS or not _lock.acquire(blocking=False):
+        return None
+    try:
+        _catalog = Catalog.build(conn, revision)
+        _built_at = time.monotonic()
+        return _catalog
+    finally:
+        _lock.release()
+
+
+def list_page(conn, category=None, tag=None, ranges=(), sort=None, page=1, per_page=20):
+    """
+    A /api/recipes page answered from the catalog: {recipes, page, per_page,
+    total, total_pages}, or None when the catalog can't answer it.
+    """
+    sort = sort or [('id', True)]
+    catalog = get_catalog(conn)
+    if catalog is None or not catalog.can_answer(ranges, sort):
+        return None
+
+    total, page, total_pages, ids = catalog.page(category, tag, ranges, sort, page, per_page)
+    rows = {
+        row['id']: row for row in conn.execute(
+            'SELECT * FROM recipes WHERE id IN (SELECT value FROM json_each(?))', (json.dumps(ids),)
+        )
+    }
+    return {
+        "recipes": [recipe_to_dict(rows[recipe_id]) for recipe_id in ids if recipe_id in rows],
+        "page": page,
+        "per_page": per_page,
+        "total": total,
+        "total_pages": total_pages,
+    }
@@ -0,0 +1,127 @@
+"""
+Delta sync: what changed since a revision of change_log (migrations/0008).
+
+A client fetches changes_since(0) once (a full sync), keeps the returned
+revision and from then on asks only for what came after it. Every entity
+appears once, with its latest state: recipes and meal plans as upserted
+rows or deleted ids, and the user's favorites as added/removed recipe ids.
+
+Clients long-poll for the next change: RevisionWatcher lets any number of
+waiting requests share one thread and one connection per process, polling
+head_revision only while someone waits.
+"""
+
+import json
+import os
+import threading
+import time
+
+from database import get_db_connection
+from serializers import recipe_to_dict
+
+PAGE_SIZE = 500
+POLL_SECONDS = 1.0
+
+
+def head_revision(conn):
+    """Latest revision in the change log (0 when empty)."""
+    return conn.execute('SELECT COALESCE(MAX(revision), 0) FROM change_log').fetchone()[0]
+
+
+def fetch_rows(conn, table, ids):
+    if not ids:
+        return []
+    return conn.execute(
+        f'SELECT * FROM {table} WHERE id IN (SELECT value FROM json_each(?)) ORDER BY id',
+        (json.dumps(ids),)
+    ).fetchall()
+
+
+def changes_since(conn, since, user_id, limit=PAGE_SIZE):
+    """
+    {revision, has_more, reset, recipes, favorites, meal_plans} for the
+    changes after `since`. With has_more, ask again from `revision`. reset
+    means the client is ahead of this database (it was re-created) and has
+    to start over from 0.
+    """
+    # One read transaction, so the log and the rows agree
+    conn.execute('BEGIN')
+    try:
+        head = head_revision(conn)
+        rows = conn.execute('''
+            SELECT revision, entity, entity_id, op FROM change_log
+            WHERE revision > ? AND (entity != 'favorite' OR user_id = ?)
+            ORDER BY revision LIMIT ?
+        ''', (since, user_id, limit + 1)).fetchall()
+
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+
+        ids = {'recipe': ([], []), 'favorite': ([], []), 'meal_plan': ([], [])}
+        for row in rows:
+            upserts, deletes = ids[row['entity']]
+            (upserts if row['op'] == 'upsert' else deletes).append(row['entity_id'])
+
+        recipes = [recipe_to_dict(row) for row in fetch_rows(conn, 'recipes', ids['recipe'][0])]
+        meal_plans = [dict(row) for row in fetch_rows(conn, 'meal_plans', ids['meal_plan'][0])]
+    finally:
+        conn.rollback()
+
+    return {
+        'revision': rows[-1]['revision'] if has_more else head,
+        'has_more': has_more,
+        'reset': since > head,
+        'recipes': {'upserted': recipes, 'deleted': ids['recipe'][1]},
+        'favorites': {'added': ids['favorite'][0], 'removed': ids['favorite'][1]},
+        'meal_plans': {'upserted': meal_plans, 'deleted': ids['meal_plan'][1]},
+    }
+
+
+class RevisionWatcher:
+    """Wakes waiting requests when the change log moves on."""
+
+    def __init__(self, poll_seconds=POLL_SECONDS):
+        self.poll_seconds = poll_seconds
+        self.condition = threading.Condition()
+        self.head = None        # None while nobody waits: not known to be current
+        self.waiters = 0
+        self.pid = None
+
+    def start(self):
+        """The polling thread of this process (again after a fork)."""
+        if self.pid != os.getpid():
+            self.pid = os.getpid()
+            threading.Thread(target=self.poll, name='revision-watcher', daemon=True).start()
+
+    def poll(self):
+        conn = get_db_connection()
+        while True:
+            with self.condition:
+                while not self.waiters:
+                    self.head = None
+                    self.condition.wait()
+            head = head_revision(conn)
+            with self.condition:
+                if head != self.head:
+                    self.head = head
+                    self.condition.notify_all()
+            time.sleep(self.poll_seconds)
+
+    def wait(self, since, timeout):
+        """Block until the head revision isn't `since` or `timeout` seconds pass."""
+        deadline = time.monotonic() + timeout
+        with self.condition:
+            self.start()
+            self.waiters += 1
+            self.condition.notify_all()
+            try:
+                while self.head is None or self.head == since:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self.condition.wait(remaining)
+            finally:
+                self.waiters -= 1
+
+
+watcher = RevisionWatcher()
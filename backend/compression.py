@@ -0,0 +1,78 @@
+"""
+Response compression for the API.
+
+Responses bigger than COMPRESS_MIN_SIZE bytes are compressed with brotli or gzip,
+whichever the client prefers in Accept-Encoding. Brotli is only offered when the
+`brotli` package is installed, gzip always works (stdlib).
+
+Config (app.config):
+    COMPRESS_MIN_SIZE      - don't bother below this many bytes (default 1024)
+    COMPRESS_GZIP_LEVEL    - 1-9 (default 6)
+    COMPRESS_BROTLI_QUALITY - 0-11 (default 5, higher is too slow per request)
+"""
+
+import gzip
+
+from flask import current_app, request
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = {
+    'application/json',
+    'text/html',
+    'text/css',
+    'text/plain',
+    'text/csv',
+    'text/javascript',
+    'application/javascript',
+    'application/x-ndjson',
+    'image/svg+xml',
+}
+
+
+def available_encodings():
+    """Encodings we can produce, in server preference order."""
+    if brotli is not None:
+        return ['br', 'gzip']
+    return ['gzip']
+
+
+def compress(data, encoding, config):
+    if encoding == 'br':
+        return brotli.compress(data, quality=config.get('COMPRESS_BROTLI_QUALITY', 5))
+    return gzip.compress(data, compresslevel=config.get('COMPRESS_GZIP_LEVEL', 6), mtime=0)
+
+
+def init_compression(app):
+    app.config.setdefault('COMPRESS_MIN_SIZE', 1024)
+    app.after_request(compress_response)
+
+
+def compress_response(response):
+    if (
+        response.direct_passthrough
+        or response.is_streamed
+        or response.status_code < 200
+        or response.status_code in (204, 206, 304)
+        or 'Content-Encoding' in response.headers
+        or response.mimetype not in COMPRESSIBLE_MIMETYPES
+    ):
+        return response
+
+    # The body depends on Accept-Encoding from now on, even if we skip it below
+    response.vary.add('Accept-Encoding')
+
+    encoding = request.accept_encodings.best_match(available_encodings())
+    if encoding is None:
+        return response
+
+    data = response.get_data()
+    if len(data) < current_app.config['COMPRESS_MIN_SIZE']:
+        return response
+
+    response.set_data(compress(data, encoding, current_app.config))
+    response.headers['Content-Encoding'] = encoding
+    return response
@@ -1,5 +1,17 @@
+import contextvars
 import sqlite3
 import os 
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+from folding import fold
+
+try:
+    import fcntl
+except ImportError:  # Windows: no file locks, migrations rely on BEGIN IMMEDIATE only
+    fcntl = None
 
 # Absolute path
 DATABASE = os.environ.get(
@@ -8,6 +20,27 @@ DATABASE = os.environ.get(
 )
 SCHEMA = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'schema.sql')
 
+# Write transactions (write_transaction below): how long SQLite itself waits
+# for the lock per attempt, and how often we try again after that
+WRITE_BUSY_TIMEOUT = float(os.environ.get('WRITE_BUSY_TIMEOUT', 2.0))
+WRITE_RETRIES = int(os.environ.get('WRITE_RETRIES', 4))
+WRITE_BACKOFF = 0.05
+
+# WRITE_QUEUE=1: one write transaction at a time across all workers, the
+# others wait their turn (up to WRITE_QUEUE_TIMEOUT seconds) on a file lock
+WRITE_QUEUE = os.environ.get('WRITE_QUEUE', '') == '1'
+WRITE_QUEUE_TIMEOUT = float(os.environ.get('WRITE_QUEUE_TIMEOUT', 10))
+
+_writer_lock = threading.Lock()
+
+# Set by profiling.py while it profiles a request: called with every SQL
+# statement run on connections opened meanwhile
+SQL_TRACE = contextvars.ContextVar('SQL_TRACE', default=None)
+
+
+class DatabaseBusy(Exception):
+    """The write lock could not be taken; the API answers 503 with Retry-After."""
+
 def get_db_connection():
     conn = sqlite3.connect(DATABASE)
 
@@ -16,9 +49,122 @@ def get_db_connection():
 
     conn.execute("PRAGMA foreign_keys = ON")
 
+    # Used by the recipe_search triggers (migrations/0006_recipe_search.sql)
+    conn.create_function('fold', 1, fold, deterministic=True)
+
+    trace = SQL_TRACE.get()
+    if trace is not None:
+        conn.set_trace_callback(trace)
+
     return conn
 
+def data_revision(conn):
+    """Current revision of the recipe tables (bumped by triggers on every write)."""
+    row = conn.execute('SELECT revision FROM data_revision WHERE id = 1').fetchone()
+    return row[0] if row else 0
+
+@contextmanager
+def file_lock(path, blocking=True, timeout=None):
+    """
+    Exclusive lock on `path` across processes (e.g. gunicorn workers).
+    Yields True if the lock is held; with blocking=False yields False
+    straight away when another process has it, with a timeout (seconds)
+    once it has waited that long.
+    """
+    if fcntl is None:
+        yield True
+        return
+
+    with open(path, 'a') as lock_file:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            flags = fcntl.LOCK_EX if blocking and deadline is None else fcntl.LOCK_EX | fcntl.LOCK_NB
+            try:
+                fcntl.flock(lock_file, flags)
+                break
+            except BlockingIOError:
+                if deadline is None or time.monotonic() >= deadline:
+                    yield False
+                    return
+                time.sleep(0.005)
+        try:
+            yield True
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def is_lock_error(error):
+    """True for SQLite's "database is locked" / "database table is locked" errors."""
+    return isinstance(error, sqlite3.OperationalError) and 'locked' in str(error)
+
+def begin_immediate(conn, retries=None):
+    """
+    BEGIN IMMEDIATE: take the write lock now rather than at the first write,
+    so a transaction never fails half way through. Lock errors are retried
+    with jittered exponential backoff; raises DatabaseBusy when they run out.
+    """
+    retries = WRITE_RETRIES if retries is None else retries
+    for attempt in range(retries + 1):
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            return
+        except sqlite3.OperationalError as e:
+            if not is_lock_error(e):
+                raise
+            if attempt == retries:
+                raise DatabaseBusy(str(e)) from e
+        # Full jitter, so writers that collided don't all come back together
+        time.sleep(random.uniform(0, WRITE_BACKOFF * 2 ** attempt))
+
+@contextmanager
+def writer_slot():
+    """With WRITE_QUEUE on, wait for this process's and then the database's writer turn."""
+    if not WRITE_QUEUE:
+        yield
+        return
+
+    if not _writer_lock.acquire(timeout=WRITE_QUEUE_TIMEOUT):
+        raise DatabaseBusy('Timed out waiting in the write queue')
+    try:
+        with file_lock(DATABASE + '.write.lock', timeout=WRITE_QUEUE_TIMEOUT) as held:
+            if not held:
+                raise DatabaseBusy('Timed out waiting in the write queue')
+            yield
+    finally:
+        _writer_lock.release()
+
+@contextmanager
+def write_transaction():
+    """
+    A connection with an open BEGIN IMMEDIATE transaction, for every write:
+
+        with write_transaction() as conn:
+            conn.execute('INSERT ...')
+
+    Commits when the block ends, rolls back if it raises and always closes
+    the connection. Lock errors become DatabaseBusy. Don't nest them.
+    """
+    with writer_slot():
+        conn = get_db_connection()
+        try:
+            conn.execute(f'PRAGMA busy_timeout = {int(WRITE_BUSY_TIMEOUT * 1000)}')
+            begin_immediate(conn)
+            try:
+                yield conn
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+        except sqlite3.OperationalError as e:
+            if is_lock_error(e):
+                raise DatabaseBusy(str(e)) from e
+            raise
+        finally:
+            conn.close()
+
 def init_db():
+    """Recreate the recipe tables from schema.sql (deletes their data!) and migrate."""
+    from migrate import migrate
+
     conn = get_db_connection()
 
     with open(SCHEMA, 'r') as f:
@@ -28,7 +174,28 @@ def init_db():
 
         conn.close()
 
-        print("Database initialized")
+    migrate()
+
+    # Dropping tables fires no triggers; move the revision on so caches rebuild
+    conn = get_db_connection()
+    conn.execute('UPDATE data_revision SET revision = revision + 1')
+    conn.commit()
+    conn.close()
+
+    print("Database initialized")
 
 if __name__ == "__main__":
-    init_db()
\ No newline at end of file
+    import sys
+
+    conn = get_db_connection()
+    has_recipes = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'recipes'"
+    ).fetchone()
+    conn.close()
+
+    if has_recipes and '--force' not in sys.argv:
+        print(f"{DATABASE} already has data. This would delete every recipe.")
+        print("Use `python migrate.py` to update the schema, or pass --force to wipe it.")
+        sys.exit(1)
+
+    init_db()
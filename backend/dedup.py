@@ -0,0 +1,184 @@
+"""
+Near-duplicate recipe detection, for imports and a cleanup report.
+
+Recipes are blocked by a title key: the folded title's words, minus
+stopwords and filler like "fit" or "domowy", cut to STEM letters (a crude
+Polish stemmer: "kurczakiem" and "kurczaka" both become "kurcz") and sorted.
+Only recipes in the same block are compared, on the Jaccard similarity of
+their ingredient signatures (the same stems over all ingredient names).
+From SIMILARITY up they're duplicates.
+
+Each recipe is compared with at most MAX_BLOCK others, the latest in its
+block, so checking an import of n recipes against a library of m is
+O(n + m), never pairwise. The price is recall: "Ryż z kurczakiem" and
+"Kurczak z ryżem" land in different blocks ("ryz" is not "ryzem").
+
+Importers use DedupIndex to skip, merge or flag (import anyway and report)
+likely duplicates. find_clusters() lists the ones already in the library:
+
+    python dedup.py            # print duplicate clusters
+"""
+
+import re
+from functools import lru_cache
+
+from folding import fold
+from nutrition import NUTRIENTS
+
+STEM = 5
+SIMILARITY = 0.7
+MAX_BLOCK = 50
+
+STOPWORDS = {
+    'a', 'i', 'z', 'ze', 'w', 'we', 'na', 'do', 'od', 'po', 'bez', 'dla', 'oraz', 'lub', 'la', 'ala',
+    # filler in scraped titles
+    'fit', 'przepis', 'domowy', 'domowa', 'domowe', 'szybki', 'szybka', 'szybkie',
+    'prosty', 'prosta', 'proste', 'wersja', 'najlepszy', 'najlepsza', 'najlepsze',
+}
+
+ON_DUPLICATE = ('skip', 'merge', 'flag', 'keep')
+
+# Columns a merge fills in on the existing recipe when it has nothing there
+MERGE_COLUMNS = [
+    'description', 'image_url', 'source_url', 'difficulty', 'prep_time_minutes',
+    'total_time_minutes', 'servings', 'instructions', 'notes', 'rating', 'rating_count',
+]
+NUTRITION_COLUMNS = list(NUTRIENTS.values())
+
+WORD = re.compile(r'[^\W\d_]+')
+
+
+# Ingredient names repeat a lot across recipes, so each is stemmed once
+@lru_cache(maxsize=65536)
+def stems(text):
+    return frozenset(word[:STEM] for word in WORD.findall(fold(text) or '') if word not in STOPWORDS)
+
+
+def title_key(name):
+    return ' '.join(sorted(stems(name)))
+
+
+def signature(ingredient_names):
+    return frozenset().union(*map(stems, ingredient_names))
+
+
+def similarity(a, b):
+    if not a and not b:
+        return 1.0      # nothing to tell them apart but the title
+    return len(a & b) / len(a | b)
+
+
+class DedupIndex:
+    """Title-key blocks of (recipe_id, ingredient signature)."""
+
+    def __init__(self):
+        self.blocks = {}
+
+    @classmethod
+    def load(cls, conn):
+        """An index of every recipe in the database."""
+        index = cls()
+        for recipe_id, name, ingredient_names in iter_recipes(conn):
+            index.add(recipe_id, name, ingredient_names)
+        return index
+
+    def add(self, recipe_id, name, ingredient_names):
+        key = title_key(name)
+        if key:
+            self.blocks.setdefault(key, []).append((recipe_id, signature(ingredient_names)))
+
+    def find(self, name, ingredient_names):
+        """(recipe_id, similarity) of the closest likely duplicate, or None."""
+        candidates = self.blocks.get(title_key(name), ())[-MAX_BLOCK:]
+        wanted = signature(ingredient_names)
+        best = None
+        for recipe_id, other in candidates:
+            score = similarity(wanted, other)
+            if score >= SIMILARITY and (best is None or score > best[1]):
+                best = (recipe_id, score)
+        return best
+
+
+def iter_recipes(conn):
+    """(id, name, [ingredient names]) for every recipe, in id order."""
+    cursor = conn.cursor()
+    cursor.row_factory = None
+    ingredients = {}
+    for recipe_id, name in cursor.execute('SELECT recipe_id, name FROM ingredients'):
+        ingredients.setdefault(recipe_id, []).append(name)
+    for recipe_id, name in cursor.execute('SELECT id, name FROM recipes ORDER BY id').fetchall():
+        yield recipe_id, name, ingredients.get(recipe_id, [])
+
+
+def is_blank(value):
+    return value is None or value == '' or value == 0 or value == '[]'
+
+
+def merge_into(cursor, recipe_id, values, categories=()):
+    """
+    Fill in what recipe `recipe_id` lacks from an incoming duplicate:
+    blank MERGE_COLUMNS, nutrition if it has none, and missing categories.
+    `values` maps recipes columns to the incoming (stored-form) values.
+    Returns the list of columns written.
+    """
+    current = cursor.execute('SELECT * FROM recipes WHERE id = ?', (recipe_id,)).fetchone()
+    updates = {
+        column: values[column] for column in MERGE_COLUMNS
+        if column in values and is_blank(current[column]) and not is_blank(values[column])
+    }
+    has_nutrition = any(not is_blank(current[column]) for column in NUTRITION_COLUMNS)
+    if not has_nutrition and any(not is_blank(values.get(column)) for column in NUTRITION_COLUMNS):
+        updates.update({column: values.get(column, 0) for column in NUTRITION_COLUMNS})
+        updates['nutrition_source'] = None
+    if updates:
+        assignments = ', '.join(f'{column} = ?' for column in updates)
+        cursor.execute(f'UPDATE recipes SET {assignments} WHERE id = ?', [*updates.values(), recipe_id])
+
+    existing = {row[0] for row in cursor.execute(
+        'SELECT category_name FROM recipe_categories WHERE recipe_id = ?', (recipe_id,)
+    )}
+    cursor.executemany(
+        'INSERT INTO recipe_categories (recipe_id, category_name) VALUES (?, ?)',
+        ((recipe_id, category) for category in dict.fromkeys(categories) if category not in existing)
+    )
+    return list(updates)
+
+
+def find_clusters(conn):
+    """
+    Groups of likely duplicates already in the library, biggest first:
+    [{'ids': [...], 'names': [...]}], each in id order.
+    """
+    index = DedupIndex()
+    names = {}
+    parent = {}
+
+    def root(recipe_id):
+        # Roots are recipes nothing earlier matched, so chains are one step long
+        return parent.get(recipe_id, recipe_id)
+
+    for recipe_id, name, ingredient_names in iter_recipes(conn):
+        names[recipe_id] = name
+        duplicate = index.find(name, ingredient_names)
+        if duplicate is not None:
+            parent[recipe_id] = root(duplicate[0])
+        index.add(recipe_id, name, ingredient_names)
+
+    clusters = {}
+    for recipe_id in parent:
+        clusters.setdefault(root(recipe_id), []).append(recipe_id)
+
+    result = [sorted([first, *rest]) for first, rest in clusters.items()]
+    result.sort(key=lambda ids: (-len(ids), ids[0]))
+    return [{'ids': ids, 'names': [names[i] for i in ids]} for ids in result]
+
+
+if __name__ == '__main__':
+    from database import get_db_connection
+
+    conn = get_db_connection()
+    clusters = find_clusters(conn)
+    conn.close()
+    for cluster in clusters:
+        print(', '.join(f'{recipe_id}: {name}' for recipe_id, name in zip(cluster['ids'], cluster['names'])))
+    print(f'{len(clusters)} clusters, {sum(len(c["ids"]) for c in clusters)} recipes')
@@ -0,0 +1,254 @@
+"""
+Export the library: recipes with their ingredients and categories, favorites
+and meal plans.
+
+Everything is generated row by row from SQLite cursors, so a large library is
+never built in memory or written to a temp file first:
+
+    ndjson  - one JSON object per line: an "export" header, then "recipe",
+              "favorite" and "meal_plan" records
+    csv     - recipes only; ingredients, categories, instructions and tags
+              are JSON in their cells
+    zip     - library.ndjson plus recipes.csv, favorites.csv and meal_plans.csv
+
+import_export.py reads any of the three back, so export -> import moves a
+library to a new database.
+
+Usage:
+    python export.py > library.ndjson
+    python export.py --format zip --out library.zip
+    python export.py --format csv --user anna --out recipes.csv
+"""
+
+import argparse
+import csv
+import io
+import json
+import sys
+import zipfile
+from datetime import datetime, timezone
+
+from database import get_db_connection
+from recipe_store import CREATE_COLUMNS
+from serializers import recipe_to_dict
+
+EXPORT_VERSION = 1
+
+# format -> (mimetype, file extension)
+EXPORT_FORMATS = {
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+    'csv': ('text/csv', 'csv'),
+    'zip': ('application/zip', 'zip'),
+}
+
+# Hand the WSGI server chunks of about this size, not one per row
+CHUNK_SIZE = 64 * 1024
+
+INGREDIENT_COLUMNS = ['name', 'amount', 'unit', 'notes', 'original_text']
+RECIPE_CSV_COLUMNS = ['id'] + CREATE_COLUMNS + ['nutrition_source', 'created_at', 'ingredients', 'recipe_categories']
+FAVORITE_COLUMNS = ['username', 'recipe_id', 'created_at']
+MEAL_PLAN_COLUMNS = ['date', 'meal_type', 'recipe_id', 'servings']
+
+
+def iter_recipes(conn):
+    """
+    Yield every recipe as a document (the POST /api/recipes shape plus id).
+
+    Ingredients and categories come from two more cursors ordered by
+    recipe_id and are merged in, instead of two queries per recipe.
+    """
+    ingredients = conn.execute(
+        f"SELECT recipe_id, {', '.join(INGREDIENT_COLUMNS)} FROM ingredients ORDER BY recipe_id, id"
+    )
+    categories = conn.execute(
+        'SELECT recipe_id, category_name FROM recipe_categories ORDER BY recipe_id, id'
+    )
+    next_ingredient = next(ingredients, None)
+    next_category = next(categories, None)
+
+    for row in conn.execute('SELECT * FROM recipes ORDER BY id'):
+        recipe = recipe_to_dict(row)
+
+        recipe['ingredients'] = []
+        while next_ingredient is not None and next_ingredient['recipe_id'] <= row['id']:
+            if next_ingredient['recipe_id'] == row['id']:
+                recipe['ingredients'].append(
+                    {column: next_ingredient[column] for column in INGREDIENT_COLUMNS}
+                )
+            next_ingredient = next(ingredients, None)
+
+        recipe['recipe_categories'] = []
+        while next_category is not None and next_category['recipe_id'] <= row['id']:
+            if next_category['recipe_id'] == row['id']:
+                recipe['recipe_categories'].append(next_category['category_name'])
+            next_category = next(categories, None)
+
+        yield recipe
+
+
+def iter_favorites(conn, user_id=None):
+    """Favorites of one user, or of everyone when user_id is None."""
+    sql = '''
+        SELECT u.username, f.recipe_id, f.created_at
+        FROM favorites f JOIN users u ON u.id = f.user_id
+    '''
+    if user_id is None:
+        return conn.execute(sql + ' ORDER BY f.id')
+    return conn.execute(sql + ' WHERE f.user_id = ? ORDER BY f.id', (user_id,))
+
+
+def iter_meal_plans(conn):
+    return conn.execute(
+        f"SELECT {', '.join(MEAL_PLAN_COLUMNS)} FROM meal_plans ORDER BY date, id"
+    )
+
+
+def header(conn):
+    return {
+        'type': 'export',
+        'version': EXPORT_VERSION,
+        'exported_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'recipes': conn.execute('SELECT COUNT(*) FROM recipes').fetchone()[0],
+    }
+
+
+def ndjson_lines(conn, user_id=None):
+    def line(record):
+        return (json.dumps(record, ensure_ascii=False) + '\n').encode('utf-8')
+
+    yield line(header(conn))
+    for recipe in iter_recipes(conn):
+        yield line({'type': 'recipe', **recipe})
+    for row in iter_favorites(conn, user_id):
+        yield line({'type': 'favorite', **dict(row)})
+    for row in iter_meal_plans(conn):
+        yield line({'type': 'meal_plan', **dict(row)})
+
+
+def csv_lines(columns, rows):
+    """Encode dict rows as CSV, one line at a time."""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=columns, extrasaction='ignore')
+
+    def take():
+        value = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return value.encode('utf-8')
+
+    writer.writeheader()
+    yield take()
+    for row in rows:
+        writer.writerow(row)
+        yield take()
+
+
+def recipe_csv_rows(conn):
+    for recipe in iter_recipes(conn):
+        for column in ('instructions', 'tags', 'ingredients', 'recipe_categories'):
+            recipe[column] = json.dumps(recipe[column], ensure_ascii=False)
+        yield recipe
+
+
+class ZipStream:
+    """
+    Write-only file object for ZipFile: collects what was written until
+    take() hands it out. Having no seek/tell makes ZipFile stream its
+    output (sizes go in data descriptors after each member).
+    """
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def take(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def zip_chunks(conn, user_id=None):
+    members = [
+        ('library.ndjson', ndjson_lines(conn, user_id)),
+        ('recipes.csv', csv_lines(RECIPE_CSV_COLUMNS, recipe_csv_rows(conn))),
+        ('favorites.csv', csv_lines(FAVORITE_COLUMNS, map(dict, iter_favorites(conn, user_id)))),
+        ('meal_plans.csv', csv_lines(MEAL_PLAN_COLUMNS, map(dict, iter_meal_plans(conn)))),
+    ]
+    stream = ZipStream()
+    with zipfile.ZipFile(stream, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, lines in members:
+            with archive.open(name, 'w', force_zip64=True) as member:
+                for line in lines:
+                    member.write(line)
+                    yield stream.take()
+    yield stream.take()
+
+
+def buffered(chunks, size=CHUNK_SIZE):
+    pending = []
+    pending_size = 0
+    for chunk in chunks:
+        pending.append(chunk)
+        pending_size += len(chunk)
+        if pending_size >= size:
+            yield b''.join(pending)
+            pending = []
+            pending_size = 0
+    if pending:
+        yield b''.join(pending)
+
+
+def export_chunks(fmt, user_id=None):
+    """
+    Generate the export as bytes chunks. Favorites are limited to user_id when
+    given. The connection stays open until the generator finishes or is closed.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f'Unknown export format: {fmt}')
+
+    conn = get_db_connection()
+    try:
+        if fmt == 'ndjson':
+            chunks = ndjson_lines(conn, user_id)
+        elif fmt == 'csv':
+            chunks = csv_lines(RECIPE_CSV_COLUMNS, recipe_csv_rows(conn))
+        else:
+            chunks = zip_chunks(conn, user_id)
+        yield from buffered(chunks)
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Export recipes, favorites and meal plans')
+    parser.add_argument('--format', choices=sorted(EXPORT_FORMATS), default='ndjson')
+    parser.add_argument('--out', help='output file (default: stdout)')
+    parser.add_argument('--user', help="only this user's favorites (default: everyone's)")
+    args = parser.parse_args()
+
+    user_id = None
+    if args.user:
+        conn = get_db_connection()
+        row = conn.execute('SELECT id FROM users WHERE username = ?', (args.user,)).fetchone()
+        conn.close()
+        if row is None:
+            sys.exit(f'No such user: {args.user}')
+        user_id = row['id']
+
+    out = open(args.out, 'wb') if args.out else sys.stdout.buffer
+    try:
+        for chunk in export_chunks(args.format, user_id):
+            out.write(chunk)
+    finally:
+        if args.out:
+            out.close()
+
+
+if __name__ == '__main__':
+    main()
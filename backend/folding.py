@@ -0,0 +1,17 @@
+"""
+Diacritic folding for search and autocomplete: "Śniadanie" -> "sniadanie",
+"Łosoś" -> "losos", so users can type without Polish characters.
+"""
+
+import unicodedata
+
+# Letters NFKD doesn't split into base letter + accent
+EXTRA_FOLDS = str.maketrans({'ł': 'l', 'Ł': 'l', 'ø': 'o', 'Ø': 'o', 'ß': 'ss', 'đ': 'd', 'Đ': 'd'})
+
+
+def fold(text):
+    """Lowercase text without diacritics. None stays None."""
+    if text is None:
+        return None
+    text = unicodedata.normalize('NFKD', str(text).translate(EXTRA_FOLDS))
+    return ''.join(c for c in text if not unicodedata.combining(c)).casefold()
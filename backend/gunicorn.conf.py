@@ -0,0 +1,81 @@
+"""
+Production gunicorn settings. gunicorn reads ./gunicorn.conf.py by itself,
+so from backend/ plain `gunicorn` is enough (systemd: ExecStart=.../gunicorn).
+
+The app is imported once in the master (preload_app), which migrates the
+database, fails jobs orphaned by the last run and warms the caches
+(warmup.py) before forking, so workers start warm and share that memory
+copy-on-write. Anything a fork doesn't carry over is set up per worker in
+post_worker_init: the scheduler thread, the job pools (jobs.get_executor,
+first used there to resume queued jobs) and SQLite connections, which are
+opened per request and never held across the fork.
+
+Environment:
+    GUNICORN_BIND     - address to listen on (default 127.0.0.1:8000, nginx in front)
+    WEB_CONCURRENCY   - worker processes (default: one per CPU, 2 to 8)
+    GUNICORN_THREADS  - threads per worker (default 4)
+    CHANGES_MAX_WAITERS - of those, how many /api/changes long-polls may hold (default half)
+    GUNICORN_PRELOAD  - 0 to import the app in every worker instead
+    WARM_UP           - 0 to skip the warm-up
+    MAINTENANCE_INTERVAL_MINUTES - how often maintenance.py checks what's due (default 30, 0: never)
+"""
+
+import gc
+import os
+
+from dotenv import load_dotenv
+
+# As app.py does, but first: the settings below may come from .env too
+load_dotenv()
+
+
+def cpu_count():
+    try:
+        return len(os.sched_getaffinity(0))     # the CPUs this process may use (containers)
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+wsgi_app = 'app:app'
+bind = os.environ.get('GUNICORN_BIND', '127.0.0.1:8000')
+
+# Processes for CPU (the GIL), threads for waiting on SQLite and clients.
+# SQLite has one writer at a time and every worker keeps its own caches, so
+# more processes than CPUs only costs memory.
+worker_class = 'gthread'
+workers = int(os.environ.get('WEB_CONCURRENCY', min(max(cpu_count(), 2), 8)))
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+# Long-polls for changes may hold at most half of them (routes/changes.py)
+os.environ.setdefault('CHANGES_MAX_WAITERS', str(threads // 2))
+
+timeout = 30
+# Long-polls (/api/changes?wait=) cut short by a restart are simply repeated
+graceful_timeout = 10
+keepalive = 5
+
+preload_app = os.environ.get('GUNICORN_PRELOAD', '1') != '0'
+
+# In production ANALYZE, free pages and the WAL are looked after (maintenance.py)
+os.environ.setdefault('MAINTENANCE_INTERVAL_MINUTES', '30')
+
+# app.py leaves the scheduler thread and queued jobs to post_worker_init:
+# under preload_app the master imports it, and threads don't survive the fork
+os.environ['START_WORKER'] = '0'
+
+
+def when_ready(server):
+    if not server.cfg.preload_app:
+        return
+    from warmup import warm_up
+    server.log.info('Warm-up in the master: %s', warm_up(server.app.wsgi()))
+    # Keep the collector off the warmed objects so their pages stay shared
+    gc.freeze()
+
+
+def post_worker_init(worker):
+    from app import start_worker
+    from warmup import warm_up
+    start_worker()
+    # Only rebuilds what changed since the master warmed up (or everything
+    # without preload_app)
+    worker.log.info('Warm-up in worker %s: %s', worker.pid, warm_up(worker.wsgi))
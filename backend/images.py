@@ -0,0 +1,225 @@
+"""
+Local recipe images.
+
+Originals are stored content-addressed under IMAGE_DIR (default backend/media):
+
+    originals/ab/abcdef....jpg         - the uploaded/downloaded file
+    thumbs/ab/abcdef..._320.webp       - derived sizes, made by a background job
+
+Because a file's name is its SHA-256, a URL never changes meaning and can be
+cached forever (Cache-Control: immutable). Thumbnails need Pillow; without it
+uploads still work and the thumbnail URLs fall back to the original.
+"""
+
+import hashlib
+import ipaddress
+import os
+import socket
+import urllib.parse
+import urllib.request
+
+from database import get_db_connection, write_transaction
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # optional dependency
+    Image = None
+
+IMAGE_DIR = os.environ.get(
+    'IMAGE_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'media'),
+)
+
+THUMBNAIL_SIZES = [160, 320, 640]      # longest edge, px
+THUMBNAIL_FORMATS = {'webp': 'WEBP', 'jpg': 'JPEG'}
+MAX_IMAGE_BYTES = 10 * 1024 * 1024
+DOWNLOAD_TIMEOUT = 15
+
+# Optional allow-list for downloads, e.g. IMAGE_HOSTS=centrumrespo.pl
+# (subdomains included). Private/loopback addresses are refused either way.
+IMAGE_HOSTS = [h.strip().lower() for h in os.environ.get('IMAGE_HOSTS', '').split(',') if h.strip()]
+
+# Magic bytes -> extension; we don't trust the client's filename or mimetype
+SIGNATURES = [
+    (b'\xff\xd8\xff', 'jpg'),
+    (b'\x89PNG\r\n\x1a\n', 'png'),
+    (b'GIF87a', 'gif'),
+    (b'GIF89a', 'gif'),
+]
+
+
+def detect_extension(data):
+    for signature, ext in SIGNATURES:
+        if data.startswith(signature):
+            return ext
+    if data[:4] == b'RIFF' and data[8:12] == b'WEBP':
+        return 'webp'
+    return None
+
+
+def original_path(sha256, ext):
+    return os.path.join(IMAGE_DIR, 'originals', sha256[:2], f'{sha256}.{ext}')
+
+
+def thumbnail_path(sha256, size, fmt):
+    return os.path.join(IMAGE_DIR, 'thumbs', sha256[:2], f'{sha256}_{size}.{fmt}')
+
+
+def image_url(sha256, ext):
+    return f'/media/{sha256}.{ext}'
+
+
+def write_atomic(path, data):
+    """Write to a temp file and rename, so readers never see half a file."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def store_image(data, source_url=None):
+    """
+    Save image bytes (deduplicated by content) and record them in `images`.
+    Returns the images row as a dict. Raises ValueError for non-images.
+    """
+    if len(data) > MAX_IMAGE_BYTES:
+        raise ValueError('Image is too large')
+    ext = detect_extension(data)
+    if ext is None:
+        raise ValueError('Unsupported image type (use JPEG, PNG, GIF or WebP)')
+
+    sha256 = hashlib.sha256(data).hexdigest()
+    path = original_path(sha256, ext)
+    if not os.path.exists(path):
+        write_atomic(path, data)
+
+    with write_transaction() as conn:
+        conn.execute('''
+            INSERT OR IGNORE INTO images (sha256, ext, size_bytes, source_url)
+            VALUES (?, ?, ?, ?)
+        ''', (sha256, ext, len(data), source_url))
+        row = conn.execute('SELECT * FROM images WHERE sha256 = ?', (sha256,)).fetchone()
+    return dict(row)
+
+
+def check_download_url(url):
+    """
+    Raise ValueError unless url is http(s) on an allowed host that resolves
+    only to public addresses, so downloads can't reach the server's own
+    network (localhost services, cloud metadata, the LAN).
+    """
+    parts = urllib.parse.urlsplit(url)
+    if parts.scheme not in ('http', 'https') or not parts.hostname:
+        raise ValueError('Only http(s) image URLs are supported')
+
+    host = parts.hostname.lower()
+    if IMAGE_HOSTS and not any(host == h or host.endswith('.' + h) for h in IMAGE_HOSTS):
+        raise ValueError(f'Image host not allowed: {host}')
+
+    try:
+        port = parts.port or (443 if parts.scheme == 'https' else 80)
+        addresses = socket.getaddrinfo(host, port, proto=socket.IPPROTO_TCP)
+    except (socket.gaierror, ValueError):
+        raise ValueError(f'Cannot resolve image host: {host}')
+
+    for address in addresses:
+        ip = ipaddress.ip_address(address[4][0].split('%')[0])
+        if ip.version == 6 and ip.ipv4_mapped:
+            ip = ip.ipv4_mapped
+        if not ip.is_global or ip.is_multicast:
+            raise ValueError(f'Image host is not a public address: {host}')
+
+
+class CheckedRedirectHandler(urllib.request.HTTPRedirectHandler):
+    """Follow redirects only to URLs that pass check_download_url."""
+
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        check_download_url(newurl)
+        return super().redirect_request(req, fp, code, msg, headers, newurl)
+
+
+def download_image(url):
+    """Fetch an image over http(s), refusing anything too large or non-public."""
+    check_download_url(url)
+    opener = urllib.request.build_opener(CheckedRedirectHandler)
+    req = urllib.request.Request(url, headers={'User-Agent': 'RecipesApp image ingest'})
+    with opener.open(req, timeout=DOWNLOAD_TIMEOUT) as response:
+        data = response.read(MAX_IMAGE_BYTES + 1)
+    if len(data) > MAX_IMAGE_BYTES:
+        raise ValueError('Image is too large')
+    return data
+
+
+def make_thumbnails(sha256):
+    """Generate every size/format for an image that doesn't exist yet."""
+    if Image is None:
+        raise RuntimeError('Pillow is not installed, cannot make thumbnails')
+
+    conn = get_db_connection()
+    row = conn.execute('SELECT * FROM images WHERE sha256 = ?', (sha256,)).fetchone()
+    conn.close()
+    if row is None:
+        raise ValueError(f'Unknown image: {sha256}')
+
+    created = 0
+    with Image.open(original_path(sha256, row['ext'])) as original:
+        original = ImageOps.exif_transpose(original).convert('RGB')
+        width, height = original.size
+        for size in THUMBNAIL_SIZES:
+            scaled = original.copy()
+            scaled.thumbnail((size, size), Image.LANCZOS)
+            for fmt, pil_format in THUMBNAIL_FORMATS.items():
+                path = thumbnail_path(sha256, size, fmt)
+                if os.path.exists(path):
+                    continue
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                tmp_path = f'{path}.{os.getpid()}.tmp'
+                scaled.save(tmp_path, pil_format, quality=80)
+                os.replace(tmp_path, path)
+                created += 1
+
+    with write_transaction() as conn:
+        conn.execute('''
+            UPDATE images SET width = ?, height = ?, thumbnails_ready = 1 WHERE sha256 = ?
+        ''', (width, height, sha256))
+    return created
+
+
+def attach_image(recipe_id, image):
+    with write_transaction() as conn:
+        updated = conn.execute(
+            'UPDATE recipes SET image_url = ? WHERE id = ?',
+            (image_url(image['sha256'], image['ext']), recipe_id)
+        ).rowcount
+    return updated > 0
+
+
+def localize_images(source='centrumrespo', progress=None):
+    """
+    Download every remote image_url of recipes from `source`, store it locally
+    and point the recipe at the local copy. One bad URL doesn't stop the rest.
+    """
+    conn = get_db_connection()
+    rows = conn.execute('''
+        SELECT id, image_url FROM recipes
+        WHERE source = ? AND (image_url LIKE 'http://%' OR image_url LIKE 'https://%')
+        ORDER BY id
+    ''', (source,)).fetchall()
+    conn.close()
+
+    localized = 0
+    failed = []
+    for position, row in enumerate(rows, start=1):
+        try:
+            image = store_image(download_image(row['image_url']), source_url=row['image_url'])
+            attach_image(row['id'], image)
+            if Image is not None and not image['thumbnails_ready']:
+                make_thumbnails(image['sha256'])
+            localized += 1
+        except Exception as e:
+            failed.append({'recipe_id': row['id'], 'url': row['image_url'], 'error': str(e)})
+        if progress:
+            progress(position / len(rows), f"{position}/{len(rows)} images")
+
+    return {'localized': localized, 'failed': failed}
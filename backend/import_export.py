@@ -0,0 +1,159 @@
+"""
+Import a library written by export.py (NDJSON, recipes CSV or zip bundle).
+
+Recipes get new ids; favorites and meal plans are re-pointed at them.
+Favorites go to the user with the same username (skipped if there is none),
+or all to one user with --user.
+
+Usage:
+    python import_export.py library.ndjson
+    python import_export.py library.zip --user anna
+"""
+
+import argparse
+import csv
+import io
+import json
+import zipfile
+
+from database import get_db_connection
+from nutrition import NUTRIENTS
+from recipe_store import validate_recipe, insert_recipes
+
+BATCH_SIZE = 200
+
+# Cells of recipes.csv that hold JSON
+CSV_JSON_COLUMNS = ('instructions', 'tags', 'ingredients', 'recipe_categories')
+
+
+def read_records(filepath):
+    """Yield the export's records as dicts with a "type" key."""
+    if zipfile.is_zipfile(filepath):
+        with zipfile.ZipFile(filepath) as archive, archive.open('library.ndjson') as raw:
+            yield from ndjson_records(io.TextIOWrapper(raw, encoding='utf-8'))
+    elif filepath.endswith('.csv'):
+        with open(filepath, newline='', encoding='utf-8') as f:
+            yield from csv_records(f)
+    else:
+        with open(filepath, encoding='utf-8') as f:
+            yield from ndjson_records(f)
+
+
+def ndjson_records(lines):
+    for line in lines:
+        if line.strip():
+            yield json.loads(line)
+
+
+def csv_records(f):
+    for row in csv.DictReader(f):
+        record = {'type': 'recipe'}
+        for column, value in row.items():
+            if column in CSV_JSON_COLUMNS:
+                record[column] = json.loads(value) if value else []
+            else:
+                record[column] = value if value != '' else None
+        yield record
+
+
+def import_export(filepath, username=None, progress=None):
+    conn = get_db_connection()
+    cursor = conn.cursor()
+
+    users = {row['username']: row['id'] for row in cursor.execute('SELECT id, username FROM users')}
+    if username is not None and username not in users:
+        conn.close()
+        raise ValueError(f'No such user: {username}')
+
+    id_map = {}
+    batch = []
+    expected = None
+    counts = {'imported': 0, 'favorites': 0, 'meal_plans': 0, 'skipped': 0}
+
+    def flush():
+        # Nutrition estimated from ingredients isn't restored but estimated
+        # again: insert_recipes only recomputes recipes without any
+        for document in batch:
+            if document.get('nutrition_source') == 'ingredients':
+                document.update(dict.fromkeys(NUTRIENTS.values(), 0))
+        new_ids = insert_recipes(cursor, batch)
+        for document, new_id in zip(batch, new_ids):
+            if document.get('id') is not None:
+                id_map[int(document['id'])] = new_id
+        counts['imported'] += len(batch)
+        batch.clear()
+        # Commit before reporting progress, which writes on another connection
+        conn.commit()
+        if progress and expected:
+            progress(counts['imported'] / expected, f"{counts['imported']}/{expected} recipes")
+
+    try:
+        for record in read_records(filepath):
+            kind = record.pop('type', None)
+
+            if kind == 'export':
+                expected = record.get('recipes')
+                continue
+
+            if kind == 'recipe':
+                if validate_recipe(record) is None:
+                    batch.append(record)
+                else:
+                    counts['skipped'] += 1
+                if len(batch) >= BATCH_SIZE:
+                    flush()
+                continue
+
+            # Favorites and meal plans follow all recipes
+            if batch:
+                flush()
+            recipe_id = id_map.get(record.get('recipe_id'))
+
+            if kind == 'favorite':
+                user_id = users.get(username or record.get('username'))
+                if recipe_id is None or user_id is None:
+                    counts['skipped'] += 1
+                    continue
+                cursor.execute('''
+                    INSERT OR IGNORE INTO favorites (user_id, recipe_id, created_at)
+                    VALUES (?, ?, COALESCE(?, CURRENT_TIMESTAMP))
+                ''', (user_id, recipe_id, record.get('created_at')))
+                counts['favorites'] += cursor.rowcount
+
+            elif kind == 'meal_plan' and recipe_id is not None:
+                cursor.execute(
+                    'INSERT INTO meal_plans (date, meal_type, recipe_id, servings) VALUES (?, ?, ?, ?)',
+                    (record['date'], record['meal_type'], recipe_id, record.get('servings', 1))
+                )
+                counts['meal_plans'] += 1
+
+            else:
+                counts['skipped'] += 1
+
+        if batch:
+            flush()
+        conn.commit()
+
+    except Exception:
+        conn.rollback()
+        raise
+
+    finally:
+        conn.close()
+
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Import a library written by export.py')
+    parser.add_argument('file', help='.ndjson, .csv or .zip export')
+    parser.add_argument('--user', help='give every imported favorite to this user')
+    args = parser.parse_args()
+
+    result = import_export(args.file, username=args.user)
+    print(f"Imported {result['imported']} recipes, {result['favorites']} favorites, "
+          f"{result['meal_plans']} meal plans ({result['skipped']} skipped).")
+
+
+if __name__ == '__main__':
+    main()
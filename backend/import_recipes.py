@@ -1,18 +1,57 @@
 import json
+import sys
 from database import get_db_connection
+from dedup import DedupIndex, ON_DUPLICATE, merge_into
 
 
 recipesFilePath = "../data/recipes.json"
+BATCH_SIZE = 200
+
+def import_recipes(filepath=recipesFilePath, progress=None, on_duplicate='skip'):
+    """on_duplicate: 'skip', 'merge', 'flag' or 'keep' likely duplicates, see import_res.py."""
+    if on_duplicate not in ON_DUPLICATE:
+        raise ValueError(f"on_duplicate must be one of {', '.join(ON_DUPLICATE)}")
 
-def import_recipes():
     conn = get_db_connection()
     cursor = conn.cursor()
+    index = DedupIndex.load(conn) if on_duplicate != 'keep' else None
+    imported = 0
+    skipped = 0
+    merged = 0
+    flagged = []
 
-    with open(recipesFilePath, "r", encoding="UTF-8") as f:
+    with open(filepath, "r", encoding="UTF-8") as f:
         recipes = json.load(f)
 
 
-        for recipe in recipes:
+        for position, recipe in enumerate(recipes, start=1):
+            # Commit in batches: progress is written on another connection,
+            # and background imports shouldn't hold the write lock for long.
+            # First, so skipped and merged recipes count too
+            if position % BATCH_SIZE == 0:
+                conn.commit()
+                if progress:
+                    progress(position / len(recipes), f"{position}/{len(recipes)} recipes")
+
+            ingredient_names = [ingredient['name'] for ingredient in recipe['ingredients']]
+            duplicate = index.find(recipe['name'], ingredient_names) if index else None
+            if duplicate and on_duplicate == 'skip':
+                skipped += 1
+                continue
+            if duplicate and on_duplicate == 'merge':
+                merge_into(cursor, duplicate[0], {
+                    'prep_time_minutes': recipe['prep_time_minutes'],
+                    'servings': recipe['servings'],
+                    'instructions': json.dumps(recipe['instructions']),
+                    'notes': recipe['notes'],
+                    'calories_per_serving': recipe['nutrition_per_serving']['calories'],
+                    'protein_per_serving': recipe['nutrition_per_serving']['protein_g'],
+                    'fat_per_serving': recipe['nutrition_per_serving']['fat_g'],
+                    'carbs_per_serving': recipe['nutrition_per_serving']['carbs_g'],
+                })
+                merged += 1
+                continue
+
             insertSql = "INSERT INTO recipes (name, category, prep_time_minutes, servings, instructions, calories_per_serving, protein_per_serving,fat_per_serving, carbs_per_serving, tags, source, notes) VALUES(?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
 
             recordsToInsert = [
@@ -44,10 +83,18 @@ def import_recipes():
                     ingredient['notes']
                 ))
 
+            if duplicate:
+                flagged.append({'id': recipe_id, 'duplicate_of': duplicate[0], 'similarity': round(duplicate[1], 2)})
+            if index:
+                index.add(recipe_id, recipe['name'], ingredient_names)
+            imported += 1
+
         conn.commit()
         conn.close()
 
-        print(f"{len(recipes)} recipes imported successfully.")
+        print(f"{imported} recipes imported successfully, {skipped} duplicates skipped, {merged} merged.")
+        return {'imported': imported, 'skipped': skipped, 'merged': merged, 'flagged': flagged}
 
 if __name__ == "__main__":
-    import_recipes()
\ No newline at end of file
+    on_duplicate = next((arg.split('=', 1)[1] for arg in sys.argv if arg.startswith('--on-duplicate=')), 'skip')
+    import_recipes(on_duplicate=on_duplicate)
\ No newline at end of file
@@ -2,7 +2,7 @@
 Import recipes from res JSON data.
 
 Usage:
-    python import_res.py ../data/res_recipes.json
+    python import_res.py ../data/res_recipes.json [--localize-images] [--on-duplicate=skip|merge|flag|keep]
 
 The JSON should have a "recipes" array with objects matching the centrumrespo.pl format.
 """
@@ -11,6 +11,7 @@ import json
 import re
 import sys
 from database import get_db_connection
+from dedup import DedupIndex, ON_DUPLICATE, merge_into
 
 
 def parse_ingredient(raw_amount, raw_ingredient):
@@ -88,8 +89,25 @@ def extract_unit_from_ingredient(ingredient_text):
     return '', ingredient_text
 
 
-def import_centrumrespo(filepath):
-    """Import recipes from res JSON export."""
+# Commit every this many recipes, so an import running in the background
+# never holds the write lock for long
+BATCH_SIZE = 200
+
+
+def import_centrumrespo(filepath, progress=None, on_duplicate='skip'):
+    """
+    Import recipes from res JSON export.
+
+    progress: optional callback(fraction, message), used by the background job runner.
+    on_duplicate: what to do with a likely duplicate of a recipe already in the
+    library (see dedup.py): 'skip' it, 'merge' it into that one, 'flag' it
+    (import and report it) or 'keep' it (no check). Same source_url is
+    always skipped.
+    Returns {'imported': n, 'skipped': n, 'merged': n, 'flagged': [...]}.
+    """
+    if on_duplicate not in ON_DUPLICATE:
+        raise ValueError(f"on_duplicate must be one of {', '.join(ON_DUPLICATE)}")
+
     conn = get_db_connection()
     cursor = conn.cursor()
     
@@ -97,11 +115,19 @@ def import_centrumrespo(filepath):
         data = json.load(f)
     
     recipes = data.get('recipes', data) if isinstance(data, dict) else data
+    index = DedupIndex.load(conn) if on_duplicate != 'keep' else None
     
     imported = 0
     skipped = 0
+    merged = 0
+    flagged = []
     
-    for recipe in recipes:
+    for position, recipe in enumerate(recipes, start=1):
+        if position % BATCH_SIZE == 0:
+            conn.commit()
+            if progress:
+                progress(position / len(recipes), f"{position}/{len(recipes)} recipes")
+
         # Check for duplicate by source_url
         url = recipe.get('url', '')
         if url:
@@ -114,51 +140,59 @@ def import_centrumrespo(filepath):
         
         # Extract nutrition
         nutrition = recipe.get('nutrition', {})
+        values = {
+            'name': recipe.get('title', 'Untitled'),
+            'description': recipe.get('description', ''),
+            'image_url': recipe.get('image_url', ''),
+            'source_url': recipe.get('url', ''),
+            'source': 'centrumrespo',
+            'difficulty': recipe.get('difficulty', ''),
+            'prep_time_minutes': recipe.get('prep_time_min'),
+            'total_time_minutes': recipe.get('total_time_min'),
+            'servings': recipe.get('servings'),
+            'instructions': json.dumps(recipe.get('instructions', []), ensure_ascii=False),
+            'notes': recipe.get('article_text', ''),
+            'calories_per_serving': nutrition.get('kcal', 0),
+            'protein_per_serving': nutrition.get('protein_g', 0),
+            'fat_per_serving': nutrition.get('fat_g', 0),
+            'carbs_per_serving': nutrition.get('carbs_g', 0),
+            'sodium_per_serving': nutrition.get('sodium_mg', 0),
+            'fiber_per_serving': nutrition.get('fiber_g', 0),
+            'rating': recipe.get('rating'),
+            'rating_count': recipe.get('rating_count', 0),
+        }
+        ingredients = [
+            parse_ingredient(ing.get('amount', ''), ing.get('ingredient', ''))
+            for ing in recipe.get('ingredients', [])
+        ]
+        categories = recipe.get('categories', [])
+
+        # Re-scrapes under a new URL, copies of the same dish
+        duplicate = index.find(values['name'], [ing['name'] for ing in ingredients]) if index else None
+        if duplicate and on_duplicate == 'skip':
+            skipped += 1
+            continue
+        if duplicate and on_duplicate == 'merge':
+            merge_into(cursor, duplicate[0], values, categories)
+            merged += 1
+            continue
         
         # Insert recipe
-        cursor.execute('''
-            INSERT INTO recipes (
-                name, description, image_url, source_url, source, difficulty,
-                prep_time_minutes, total_time_minutes, servings,
-                instructions, notes,
-                calories_per_serving, protein_per_serving, fat_per_serving,
-                carbs_per_serving, sodium_per_serving, fiber_per_serving,
-                rating, rating_count
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            recipe.get('title', 'Untitled'),
-            recipe.get('description', ''),
-            recipe.get('image_url', ''),
-            recipe.get('url', ''),
-            'centrumrespo',
-            recipe.get('difficulty', ''),
-            recipe.get('prep_time_min'),
-            recipe.get('total_time_min'),
-            recipe.get('servings'),
-            json.dumps(recipe.get('instructions', []), ensure_ascii=False),
-            recipe.get('article_text', ''),
-            nutrition.get('kcal', 0),
-            nutrition.get('protein_g', 0),
-            nutrition.get('fat_g', 0),
-            nutrition.get('carbs_g', 0),
-            nutrition.get('sodium_mg', 0),
-            nutrition.get('fiber_g', 0),
-            recipe.get('rating'),
-            recipe.get('rating_count', 0),
-        ))
+        columns = ', '.join(values)
+        placeholders = ', '.join('?' * len(values))
+        cursor.execute(f'INSERT INTO recipes ({columns}) VALUES ({placeholders})', list(values.values()))
         
         recipe_id = cursor.lastrowid
         
         # Insert categories (the tag-like labels)
-        for cat in recipe.get('categories', []):
+        for cat in categories:
             cursor.execute(
                 'INSERT INTO recipe_categories (recipe_id, category_name) VALUES (?, ?)',
                 (recipe_id, cat)
             )
         
         # Insert ingredients
-        for ing in recipe.get('ingredients', []):
-            parsed = parse_ingredient(ing.get('amount', ''), ing.get('ingredient', ''))
+        for parsed in ingredients:
             cursor.execute('''
                 INSERT INTO ingredients (recipe_id, name, amount, unit, notes, original_text)
                 VALUES (?, ?, ?, ?, ?, ?)
@@ -171,18 +205,31 @@ def import_centrumrespo(filepath):
                 parsed['original_text'],
             ))
         
+        if duplicate:
+            flagged.append({'id': recipe_id, 'duplicate_of': duplicate[0], 'similarity': round(duplicate[1], 2)})
+        if index:
+            index.add(recipe_id, values['name'], [ing['name'] for ing in ingredients])
         imported += 1
     
     conn.commit()
     conn.close()
     
-    print(f"Imported: {imported}, Skipped (duplicates): {skipped}")
+    print(f"Imported: {imported}, Skipped (duplicates): {skipped}, Merged: {merged}, Flagged: {len(flagged)}")
+    return {'imported': imported, 'skipped': skipped, 'merged': merged, 'flagged': flagged}
 
 
 if __name__ == '__main__':
-    if len(sys.argv) < 2:
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    if len(args) < 1:
         filepath = '../data/res_recipes_2.json'
     else:
-        filepath = sys.argv[1]
+        filepath = args[0]
     
-    import_centrumrespo(filepath)
\ No newline at end of file
+    on_duplicate = next((arg.split('=', 1)[1] for arg in sys.argv if arg.startswith('--on-duplicate=')), 'skip')
+    import_centrumrespo(filepath, on_duplicate=on_duplicate)
+
+    # Optional: copy the remote images to local storage (see images.py)
+    if '--localize-images' in sys.argv:
+        from images import localize_images
+        result = localize_images('centrumrespo')
+        print(f"Localized images: {result['localized']}, failed: {len(result['failed'])}")
\ No newline at end of file
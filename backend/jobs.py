@@ -0,0 +1,347 @@
+"""
+Background jobs: imports and maintenance tasks that are too slow for a request.
+
+Jobs are rows in the `jobs` table, so every gunicorn worker (and the CLI) sees
+the same queue and progress. They run in a small pool of separate processes
+(started with `spawn`), never on threads of a request worker, so a heavy
+import can't stall requests or take the worker down with it:
+
+    JOB_WORKERS            - job processes per gunicorn worker (default 1)
+    JOB_MAX_RUNNING        - jobs running at once across all processes (default 1)
+    IMAGE_JOB_MAX_RUNNING  - the same for the "images" queue (default 2)
+
+A worker only claims a queued job while fewer than the queue's limit are
+running, so a burst of enqueued imports queues up instead of taking over the
+server. Quick image jobs (thumbnails, single downloads) have their own queue
+and pool, so they don't wait behind an hour-long import.
+
+A running job writes a heartbeat every HEARTBEAT_SECONDS. One whose heartbeat
+is older than STALE_SECONDS lost its process (restart, crash, OOM kill) and is
+marked failed; PIDs get reused, so they can't tell us that.
+
+Register a job with @job('name'); the function gets (params, progress) and
+returns a JSON-serializable result. Call progress(fraction, message) as it goes.
+"""
+
+import json
+import multiprocessing
+import os
+import sqlite3
+import threading
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+
+from database import get_db_connection, write_transaction, DatabaseBusy
+
+JOB_WORKERS = int(os.environ.get('JOB_WORKERS', 1))
+JOB_MAX_RUNNING = int(os.environ.get('JOB_MAX_RUNNING', 1))
+IMAGE_JOB_MAX_RUNNING = int(os.environ.get('IMAGE_JOB_MAX_RUNNING', 2))
+
+# Queue name -> jobs running at once across all processes
+JOB_QUEUES = {
+    'default': JOB_MAX_RUNNING,
+    'images': IMAGE_JOB_MAX_RUNNING,
+}
+
+# Don't write progress more often than this (seconds)
+PROGRESS_INTERVAL = 0.5
+
+HEARTBEAT_SECONDS = 10
+STALE_SECONDS = 60
+
+JOB_TYPES = {}
+JOB_TYPE_QUEUES = {}
+
+_executors = {}
+_executor_pid = None
+_executor_lock = threading.Lock()
+
+
+def job(name, queue='default'):
+    """Register a function as a job type, run from the given queue."""
+    def register(fn):
+        JOB_TYPES[name] = fn
+        JOB_TYPE_QUEUES[name] = queue
+        return fn
+    return register
+
+
+def queue_kinds(queue):
+    return [kind for kind, name in JOB_TYPE_QUEUES.items() if name == queue]
+
+
+def job_to_dict(row):
+    result = dict(row)
+    for column in ('params', 'result'):
+        if result.get(column):
+            result[column] = json.loads(result[column])
+    return result
+
+
+def get_job(job_id):
+    conn = get_db_connection()
+    row = conn.execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+    conn.close()
+    return job_to_dict(row) if row else None
+
+
+def list_jobs(limit=50):
+    conn = get_db_connection()
+    rows = conn.execute('SELECT * FROM jobs ORDER BY id DESC LIMIT ?', (limit,)).fetchall()
+    conn.close()
+    return [job_to_dict(row) for row in rows]
+
+
+def enqueue(kind, params=None, user_id=None):
+    """Queue a job and wake up this process's pool. Returns the job id."""
+    if kind not in JOB_TYPES:
+        raise ValueError(f'Unknown job type: {kind}')
+
+    with write_transaction() as conn:
+        job_id = conn.execute(
+            'INSERT INTO jobs (kind, params, created_by) VALUES (?, ?, ?)',
+            (kind, json.dumps(params or {}), user_id)
+        ).lastrowid
+
+    queue = JOB_TYPE_QUEUES[kind]
+    get_executor(queue).submit(drain, queue)
+    return job_id
+
+
+def get_executor(queue='default'):
+    """
+    The process's pool for a queue, recreated after a fork (gunicorn preload).
+    Uses spawn: forking a threaded server process can copy held locks.
+    """
+    global _executor_pid
+    with _executor_lock:
+        if _executor_pid != os.getpid():
+            _executors.clear()
+            _executor_pid = os.getpid()
+        if queue not in _executors:
+            _executors[queue] = ProcessPoolExecutor(
+                max_workers=min(JOB_WORKERS, JOB_QUEUES[queue]),
+                mp_context=multiprocessing.get_context('spawn'),
+            )
+        return _executors[queue]
+
+
+def claim_next_job(queue='default'):
+    """Mark the queue's oldest queued job as running and return it, or None."""
+    kinds = queue_kinds(queue)
+    in_kinds = f"kind IN ({','.join('?' * len(kinds))})"
+    with write_transaction() as conn:
+        fail_stale_jobs(conn)
+        running = conn.execute(
+            f"SELECT COUNT(*) FROM jobs WHERE status = 'running' AND {in_kinds}", kinds
+        ).fetchone()[0]
+        if running >= JOB_QUEUES[queue]:
+            return None
+
+        row = conn.execute(
+            f"SELECT * FROM jobs WHERE status = 'queued' AND {in_kinds} ORDER BY id LIMIT 1", kinds
+        ).fetchone()
+        if row is None:
+            return None
+
+        conn.execute('''
+            UPDATE jobs SET status = 'running', started_at = CURRENT_TIMESTAMP,
+                worker_pid = ?, heartbeat_at = ?
+            WHERE id = ?
+        ''', (os.getpid(), time.time(), row['id']))
+    return job_to_dict(row)
+
+
+def drain(queue='default'):
+    """Run the queue's jobs until there are none left (or its limit is hit)."""
+    while True:
+        claimed = claim_next_job(queue)
+        if claimed is None:
+            return
+        run_job(claimed)
+
+
+def run_job(claimed):
+    job_id = claimed['id']
+    last_write = [0.0]
+
+    def progress(fraction, message=None):
+        now = time.monotonic()
+        if now - last_write[0] < PROGRESS_INTERVAL and fraction < 1:
+            return
+        last_write[0] = now
+        try:
+            update_job(job_id, progress=min(max(fraction, 0), 1), message=message)
+        except (sqlite3.OperationalError, DatabaseBusy):
+            pass    # progress is best effort, never fail the job over it
+
+    stop = threading.Event()
+    beat = threading.Thread(target=heartbeat, args=(job_id, stop), daemon=True)
+    beat.start()
+
+    error = None
+    try:
+        result = JOB_TYPES[claimed['kind']](claimed['params'], progress)
+    except Exception as e:
+        error = f'{e}\n{traceback.format_exc()}'
+    finally:
+        stop.set()
+        beat.join()
+
+    # Written outside the except block: once the traceback is gone, a
+    # connection the job left open is closed and releases its lock
+    if error is not None:
+        update_job(job_id, status='failed', error=error, finished=True)
+    else:
+        update_job(job_id, status='succeeded', progress=1, result=json.dumps(result), finished=True)
+
+
+def update_job(job_id, finished=False, **fields):
+    assignments = [f'{column} = ?' for column in fields]
+    if finished:
+        assignments.append('finished_at = CURRENT_TIMESTAMP')
+    with write_transaction() as conn:
+        conn.execute(
+            f"UPDATE jobs SET {', '.join(assignments)} WHERE id = ?",
+            list(fields.values()) + [job_id]
+        )
+
+
+def heartbeat(job_id, stop):
+    """Touch the job's heartbeat until `stop` is set."""
+    while not stop.wait(HEARTBEAT_SECONDS):
+        try:
+            update_job(job_id, heartbeat_at=time.time())
+        except (sqlite3.OperationalError, DatabaseBusy):
+            pass    # busy database, the next beat will do
+
+
+def fail_stale_jobs(conn):
+    """Mark running jobs whose heartbeat stopped as failed (the caller commits)."""
+    return conn.execute('''
+        UPDATE jobs SET status = 'failed', error = 'Interrupted (worker exited)',
+            finished_at = CURRENT_TIMESTAMP
+        WHERE status = 'running' AND COALESCE(heartbeat_at, 0) < ?
+    ''', (time.time() - STALE_SECONDS,)).rowcount
+
+
+def recover_jobs():
+    """Fail jobs left 'running' by a process that no longer exists (restart, crash)."""
+    with write_transaction() as conn:
+        fail_stale_jobs(conn)
+
+
+def resume_queued_jobs():
+    """
+    Pick up anything still queued. Per process (app.start_worker), not in the
+    gunicorn master: the pools' threads and processes don't survive a fork.
+    """
+    conn = get_db_connection()
+    queued = {
+        row[0] for row in conn.execute("SELECT DISTINCT kind FROM jobs WHERE status = 'queued'")
+    }
+    conn.close()
+
+    for queue in {JOB_TYPE_QUEUES[kind] for kind in queued if kind in JOB_TYPE_QUEUES}:
+        get_executor(queue).submit(drain, queue)
+
+
+# --- Job types ---
+
+DATA_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data'))
+
+
+def data_file(path):
+    """Resolve a file inside data/; the API must not read arbitrary server paths."""
+    full_path = os.path.abspath(os.path.join(DATA_DIR, path))
+    if os.path.commonpath([full_path, DATA_DIR]) != DATA_DIR or not os.path.isfile(full_path):
+        raise ValueError(f'No such file in data/: {path}')
+    return full_path
+
+
+@job('import_centrumrespo')
+def import_centrumrespo_job(params, progress):
+    from import_res import import_centrumrespo
+    return import_centrumrespo(data_file(params['path']), progress=progress,
+                               on_duplicate=params.get('on_duplicate', 'skip'))
+
+
+@job('import_recipes')
+def import_recipes_job(params, progress):
+    from import_recipes import import_recipes
+    return import_recipes(data_file(params.get('path', 'recipes.json')), progress=progress,
+                          on_duplicate=params.get('on_duplicate', 'skip'))
+
+
+@job('import_export')
+def import_export_job(params, progress):
+    """Re-import a library written by export.py (see import_export.py)."""
+    from import_export import import_export
+    return import_export(data_file(params['path']), username=params.get('username'), progress=progress)
+
+
+@job('analyze')
+def analyze_job(params, progress):
+    """Refresh SQLite's query planner statistics."""
+    conn = get_db_connection()
+    conn.execute('ANALYZE')
+    conn.commit()
+    conn.close()
+    return {'analyzed': True}
+
+
+@job('maintenance')
+def maintenance_job(params, progress):
+    """ANALYZE, incremental vacuum and WAL checkpoint as due (see maintenance.py)."""
+    from maintenance import run
+    return run(force=bool(params.get('force')))
+
+
+@job('reindex')
+def reindex_job(params, progress):
+    """Rebuild every index from scratch (after bulk imports/deletes)."""
+    conn = get_db_connection()
+    conn.execute('REINDEX')
+    conn.commit()
+    conn.close()
+    return {'reindexed': True}
+
+
+@job('recompute_nutrition')
+def recompute_nutrition_job(params, progress):
+    """Re-estimate nutrition from ingredients for the whole library (see nutrition.py)."""
+    from nutrition import recompute_all
+    return {'updated': recompute_all(progress)}
+
+
+@job('rebuild_popularity')
+def rebuild_popularity_job(params, progress):
+    """Recount the favorite/plan counters on recipes (see popularity.py)."""
+    from popularity import rebuild
+    with write_transaction() as conn:
+        return {'repaired': rebuild(conn.cursor())}
+
+
+@job('image_thumbnails', queue='images')
+def image_thumbnails_job(params, progress):
+    from images import make_thumbnails
+    return {'created': make_thumbnails(params['sha256'])}
+
+
+@job('ingest_image', queue='images')
+def ingest_image_job(params, progress):
+    """Download an image from a URL and attach it to a recipe."""
+    from images import Image, store_image, download_image, attach_image, make_thumbnails
+    image = store_image(download_image(params['url']), source_url=params['url'])
+    if not attach_image(params['recipe_id'], image):
+        raise ValueError(f"Recipe {params['recipe_id']} not found")
+    if Image is not None:
+        make_thumbnails(image['sha256'])
+    return {'sha256': image['sha256']}
+
+
+@job('localize_images')
+def localize_images_job(params, progress):
+    from images import localize_images
+    return localize_images(params.get('source', 'centrumrespo'), progress=progress)
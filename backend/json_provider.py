@@ -0,0 +1,70 @@
+"""
+JSON encoding for API responses.
+
+Flask's default provider goes through the stdlib json module. When orjson is
+installed we use it instead (several times faster on our recipe lists); when it
+isn't, we fall back to the stdlib with the same output options, so the app
+works either way.
+
+Pick the provider with the JSON_PROVIDER env variable: "auto" (default),
+"orjson" or "stdlib".
+"""
+
+import os
+import typing as t
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+
+class StdlibJSONProvider(DefaultJSONProvider):
+    # Polish text is mostly non-ASCII, escaping it makes payloads ~2x bigger
+    ensure_ascii = False
+    sort_keys = False
+
+
+class OrjsonProvider(StdlibJSONProvider):
+    """Same behaviour as StdlibJSONProvider, serialized with orjson."""
+
+    def dumps(self, obj: t.Any, **kwargs: t.Any) -> str:
+        return self._dumps_bytes(obj, **kwargs).decode('utf-8')
+
+    def loads(self, s: str | bytes, **kwargs: t.Any) -> t.Any:
+        return orjson.loads(s)
+
+    def response(self, *args: t.Any, **kwargs: t.Any):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+
+        # Hand the bytes straight to the response, no str round trip
+        body = self._dumps_bytes(obj, indent=2 if indent else None) + b'\n'
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+    def _dumps_bytes(self, obj, indent=None, **kwargs):
+        # datetimes go through Flask's default() so both providers agree
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(obj, default=self.default, option=option)
+
+
+def get_json_provider_class(name=None):
+    """Return the provider class for `name` ("auto", "orjson" or "stdlib")."""
+    name = (name or os.environ.get('JSON_PROVIDER', 'auto')).lower()
+
+    if name == 'stdlib':
+        return StdlibJSONProvider
+    if name == 'orjson':
+        if orjson is None:
+            raise RuntimeError("JSON_PROVIDER=orjson but orjson is not installed")
+        return OrjsonProvider
+    if name == 'auto':
+        return OrjsonProvider if orjson is not None else StdlibJSONProvider
+
+    raise RuntimeError(f"Unknown JSON_PROVIDER: {name}")
@@ -0,0 +1,289 @@
+"""
+Routine SQLite upkeep: planner statistics, free pages and the WAL.
+
+Each step runs only when it is due, in small steps that hold the write lock
+briefly, so readers and writers keep going in between:
+
+    analyze             data_revision moved ANALYZE_WRITES since the last
+                        one (bulk imports, bulk deletes): ANALYZE table by
+                        table with analysis_limit. A run out of time logs
+                        where it stopped and the next one carries on there
+    incremental_vacuum  FREE_PAGES or more on the freelist: give them back
+                        to the filesystem VACUUM_STEP_PAGES at a time
+    checkpoint          in WAL mode, a -wal file over WAL_MAX_BYTES:
+                        checkpoint it and truncate it to zero
+
+Incremental vacuum needs auto_vacuum = INCREMENTAL, which schema.sql sets
+for new databases. An older file keeps its free pages (reported as
+'needs_vacuum') until a one-off `python maintenance.py --vacuum`, a full
+VACUUM that locks the database while it rewrites it.
+
+Every run that did something ends with PRAGMA optimize and logs page
+counts, freelist, file sizes and the timings of a few typical queries before
+and after to maintenance_log.
+Scheduled in-process every MAINTENANCE_INTERVAL_MINUTES (see app.py; the
+gunicorn config turns it on).
+
+Usage:
+    python maintenance.py              # run what's due
+    python maintenance.py --force      # run every step now
+    python maintenance.py --status     # current stats and the last runs
+    python maintenance.py --vacuum     # full VACUUM, switching on incremental vacuum
+"""
+
+import argparse
+import json
+import os
+import statistics
+import time
+
+from database import DATABASE, data_revision, file_lock, get_db_connection, write_transaction
+
+ANALYZE_WRITES = int(os.environ.get('MAINTENANCE_ANALYZE_WRITES', 5000))
+# Rows ANALYZE samples per index: approximate statistics, in milliseconds
+ANALYSIS_LIMIT = 1000
+FREE_PAGES = int(os.environ.get('MAINTENANCE_FREE_PAGES', 1000))
+VACUUM_STEP_PAGES = 200
+WAL_MAX_BYTES = int(os.environ.get('MAINTENANCE_WAL_MAX_MB', 64)) * 1024 * 1024
+# Pause between steps, when other connections get the lock
+STEP_PAUSE = 0.02
+# A run stops starting new steps after this long; the next one carries on
+MAX_SECONDS = 30.0
+LOG_KEEP = 500
+
+# A few queries the app runs all the time, timed before and after
+QUERIES = {
+    'list_page': 'SELECT * FROM recipes ORDER BY id DESC LIMIT 20',
+    'category_count': "SELECT COUNT(*) FROM recipes WHERE category = 'dinner'",
+    'tag_counts': 'SELECT category_name, COUNT(*) FROM recipe_categories GROUP BY category_name',
+    'recipe_ingredients': 'SELECT * FROM ingredients WHERE recipe_id IN '
+                          '(SELECT id FROM recipes ORDER BY id DESC LIMIT 50)',
+}
+
+
+def file_size(path):
+    return os.path.getsize(path) if os.path.exists(path) else 0
+
+
+def query_timings(conn, repeat=3):
+    """Median milliseconds of each of QUERIES."""
+    timings = {}
+    for name, sql in QUERIES.items():
+        runs = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            conn.execute(sql).fetchall()
+            runs.append((time.perf_counter() - started) * 1000)
+        timings[name] = round(statistics.median(runs), 2)
+    return timings
+
+
+def stats(conn, timings=True):
+    """Size and layout of the database file, and optionally query timings."""
+    def pragma(name):
+        return conn.execute(f'PRAGMA {name}').fetchone()[0]
+
+    result = {
+        'page_size': pragma('page_size'),
+        'page_count': pragma('page_count'),
+        'freelist_count': pragma('freelist_count'),
+        'auto_vacuum': ('none', 'full', 'incremental')[pragma('auto_vacuum')],
+        'journal_mode': pragma('journal_mode'),
+        'file_bytes': file_size(DATABASE),
+        'wal_bytes': file_size(DATABASE + '-wal'),
+        'revision': data_revision(conn),
+    }
+    if timings:
+        result['query_ms'] = query_timings(conn)
+    return result
+
+
+def last_run(conn, step):
+    """(data_revision, detail) when `step` last ran, or (None, None) if it never did."""
+    row = conn.execute(
+        'SELECT revision, detail FROM maintenance_log WHERE step = ? ORDER BY id DESC LIMIT 1', (step,)
+    ).fetchone()
+    return (row[0], json.loads(row[1]) if row[1] else {}) if row else (None, None)
+
+
+def due_steps(conn, current, force=False):
+    """
+    The steps whose thresholds `current` (stats()) crosses. With force every
+    step that applies to this file: not incremental_vacuum without
+    auto_vacuum = INCREMENTAL, nor checkpoint outside WAL mode.
+    """
+    steps = []
+    analyzed, detail = last_run(conn, 'analyze')
+    # A lower revision than logged: the database was recreated. resume_from:
+    # the last one ran out of time
+    if (force or analyzed is None or not 0 <= current['revision'] - analyzed < ANALYZE_WRITES
+            or detail.get('resume_from')):
+        steps.append('analyze')
+    if current['auto_vacuum'] == 'incremental' and (force or current['freelist_count'] >= FREE_PAGES):
+        steps.append('incremental_vacuum')
+    if current['journal_mode'] == 'wal' and (force or current['wal_bytes'] >= WAL_MAX_BYTES):
+        steps.append('checkpoint')
+    return steps
+
+
+def analyze(deadline):
+    """
+    ANALYZE each table in its own short transaction, from where the last run
+    stopped if it ran out of time. Stopping early returns resume_from, the
+    first table left.
+    """
+    conn = get_db_connection()
+    tables = [row[0] for row in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' ORDER BY name"
+    )]
+    last = last_run(conn, 'analyze')[1]
+    conn.close()
+    if last and last.get('resume_from'):
+        tables = [table for table in tables if table >= last['resume_from']]
+
+    analyzed = []
+    for table in tables:
+        if time.monotonic() > deadline:
+            return {'tables': len(analyzed), 'of': len(tables), 'resume_from': table}
+        with write_transaction() as conn:
+            conn.execute(f'PRAGMA analysis_limit = {ANALYSIS_LIMIT}')
+            conn.execute(f'ANALYZE "{table}"')
+        analyzed.append(table)
+        time.sleep(STEP_PAUSE)
+    return {'tables': len(analyzed), 'of': len(tables)}
+
+
+def incremental_vacuum(deadline):
+    """Free VACUUM_STEP_PAGES pages per transaction until none are left."""
+    freed = steps = 0
+    while time.monotonic() <= deadline:
+        with write_transaction() as conn:
+            before = conn.execute('PRAGMA freelist_count').fetchone()[0]
+            if not before:
+                break
+            # Each step of the statement frees one page, and Python's sqlite3
+            # steps a statement without result columns only once
+            for _ in range(min(before, VACUUM_STEP_PAGES)):
+                conn.execute('PRAGMA incremental_vacuum')
+            freed += before - conn.execute('PRAGMA freelist_count').fetchone()[0]
+        steps += 1
+        time.sleep(STEP_PAUSE)
+    return {'freed_pages': freed, 'steps': steps}
+
+
+def checkpoint(deadline):
+    """Copy the WAL into the database and truncate it, unless readers hold it."""
+    conn = get_db_connection()
+    # Wait a little for readers, not for as long as a writer would
+    conn.execute('PRAGMA busy_timeout = 200')
+    busy, wal_pages, copied = conn.execute('PRAGMA wal_checkpoint(TRUNCATE)').fetchone()
+    conn.close()
+    return {'busy': bool(busy), 'wal_pages': wal_pages, 'copied': copied}
+
+
+STEPS = {
+    'analyze': analyze,
+    'incremental_vacuum': incremental_vacuum,
+    'checkpoint': checkpoint,
+}
+
+
+def log_run(step, started_at, seconds, detail, before, after):
+    with write_transaction() as conn:
+        conn.execute('''
+            INSERT INTO maintenance_log (step, revision, started_at, seconds, detail, before, after)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', (step, before['revision'], started_at, round(seconds, 3),
+              json.dumps(detail), json.dumps(before), json.dumps(after)))
+        conn.execute('''
+            DELETE FROM maintenance_log
+            WHERE id <= (SELECT id FROM maintenance_log ORDER BY id DESC LIMIT 1 OFFSET ?)
+        ''', (LOG_KEEP,))
+
+
+def run(force=False, max_seconds=None):
+    """
+    Run the steps that are due (all of them with force). Returns {'steps':
+    {step: detail}, 'before', 'after'}; just the stats when nothing was due.
+    """
+    deadline = time.monotonic() + (MAX_SECONDS if max_seconds is None else max_seconds)
+    # Not scheduler.py's '.maintenance.lock', which it holds while calling this
+    with file_lock(f'{DATABASE}.maintenance-run.lock', blocking=False) as locked:
+        if not locked:
+            return {'skipped': 'another maintenance run is in progress'}
+
+        conn = get_db_connection()
+        current = stats(conn, timings=False)
+        due = due_steps(conn, current, force)
+        if current['auto_vacuum'] != 'incremental' and current['freelist_count'] >= FREE_PAGES:
+            current['needs_vacuum'] = True
+        if not due:
+            conn.close()
+            return {'steps': {}, 'before': current}
+        before = stats(conn)
+        conn.close()
+
+        done = {}
+        started_at = {}
+        for step in due:
+            started_at[step], started = time.time(), time.perf_counter()
+            done[step] = STEPS[step](deadline)
+            done[step]['seconds'] = round(time.perf_counter() - started, 3)
+
+        conn = get_db_connection()
+        after = stats(conn)
+        # Lets SQLite re-analyze whatever the timed queries still find wanting
+        conn.execute('PRAGMA optimize')
+        conn.close()
+        for step, detail in done.items():
+            log_run(step, started_at[step], detail['seconds'], detail, before, after)
+        return {'steps': done, 'before': before, 'after': after}
+
+
+def vacuum():
+    """Full VACUUM, switching the file to incremental auto_vacuum. Locks the database."""
+    conn = get_db_connection()
+    conn.execute('PRAGMA busy_timeout = 10000')
+    before = stats(conn)
+    started_at, started = time.time(), time.perf_counter()
+    conn.execute('PRAGMA auto_vacuum = INCREMENTAL')
+    conn.execute('VACUUM')
+    seconds = time.perf_counter() - started
+    after = stats(conn)
+    conn.close()
+    log_run('vacuum', started_at, seconds, {}, before, after)
+    return {'seconds': round(seconds, 3), 'before': before, 'after': after}
+
+
+def recent_runs(conn, limit=20):
+    """The last `limit` maintenance_log rows, newest first, JSON decoded."""
+    runs = []
+    for row in conn.execute('SELECT * FROM maintenance_log ORDER BY id DESC LIMIT ?', (limit,)):
+        run = dict(row)
+        for key in ('detail', 'before', 'after'):
+            run[key] = json.loads(run[key]) if run[key] else None
+        runs.append(run)
+    return runs
+
+
+def main():
+    parser = argparse.ArgumentParser(description='SQLite maintenance for recipes.db')
+    parser.add_argument('--force', action='store_true', help='run every step, due or not')
+    parser.add_argument('--status', action='store_true', help='show stats and recent runs')
+    parser.add_argument('--vacuum', action='store_true',
+                        help='full VACUUM (locks the database), enables incremental vacuum')
+    args = parser.parse_args()
+
+    if args.status:
+        conn = get_db_connection()
+        print(json.dumps({'stats': stats(conn), 'due': due_steps(conn, stats(conn, timings=False)),
+                          'runs': recent_runs(conn, 5)}, indent=2))
+        conn.close()
+        return
+
+    result = vacuum() if args.vacuum else run(force=args.force)
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == '__main__':
+    main()
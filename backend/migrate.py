@@ -0,0 +1,109 @@
+"""
+Versioned schema migrations.
+
+Migrations are the files in migrations/ named NNNN_description.sql, applied in
+order. Each runs in one transaction together with its row in `schema_version`,
+so a failed migration leaves nothing half-applied.
+
+At startup every gunicorn worker calls migrate(); a lock file next to the
+database makes them take turns, so only the first one does the work and the
+rest find nothing pending.
+
+Usage:
+    python migrate.py            # apply pending migrations
+    python migrate.py --status   # list applied / pending
+"""
+
+import os
+import re
+import sys
+
+from database import DATABASE, SCHEMA, get_db_connection, file_lock
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrations')
+MIGRATION_NAME = re.compile(r'^(\d{4})_([a-z0-9_]+)\.sql$')
+
+
+def available_migrations():
+    """[(version, name, path)] for every migration file, in order."""
+    found = []
+    for filename in sorted(os.listdir(MIGRATIONS_DIR)):
+        match = MIGRATION_NAME.match(filename)
+        if match:
+            found.append((int(match.group(1)), match.group(2), os.path.join(MIGRATIONS_DIR, filename)))
+    return found
+
+
+def applied_versions(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    conn.commit()
+    return {row[0] for row in conn.execute('SELECT version FROM schema_version')}
+
+
+def migrate(verbose=False):
+    """Apply pending migrations. Returns the list of applied versions."""
+    with file_lock(DATABASE + '.migrate.lock'):
+        conn = get_db_connection()
+        try:
+            # Brand new database file: start from the base schema
+            has_recipes = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'recipes'"
+            ).fetchone()
+            if not has_recipes:
+                with open(SCHEMA, 'r') as f:
+                    conn.executescript(f.read())
+
+            done = applied_versions(conn)
+            applied = []
+            for version, name, path in available_migrations():
+                if version in done:
+                    continue
+                apply_migration(conn, version, name, path)
+                applied.append(version)
+                if verbose:
+                    print(f"Applied migration {version:04d}_{name}")
+            return applied
+        finally:
+            conn.close()
+
+
+def apply_migration(conn, version, name, path):
+    with open(path, 'r', encoding='utf-8') as f:
+        sql = f.read()
+
+    # executescript() commits first and runs statements one by one, so the
+    # transaction has to be part of the script itself
+    try:
+        conn.executescript(
+            f"BEGIN IMMEDIATE;\n{sql}\n;"
+            f"INSERT INTO schema_version (version, name) VALUES ({version}, '{name}');\n"
+            "COMMIT;"
+        )
+    except Exception:
+        if conn.in_transaction:
+            conn.execute('ROLLBACK')
+        raise
+
+
+def print_status():
+    conn = get_db_connection()
+    done = applied_versions(conn)
+    conn.close()
+    for version, name, _ in available_migrations():
+        state = 'applied' if version in done else 'pending'
+        print(f"{version:04d}_{name}: {state}")
+
+
+if __name__ == '__main__':
+    if '--status' in sys.argv:
+        print_status()
+    else:
+        applied = migrate(verbose=True)
+        if not applied:
+            print("Database is up to date")
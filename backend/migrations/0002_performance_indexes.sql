@@ -0,0 +1,20 @@
+-- Indexes for the hot lookups, then fresh planner statistics.
+
+-- get_recipe, update/delete of child rows
+CREATE INDEX IF NOT EXISTS idx_ingredients_recipe ON ingredients(recipe_id);
+
+-- /api/meal-plans?date=..., copy/template ranges
+CREATE INDEX IF NOT EXISTS idx_meal_plans_date ON meal_plans(date, meal_type);
+
+-- ON DELETE CASCADE from recipes
+CREATE INDEX IF NOT EXISTS idx_meal_plans_recipe ON meal_plans(recipe_id);
+CREATE INDEX IF NOT EXISTS idx_template_items_template ON meal_plan_template_items(template_id);
+
+-- /api/favorites (ordered by newest first); UNIQUE(user_id, recipe_id) covers the rest
+CREATE INDEX IF NOT EXISTS idx_favorites_user_created ON favorites(user_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_favorites_recipe ON favorites(recipe_id);
+
+-- import_res.py duplicate check
+CREATE INDEX IF NOT EXISTS idx_recipes_source_url ON recipes(source_url);
+
+ANALYZE;
@@ -0,0 +1,7 @@
+-- Last run of each scheduled task (scheduler.py), shared by all workers
+CREATE TABLE IF NOT EXISTS task_runs (
+    name TEXT PRIMARY KEY,
+    last_run_at REAL NOT NULL,        -- unix timestamp
+    last_status TEXT,
+    last_result TEXT
+);
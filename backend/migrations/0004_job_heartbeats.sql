@@ -0,0 +1,2 @@
+-- Running jobs report liveness here (unix time); see jobs.fail_stale_jobs
+ALTER TABLE jobs ADD COLUMN heartbeat_at REAL;
@@ -0,0 +1,28 @@
+-- A counter bumped by every write to the recipe tables. Per-worker caches
+-- (facet index, ...) compare it to know when to rebuild.
+CREATE TABLE IF NOT EXISTS data_revision (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    revision INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO data_revision (id, revision) VALUES (1, 0);
+
+CREATE TRIGGER IF NOT EXISTS recipes_revision_insert AFTER INSERT ON recipes
+BEGIN UPDATE data_revision SET revision = revision + 1; END;
+CREATE TRIGGER IF NOT EXISTS recipes_revision_update AFTER UPDATE ON recipes
+BEGIN UPDATE data_revision SET revision = revision + 1; END;
+CREATE TRIGGER IF NOT EXISTS recipes_revision_delete AFTER DELETE ON recipes
+BEGIN UPDATE data_revision SET revision = revision + 1; END;
+
+CREATE TRIGGER IF NOT EXISTS recipe_categories_revision_insert AFTER INSERT ON recipe_categories
+BEGIN UPDATE data_revision SET revision = revision + 1; END;
+CREATE TRIGGER IF NOT EXISTS recipe_categories_revision_update AFTER UPDATE ON recipe_categories
+BEGIN UPDATE data_revision SET revision = revision + 1; END;
+CREATE TRIGGER IF NOT EXISTS recipe_categories_revision_delete AFTER DELETE ON recipe_categories
+BEGIN UPDATE data_revision SET revision = revision + 1; END;
+
+CREATE TRIGGER IF NOT EXISTS ingredients_revision_insert AFTER INSERT ON ingredients
+BEGIN UPDATE data_revision SET revision = revision + 1; END;
+CREATE TRIGGER IF NOT EXISTS ingredients_revision_update AFTER UPDATE ON ingredients
+BEGIN UPDATE data_revision SET revision = revision + 1; END;
+CREATE TRIGGER IF NOT EXISTS ingredients_revision_delete AFTER DELETE ON ingredients
+BEGIN UPDATE data_revision SET revision = revision + 1; END;
@@ -0,0 +1,22 @@
+-- Fuzzy name search (search.py): diacritic-folded recipe names in an FTS5
+-- trigram index, kept in sync by triggers. fold() is registered on every
+-- connection by database.get_db_connection().
+CREATE VIRTUAL TABLE IF NOT EXISTS recipe_search USING fts5(name, tokenize = 'trigram');
+
+DELETE FROM recipe_search;
+INSERT INTO recipe_search (rowid, name) SELECT id, fold(name) FROM recipes;
+
+CREATE TRIGGER IF NOT EXISTS recipes_search_insert AFTER INSERT ON recipes
+BEGIN
+    INSERT INTO recipe_search (rowid, name) VALUES (NEW.id, fold(NEW.name));
+END;
+
+CREATE TRIGGER IF NOT EXISTS recipes_search_update AFTER UPDATE OF name ON recipes
+BEGIN
+    UPDATE recipe_search SET name = fold(NEW.name) WHERE rowid = NEW.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS recipes_search_delete AFTER DELETE ON recipes
+BEGIN
+    DELETE FROM recipe_search WHERE rowid = OLD.id;
+END;
@@ -0,0 +1,23 @@
+-- /api/recipes range filters and sort keys (recipe_filters.py).
+-- The ratio indexes are on exactly the expressions in recipe_filters.RATIOS,
+-- SQLite only uses an expression index for an identical expression.
+
+CREATE INDEX IF NOT EXISTS idx_recipes_calories ON recipes(calories_per_serving);
+CREATE INDEX IF NOT EXISTS idx_recipes_protein ON recipes(protein_per_serving);
+CREATE INDEX IF NOT EXISTS idx_recipes_fat ON recipes(fat_per_serving);
+CREATE INDEX IF NOT EXISTS idx_recipes_carbs ON recipes(carbs_per_serving);
+CREATE INDEX IF NOT EXISTS idx_recipes_sodium ON recipes(sodium_per_serving);
+CREATE INDEX IF NOT EXISTS idx_recipes_fiber ON recipes(fiber_per_serving);
+CREATE INDEX IF NOT EXISTS idx_recipes_prep_time ON recipes(prep_time_minutes);
+CREATE INDEX IF NOT EXISTS idx_recipes_total_time ON recipes(total_time_minutes);
+CREATE INDEX IF NOT EXISTS idx_recipes_rating ON recipes(rating);
+
+-- "dinners under 500 kcal"
+CREATE INDEX IF NOT EXISTS idx_recipes_category_calories ON recipes(category, calories_per_serving);
+
+CREATE INDEX IF NOT EXISTS idx_recipes_protein_per_kcal
+    ON recipes(protein_per_serving / NULLIF(calories_per_serving, 0));
+CREATE INDEX IF NOT EXISTS idx_recipes_fiber_per_kcal
+    ON recipes(fiber_per_serving / NULLIF(calories_per_serving, 0));
+
+ANALYZE;
@@ -0,0 +1,59 @@
+-- What changed since a given revision, for /api/changes (delta sync).
+-- One row per recipe, favorite (user_id + recipe id) and meal plan: a write
+-- replaces the entity's row, which moves it to a new, higher revision. So
+-- the log never holds more than one row per thing and deletes stay as
+-- tombstones. Triggers fill it, every write path (API, importers, jobs) is
+-- covered without touching them.
+CREATE TABLE IF NOT EXISTS change_log (
+    revision INTEGER PRIMARY KEY AUTOINCREMENT,
+    entity TEXT NOT NULL,                -- 'recipe', 'favorite', 'meal_plan'
+    entity_id INTEGER NOT NULL,          -- recipe id for recipes and favorites
+    user_id INTEGER NOT NULL DEFAULT 0,  -- owner of a favorite, 0 otherwise
+    op TEXT NOT NULL,                    -- 'upsert' or 'delete'
+    UNIQUE (entity, user_id, entity_id)
+);
+
+-- Start with everything that exists, so since=0 is a full sync
+INSERT OR IGNORE INTO change_log (entity, entity_id, op)
+    SELECT 'recipe', id, 'upsert' FROM recipes ORDER BY id;
+INSERT OR IGNORE INTO change_log (entity, entity_id, user_id, op)
+    SELECT 'favorite', recipe_id, user_id, 'upsert' FROM favorites ORDER BY created_at;
+INSERT OR IGNORE INTO change_log (entity, entity_id, op)
+    SELECT 'meal_plan', id, 'upsert' FROM meal_plans ORDER BY id;
+
+CREATE TRIGGER IF NOT EXISTS recipes_change_insert AFTER INSERT ON recipes
+BEGIN INSERT OR REPLACE INTO change_log (entity, entity_id, op) VALUES ('recipe', NEW.id, 'upsert'); END;
+CREATE TRIGGER IF NOT EXISTS recipes_change_update AFTER UPDATE ON recipes
+BEGIN INSERT OR REPLACE INTO change_log (entity, entity_id, op) VALUES ('recipe', NEW.id, 'upsert'); END;
+CREATE TRIGGER IF NOT EXISTS recipes_change_delete AFTER DELETE ON recipes
+BEGIN INSERT OR REPLACE INTO change_log (entity, entity_id, op) VALUES ('recipe', OLD.id, 'delete'); END;
+
+-- A changed ingredient or tag changes its recipe. Rows deleted along with
+-- their recipe must not turn its tombstone back into an upsert.
+CREATE TRIGGER IF NOT EXISTS ingredients_change_insert AFTER INSERT ON ingredients
+BEGIN INSERT OR REPLACE INTO change_log (entity, entity_id, op) VALUES ('recipe', NEW.recipe_id, 'upsert'); END;
+CREATE TRIGGER IF NOT EXISTS ingredients_change_update AFTER UPDATE ON ingredients
+BEGIN INSERT OR REPLACE INTO change_log (entity, entity_id, op) VALUES ('recipe', NEW.recipe_id, 'upsert'); END;
+CREATE TRIGGER IF NOT EXISTS ingredients_change_delete AFTER DELETE ON ingredients
+WHEN EXISTS (SELECT 1 FROM recipes WHERE id = OLD.recipe_id)
+BEGIN INSERT OR REPLACE INTO change_log (entity, entity_id, op) VALUES ('recipe', OLD.recipe_id, 'upsert'); END;
+
+CREATE TRIGGER IF NOT EXISTS recipe_categories_change_insert AFTER INSERT ON recipe_categories
+BEGIN INSERT OR REPLACE INTO change_log (entity, entity_id, op) VALUES ('recipe', NEW.recipe_id, 'upsert'); END;
+CREATE TRIGGER IF NOT EXISTS recipe_categories_change_update AFTER UPDATE ON recipe_categories
+BEGIN INSERT OR REPLACE INTO change_log (entity, entity_id, op) VALUES ('recipe', NEW.recipe_id, 'upsert'); END;
+CREATE TRIGGER IF NOT EXISTS recipe_categories_change_delete AFTER DELETE ON recipe_categories
+WHEN EXISTS (SELECT 1 FROM recipes WHERE id = OLD.recipe_id)
+BEGIN INSERT OR REPLACE INTO change_log (entity, entity_id, op) VALUES ('recipe', OLD.recipe_id, 'upsert'); END;
+
+CREATE TRIGGER IF NOT EXISTS favorites_change_insert AFTER INSERT ON favorites
+BEGIN INSERT OR REPLACE INTO change_log (entity, entity_id, user_id, op) VALUES ('favorite', NEW.recipe_id, NEW.user_id, 'upsert'); END;
+CREATE TRIGGER IF NOT EXISTS favorites_change_delete AFTER DELETE ON favorites
+BEGIN INSERT OR REPLACE INTO change_log (entity, entity_id, user_id, op) VALUES ('favorite', OLD.recipe_id, OLD.user_id, 'delete'); END;
+
+CREATE TRIGGER IF NOT EXISTS meal_plans_change_insert AFTER INSERT ON meal_plans
+BEGIN INSERT OR REPLACE INTO change_log (entity, entity_id, op) VALUES ('meal_plan', NEW.id, 'upsert'); END;
+CREATE TRIGGER IF NOT EXISTS meal_plans_change_update AFTER UPDATE ON meal_plans
+BEGIN INSERT OR REPLACE INTO change_log (entity, entity_id, op) VALUES ('meal_plan', NEW.id, 'upsert'); END;
+CREATE TRIGGER IF NOT EXISTS meal_plans_change_delete AFTER DELETE ON meal_plans
+BEGIN INSERT OR REPLACE INTO change_log (entity, entity_id, op) VALUES ('meal_plan', OLD.id, 'delete'); END;
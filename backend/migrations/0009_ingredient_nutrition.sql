@@ -0,0 +1,115 @@
+-- Per-100 g nutrition of common ingredients, for estimating recipe macros
+-- from their ingredient lists (see nutrition.py). Approximate values from
+-- common food composition tables; sodium in mg like sodium_per_serving.
+CREATE TABLE IF NOT EXISTS nutrition_foods (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL UNIQUE,
+    keywords TEXT NOT NULL,        -- JSON array of word stems an ingredient name must contain
+    calories REAL NOT NULL DEFAULT 0,
+    protein REAL NOT NULL DEFAULT 0,
+    fat REAL NOT NULL DEFAULT 0,
+    carbs REAL NOT NULL DEFAULT 0,
+    fiber REAL NOT NULL DEFAULT 0,
+    sodium REAL NOT NULL DEFAULT 0,
+    piece_grams REAL,              -- one 'szt' (or no unit: "2 jajka")
+    package_grams REAL,            -- one 'opakowanie' (a can: drained weight)
+    density REAL NOT NULL DEFAULT 1  -- g per ml, for ml/l/spoons
+);
+
+-- 'ingredients' when the macros were computed from the ingredients,
+-- NULL when they came with the recipe (import or typed in)
+ALTER TABLE recipes ADD COLUMN nutrition_source TEXT;
+
+INSERT OR IGNORE INTO nutrition_foods
+    (name, keywords, calories, protein, fat, carbs, fiber, sodium, piece_grams, package_grams, density)
+VALUES
+    ('pierś z kurczaka', '["piers kurczak", "filet kurczak", "kurczak"]', 120, 22.5, 2.6, 0, 0, 45, 150, NULL, 1),
+    ('udko z kurczaka', '["udk kurczak", "udek kurczak", "udzik"]', 180, 18, 12, 0, 0, 85, 120, NULL, 1),
+    ('indyk', '["indyk", "indycz"]', 110, 24, 1.5, 0, 0, 50, 150, NULL, 1),
+    ('wołowina', '["wolowin", "wolow"]', 200, 20, 13, 0, 0, 60, NULL, NULL, 1),
+    ('wieprzowina', '["wieprzow", "karkow", "karczek", "karczk"]', 240, 19, 18, 0, 0, 60, NULL, NULL, 1),
+    ('schab', '["schab"]', 170, 21, 9, 0, 0, 55, 120, NULL, 1),
+    ('boczek', '["boczek", "boczk"]', 460, 13, 45, 0, 0, 800, NULL, NULL, 1),
+    ('szynka', '["szynk", "szynek"]', 110, 19, 3, 1, 0, 1100, NULL, NULL, 1),
+    ('kiełbasa', '["kielbas", "kielbask", "parowk", "parowek"]', 300, 13, 27, 1, 0, 1000, 100, NULL, 1),
+    ('łosoś', '["losos"]', 200, 20, 13, 0, 0, 50, 125, NULL, 1),
+    ('tuńczyk w sosie własnym', '["tunczyk"]', 100, 23, 1, 0, 0, 300, NULL, 120, 1),
+    ('dorsz', '["dorsz", "mintaj"]', 80, 18, 0.7, 0, 0, 70, 120, NULL, 1),
+    ('krewetki', '["krewet"]', 85, 19, 1, 0, 0, 300, NULL, NULL, 1),
+    ('jajko', '["jajk", "jajek", "jaja", "jajo"]', 140, 12.5, 10, 0.7, 0, 140, 55, NULL, 1),
+    ('mleko', '["mlek", "mleczk"]', 50, 3.3, 2, 4.8, 0, 45, NULL, NULL, 1.03),
+    ('mleko kokosowe', '["mlek kokos", "mleczk kokos"]', 180, 1.8, 18, 3, 0, 15, NULL, 400, 1),
+    ('jogurt naturalny', '["jogurt"]', 60, 4.3, 3, 4.7, 0, 50, NULL, 150, 1.03),
+    ('jogurt grecki', '["jogurt greck"]', 100, 9, 5, 4, 0, 40, NULL, 150, 1.03),
+    ('skyr', '["skyr"]', 65, 11, 0.2, 4, 0, 45, NULL, 150, 1.03),
+    ('serek wiejski', '["serek wiejsk", "serk wiejsk", "twarozek ziarnist", "twarozk ziarnist"]', 100, 11, 5, 2, 0, 330, NULL, 200, 1),
+    ('twaróg', '["twarog", "twarozk", "twarozek"]', 130, 18, 4, 3.5, 0, 40, NULL, 250, 1),
+    ('ser żółty', '["ser zolt", "sera zolt", "serem zolt", "gouda", "goudy", "edam", "cheddar"]', 350, 25, 27, 0.1, 0, 600, NULL, NULL, 1),
+    ('mozzarella', '["mozzarel"]', 250, 18, 19, 2, 0, 400, 125, 125, 1),
+    ('feta', '["feta", "fety", "fete", "ser fet", "sera fet"]', 265, 14, 21, 4, 0, 1100, NULL, 200, 1),
+    ('parmezan', '["parmezan", "parmigiano", "grana padano"]', 400, 35, 28, 0, 0, 1500, NULL, NULL, 1),
+    ('masło', '["masl", "masel"]', 740, 0.7, 82, 0.7, 0, 10, NULL, 200, 0.91),
+    ('masło orzechowe', '["masl orzech", "masl arachid"]', 600, 25, 50, 15, 6, 400, NULL, NULL, 1.1),
+    ('oliwa z oliwek', '["oliwa", "oliwy", "oliwe", "oliw z oliwek"]', 884, 0, 100, 0, 0, 2, NULL, NULL, 0.92),
+    ('olej', '["olej", "olej sezam", "olej kokos"]', 884, 0, 100, 0, 0, 0, NULL, NULL, 0.92),
+    ('oliwki', '["oliwk", "oliwek"]', 140, 1, 14, 4, 3, 1500, 4, NULL, 1),
+    ('śmietana', '["smietan", "smietank"]', 185, 2.5, 18, 3.6, 0, 40, NULL, 200, 1),
+    ('ryż', '["ryz"]', 350, 7, 0.7, 78, 1.3, 5, NULL, 100, 0.85),
+    ('makaron', '["makaron", "spaghetti", "penne", "tagliatelle"]', 350, 12, 1.5, 72, 3, 5, NULL, 500, 1),
+    ('kasza', '["kasz", "bulgur", "kuskus", "komos", "quinoa"]', 340, 11, 2.5, 70, 6, 5, NULL, 100, 0.85),
+    ('płatki owsiane', '["platk owsian", "owsian", "otrab"]', 370, 13, 7, 60, 10, 5, NULL, NULL, 0.4),
+    ('mąka', '["maka", "maki", "mace"]', 350, 10, 1.5, 73, 3, 2, NULL, NULL, 0.6),
+    ('chleb', '["chleb", "kromk"]', 250, 8, 3, 48, 6, 500, 35, NULL, 1),
+    ('bułka', '["bulk", "bulek", "bagietk"]', 280, 9, 3, 55, 3, 500, 60, NULL, 1),
+    ('tortilla', '["tortill", "wrap"]', 310, 8, 8, 50, 3, 600, 60, NULL, 1),
+    ('ziemniaki', '["ziemniak", "ziemniacz"]', 77, 2, 0.1, 17, 2.2, 6, 150, NULL, 1),
+    ('batat', '["batat"]', 86, 1.6, 0.1, 20, 3, 55, 250, NULL, 1),
+    ('cebula', '["cebul", "szalotk", "dymk"]', 40, 1.1, 0.1, 9, 1.7, 4, 110, NULL, 1),
+    ('czosnek', '["czosn"]', 150, 6.4, 0.5, 33, 2, 17, 40, NULL, 1),
+    ('papryka', '["papryk"]', 30, 1, 0.3, 6, 2, 4, 170, NULL, 1),
+    ('papryka mielona', '["papryk mielon", "papryk slodk", "papryk ostr", "papryk wedzon", "chili"]', 280, 14, 13, 54, 35, 70, NULL, NULL, 0.5),
+    ('pomidor', '["pomidor", "pomidork"]', 18, 0.9, 0.2, 3.9, 1.2, 5, 120, NULL, 1),
+    ('pomidory z puszki', '["pomidor puszk", "pomidor krojon", "pomidor z puszk", "passat"]', 25, 1.2, 0.2, 4.5, 1, 120, NULL, 400, 1.03),
+    ('koncentrat pomidorowy', '["koncentrat pomidor", "przecier pomidor"]', 80, 4, 0.5, 15, 4, 60, NULL, NULL, 1.1),
+    ('ogórek', '["ogor"]', 15, 0.7, 0.1, 3.6, 0.5, 2, 150, NULL, 1),
+    ('marchew', '["marchew", "marchw", "marchewk"]', 41, 0.9, 0.2, 10, 2.8, 69, 80, NULL, 1),
+    ('cukinia', '["cukini"]', 17, 1.2, 0.3, 3.1, 1, 8, 300, NULL, 1),
+    ('bakłażan', '["baklazan"]', 25, 1, 0.2, 6, 3, 2, 300, NULL, 1),
+    ('brokuł', '["brokul"]', 34, 2.8, 0.4, 7, 2.6, 33, 400, NULL, 1),
+    ('kalafior', '["kalafior"]', 25, 1.9, 0.3, 5, 2, 30, 600, NULL, 1),
+    ('szpinak', '["szpinak"]', 23, 2.9, 0.4, 3.6, 2.2, 79, NULL, 450, 1),
+    ('sałata', '["salat", "rukol", "roszpon", "mix salat"]', 15, 1.4, 0.2, 2.9, 1.3, 28, 300, 100, 1),
+    ('pieczarki', '["pieczar", "grzyb"]', 22, 3.1, 0.3, 3.3, 1, 5, 20, 500, 1),
+    ('fasola', '["fasol"]', 100, 7, 0.5, 17, 6, 250, NULL, 240, 1),
+    ('ciecierzyca', '["ciecierzyc", "hummus"]', 120, 7, 2.5, 18, 6, 250, NULL, 240, 1),
+    ('soczewica', '["soczewic"]', 350, 25, 1, 60, 11, 6, NULL, NULL, 0.85),
+    ('kukurydza', '["kukurydz"]', 80, 2.9, 1.2, 16, 2.4, 230, NULL, 250, 1),
+    ('groszek', '["groszek", "groszk", "groch"]', 80, 5, 0.4, 14, 5, 5, NULL, 400, 1),
+    ('awokado', '["awokado"]', 160, 2, 15, 9, 7, 7, 150, NULL, 1),
+    ('banan', '["banan"]', 89, 1.1, 0.3, 23, 2.6, 1, 120, NULL, 1),
+    ('jabłko', '["jablk", "jablek"]', 52, 0.3, 0.2, 14, 2.4, 1, 180, NULL, 1),
+    ('truskawki', '["truskaw"]', 32, 0.7, 0.3, 7.7, 2, 1, 15, NULL, 1),
+    ('borówki', '["borowk", "borowek", "jagod"]', 57, 0.7, 0.3, 14, 2.4, 1, NULL, 125, 1),
+    ('maliny', '["malin"]', 52, 1.2, 0.7, 12, 6.5, 1, NULL, 125, 1),
+    ('cytryna', '["cytryn", "limonk"]', 29, 1.1, 0.3, 9, 2.8, 2, 100, NULL, 1),
+    ('sok z cytryny', '["sok cytryn", "sok z cytryn", "sok limonk", "sok z limonk"]', 22, 0.4, 0.2, 7, 0.3, 1, NULL, NULL, 1),
+    ('miód', '["miod"]', 304, 0.3, 0, 82, 0.2, 4, NULL, NULL, 1.4),
+    ('cukier', '["cukr", "cukier"]', 400, 0, 0, 100, 0, 1, NULL, NULL, 0.85),
+    ('erytrytol', '["erytrytol", "ksylitol", "slodzik"]', 0, 0, 0, 100, 0, 0, NULL, NULL, 0.85),
+    ('orzechy', '["orzech", "nerkowc"]', 650, 15, 65, 14, 7, 2, NULL, NULL, 0.5),
+    ('migdały', '["migdal"]', 580, 21, 50, 22, 12, 1, NULL, NULL, 0.5),
+    ('nasiona chia', '["chia"]', 490, 17, 31, 42, 34, 16, NULL, NULL, 0.7),
+    ('siemię lniane', '["siemi", "len mielon"]', 530, 18, 42, 29, 27, 30, NULL, NULL, 0.6),
+    ('sezam', '["sezam"]', 570, 18, 50, 23, 12, 11, NULL, NULL, 0.6),
+    ('czekolada gorzka', '["czekolad"]', 550, 8, 40, 40, 11, 20, NULL, 100, 1),
+    ('kakao', '["kakao"]', 230, 20, 14, 12, 33, 20, NULL, NULL, 0.5),
+    ('odżywka białkowa', '["odzywk bialk", "bialk serwatk", "whey"]', 390, 78, 6, 7, 0, 200, NULL, NULL, 0.4),
+    ('tofu', '["tofu"]', 145, 15, 9, 2, 2, 10, NULL, 180, 1),
+    ('sos sojowy', '["sos sojow", "sosu sojow", "sosem sojow"]', 60, 8, 0, 6, 0.8, 5500, NULL, NULL, 1.1),
+    ('ketchup', '["ketchup"]', 110, 1.5, 0.2, 25, 0.5, 900, NULL, NULL, 1.1),
+    ('majonez', '["majonez"]', 700, 1, 77, 1, 0, 600, NULL, NULL, 0.95),
+    ('musztarda', '["musztard"]', 80, 5, 4, 6, 3, 1100, NULL, NULL, 1.05),
+    ('bulion', '["bulion", "wywar"]', 5, 0.5, 0.2, 0.3, 0, 350, NULL, NULL, 1),
+    ('sól', '["sol", "soli"]', 0, 0, 0, 0, 0, 38758, NULL, NULL, 1.2),
+    ('pieprz', '["pieprz"]', 250, 10, 3, 64, 25, 20, NULL, NULL, 0.5),
+    ('woda', '["wod"]', 0, 0, 0, 0, 0, 0, NULL, NULL, 1);
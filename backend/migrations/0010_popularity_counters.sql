@@ -0,0 +1,74 @@
+-- How often each recipe is favorited and planned, kept up to date by the
+-- triggers below, so "most loved" listings are an index scan instead of
+-- COUNT()s over favorites and meal_plans (see popularity.py).
+--
+-- popularity decays with time: every favorite/plan adds
+-- exp((its time - 2024-01-01) / 30 days), so an event weighs e times what
+-- one 30 days older does. The scale grows forever instead of old scores
+-- shrinking, so nothing has to be rewritten as time passes (good until
+-- around 2080, when exp() runs out of doubles).
+ALTER TABLE recipes ADD COLUMN favorite_count INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE recipes ADD COLUMN plan_count INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE recipes ADD COLUMN popularity REAL NOT NULL DEFAULT 0;
+
+UPDATE recipes SET
+    favorite_count = (SELECT COUNT(*) FROM favorites f WHERE f.recipe_id = recipes.id),
+    plan_count = (SELECT COUNT(*) FROM meal_plans m WHERE m.recipe_id = recipes.id),
+    popularity = COALESCE((
+        SELECT SUM(exp((COALESCE(unixepoch(f.created_at), unixepoch()) - 1704067200) / 2592000.0))
+        FROM favorites f WHERE f.recipe_id = recipes.id
+    ), 0) + COALESCE((
+        SELECT SUM(exp((COALESCE(unixepoch(m.date), unixepoch()) - 1704067200) / 2592000.0))
+        FROM meal_plans m WHERE m.recipe_id = recipes.id
+    ), 0);
+
+CREATE TRIGGER IF NOT EXISTS favorites_popularity_insert AFTER INSERT ON favorites
+BEGIN
+    UPDATE recipes SET favorite_count = favorite_count + 1,
+        popularity = popularity + exp((COALESCE(unixepoch(NEW.created_at), unixepoch()) - 1704067200) / 2592000.0)
+    WHERE id = NEW.recipe_id;
+END;
+CREATE TRIGGER IF NOT EXISTS favorites_popularity_delete AFTER DELETE ON favorites
+BEGIN
+    UPDATE recipes SET favorite_count = favorite_count - 1,
+        popularity = max(popularity - exp((COALESCE(unixepoch(OLD.created_at), unixepoch()) - 1704067200) / 2592000.0), 0)
+    WHERE id = OLD.recipe_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS meal_plans_popularity_insert AFTER INSERT ON meal_plans
+BEGIN
+    UPDATE recipes SET plan_count = plan_count + 1,
+        popularity = popularity + exp((COALESCE(unixepoch(NEW.date), unixepoch()) - 1704067200) / 2592000.0)
+    WHERE id = NEW.recipe_id;
+END;
+CREATE TRIGGER IF NOT EXISTS meal_plans_popularity_delete AFTER DELETE ON meal_plans
+BEGIN
+    UPDATE recipes SET plan_count = plan_count - 1,
+        popularity = max(popularity - exp((COALESCE(unixepoch(OLD.date), unixepoch()) - 1704067200) / 2592000.0), 0)
+    WHERE id = OLD.recipe_id;
+END;
+CREATE TRIGGER IF NOT EXISTS meal_plans_popularity_update AFTER UPDATE OF recipe_id, date ON meal_plans
+BEGIN
+    UPDATE recipes SET plan_count = plan_count - 1,
+        popularity = max(popularity - exp((COALESCE(unixepoch(OLD.date), unixepoch()) - 1704067200) / 2592000.0), 0)
+    WHERE id = OLD.recipe_id;
+    UPDATE recipes SET plan_count = plan_count + 1,
+        popularity = popularity + exp((COALESCE(unixepoch(NEW.date), unixepoch()) - 1704067200) / 2592000.0)
+    WHERE id = NEW.recipe_id;
+END;
+
+-- A favorite isn't a change to the recipe: counter-only updates don't move
+-- data_revision (no cache rebuilds) or put the recipe in the change log
+DROP TRIGGER IF EXISTS recipes_revision_update;
+CREATE TRIGGER recipes_revision_update AFTER UPDATE ON recipes
+WHEN (NEW.favorite_count, NEW.plan_count, NEW.popularity) IS (OLD.favorite_count, OLD.plan_count, OLD.popularity)
+BEGIN UPDATE data_revision SET revision = revision + 1; END;
+DROP TRIGGER IF EXISTS recipes_change_update;
+CREATE TRIGGER recipes_change_update AFTER UPDATE ON recipes
+WHEN (NEW.favorite_count, NEW.plan_count, NEW.popularity) IS (OLD.favorite_count, OLD.plan_count, OLD.popularity)
+BEGIN INSERT OR REPLACE INTO change_log (entity, entity_id, op) VALUES ('recipe', NEW.id, 'upsert'); END;
+
+-- sort=popular / favorites / plans (recipe_filters.py)
+CREATE INDEX IF NOT EXISTS idx_recipes_popularity ON recipes(popularity);
+CREATE INDEX IF NOT EXISTS idx_recipes_favorite_count ON recipes(favorite_count);
+CREATE INDEX IF NOT EXISTS idx_recipes_plan_count ON recipes(plan_count);
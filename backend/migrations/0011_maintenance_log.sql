@@ -0,0 +1,14 @@
+-- What maintenance.py did and what the database looked like before and
+-- after. `revision` is data_revision at the time: the writes since a step
+-- last ran decide when it runs again.
+CREATE TABLE IF NOT EXISTS maintenance_log (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    step TEXT NOT NULL,               -- analyze / incremental_vacuum / checkpoint / vacuum
+    revision INTEGER NOT NULL,
+    started_at REAL NOT NULL,         -- unix timestamp
+    seconds REAL NOT NULL,
+    detail TEXT,                      -- JSON: what the step did
+    before TEXT,                      -- JSON: stats() before the run
+    after TEXT                        -- JSON: and after
+);
+CREATE INDEX IF NOT EXISTS idx_maintenance_log_step ON maintenance_log(step, id);
@@ -0,0 +1,66 @@
+-- Weigh a meal plan by when it was made, not by its date (0010): a plan for
+-- 2090 outranked everything cooked this year, and its exp() overflowed to
+-- inf, so deleting it left popularity NULL (inf - inf) and failed NOT NULL.
+-- The exponent is also capped at 600 (around 2073): after that new events
+-- stop outweighing old ones, and sums still can't reach inf.
+ALTER TABLE meal_plans ADD COLUMN created_at TIMESTAMP;
+-- Existing plans: their date, or today for ones still ahead
+UPDATE meal_plans SET created_at = datetime(min(date, date('now')));
+
+-- ALTER TABLE can't give the column a CURRENT_TIMESTAMP default. The
+-- popularity triggers read the same time (one statement, one clock reading).
+CREATE TRIGGER IF NOT EXISTS meal_plans_created_at AFTER INSERT ON meal_plans
+WHEN NEW.created_at IS NULL
+BEGIN
+    UPDATE meal_plans SET created_at = CURRENT_TIMESTAMP WHERE id = NEW.id;
+END;
+
+DROP TRIGGER IF EXISTS favorites_popularity_insert;
+CREATE TRIGGER favorites_popularity_insert AFTER INSERT ON favorites
+BEGIN
+    UPDATE recipes SET favorite_count = favorite_count + 1,
+        popularity = popularity + exp(min((COALESCE(unixepoch(NEW.created_at), unixepoch()) - 1704067200) / 2592000.0, 600))
+    WHERE id = NEW.recipe_id;
+END;
+DROP TRIGGER IF EXISTS favorites_popularity_delete;
+CREATE TRIGGER favorites_popularity_delete AFTER DELETE ON favorites
+BEGIN
+    UPDATE recipes SET favorite_count = favorite_count - 1,
+        popularity = max(popularity - exp(min((COALESCE(unixepoch(OLD.created_at), unixepoch()) - 1704067200) / 2592000.0, 600)), 0)
+    WHERE id = OLD.recipe_id;
+END;
+
+DROP TRIGGER IF EXISTS meal_plans_popularity_insert;
+CREATE TRIGGER meal_plans_popularity_insert AFTER INSERT ON meal_plans
+BEGIN
+    UPDATE recipes SET plan_count = plan_count + 1,
+        popularity = popularity + exp(min((COALESCE(unixepoch(NEW.created_at), unixepoch()) - 1704067200) / 2592000.0, 600))
+    WHERE id = NEW.recipe_id;
+END;
+DROP TRIGGER IF EXISTS meal_plans_popularity_delete;
+CREATE TRIGGER meal_plans_popularity_delete AFTER DELETE ON meal_plans
+BEGIN
+    UPDATE recipes SET plan_count = plan_count - 1,
+        popularity = max(popularity - exp(min((COALESCE(unixepoch(OLD.created_at), unixepoch()) - 1704067200) / 2592000.0, 600)), 0)
+    WHERE id = OLD.recipe_id;
+END;
+-- Moving a plan to another day no longer changes its weight
+DROP TRIGGER IF EXISTS meal_plans_popularity_update;
+CREATE TRIGGER meal_plans_popularity_update AFTER UPDATE OF recipe_id ON meal_plans
+BEGIN
+    UPDATE recipes SET plan_count = plan_count - 1,
+        popularity = max(popularity - exp(min((COALESCE(unixepoch(OLD.created_at), unixepoch()) - 1704067200) / 2592000.0, 600)), 0)
+    WHERE id = OLD.recipe_id;
+    UPDATE recipes SET plan_count = plan_count + 1,
+        popularity = popularity + exp(min((COALESCE(unixepoch(NEW.created_at), unixepoch()) - 1704067200) / 2592000.0, 600))
+    WHERE id = NEW.recipe_id;
+END;
+
+-- Rescore with the new weights (popularity.rebuild)
+UPDATE recipes SET popularity = COALESCE((
+        SELECT SUM(exp(min((COALESCE(unixepoch(f.created_at), unixepoch()) - 1704067200) / 2592000.0, 600)))
+        FROM favorites f WHERE f.recipe_id = recipes.id
+    ), 0) + COALESCE((
+        SELECT SUM(exp(min((COALESCE(unixepoch(m.created_at), unixepoch()) - 1704067200) / 2592000.0, 600)))
+        FROM meal_plans m WHERE m.recipe_id = recipes.id
+    ), 0);
@@ -0,0 +1,285 @@
+"""
+Recipe nutrition estimated from the ingredient list.
+
+nutrition_foods (migrations/0009) has per-100 g values for common
+ingredients and the word stems their names are matched by: every stem of one
+of a food's keywords has to start a word of the folded ingredient name, and
+the longest keyword wins. So "mięsa z piersi kurczaka" is "piers kurczak"
+and "oliwy z oliwek" olive oil rather than olives.
+
+An ingredient weighs what the "85 g" hint parse_ingredient leaves in notes
+says, or amount x grams per unit: UNIT_GRAMS, ml-based units through the
+food's density, 'szt' and 'opakowanie' from the food. Ingredients that don't
+match, or whose unit has no weight, are left out of the sums.
+
+Recipes whose nutrition came with them keep it. Only recipes without any
+(all zeros) or computed before (nutrition_source = 'ingredients') are
+recomputed: on each write through recipe_store, and for the whole library
+with `python nutrition.py` or the recompute_nutrition job (recompute_all:
+CHUNK_SIZE recipes per short write transaction, so API writes get the lock
+in between). Matching runs in Python once per distinct name; the sums are
+one set-based UPDATE.
+
+Usage:
+    python nutrition.py                  # recompute every eligible recipe
+    python nutrition.py --unmatched 30   # and list the commonest unmatched names
+"""
+
+import json
+import re
+import sys
+import time
+
+from database import get_db_connection, write_transaction
+from folding import fold
+
+# nutrition_foods column (per 100 g) -> recipes column (per serving)
+NUTRIENTS = {
+    'calories': 'calories_per_serving',
+    'protein': 'protein_per_serving',
+    'fat': 'fat_per_serving',
+    'carbs': 'carbs_per_serving',
+    'sodium': 'sodium_per_serving',
+    'fiber': 'fiber_per_serving',
+}
+
+# Units parse_ingredient emits (plus common spellings of manual entries)
+UNIT_GRAMS = {'g': 1, 'dag': 10, 'kg': 1000, 'szczypta': 0.5, 'ząbek': 5, 'plaster': 15, 'łodyga': 40}
+UNIT_ML = {'ml': 1, 'l': 1000, 'łyżka': 15, 'łyżeczka': 5}
+UNIT_ALIASES = {
+    'gram': 'g', 'gramów': 'g', 'łyżki': 'łyżka', 'łyżek': 'łyżka',
+    'łyżeczki': 'łyżeczka', 'łyżeczek': 'łyżeczka', 'sztuka': 'szt', 'sztuki': 'szt',
+    'sztuk': 'szt', 'szt.': 'szt', 'tbsp': 'łyżka', 'tsp': 'łyżeczka',
+}
+
+# Recipes this module may overwrite
+ELIGIBLE = (
+    "(nutrition_source = 'ingredients' OR ("
+    + ' AND '.join(f'COALESCE({column}, 0) = 0' for column in NUTRIENTS.values())
+    + '))'
+)
+
+# recompute_all: recipes per transaction (about 0.1 s each) and the pause between
+CHUNK_SIZE = 1000
+CHUNK_PAUSE = 0.01
+
+WORD = re.compile(r'\w+')
+PREFIX = 3
+# The weight hint parse_ingredient leaves in notes ("85 g"), and nothing else:
+# not "1 kg" or "2 opakowania po 500g"
+WEIGHT_HINT = re.compile(r'^(\d+(?:,\d+)?)\s*g$')
+
+
+def load_foods(conn):
+    """nutrition_foods rows as dicts, with `phrases`: the keywords as stem lists."""
+    foods = []
+    for row in conn.execute('SELECT * FROM nutrition_foods ORDER BY id'):
+        food = dict(row)
+        food['phrases'] = [fold(keyword).split() for keyword in json.loads(food['keywords'])]
+        foods.append(food)
+    return foods
+
+
+class FoodMatcher:
+    """Matches ingredient names to nutrition_foods ids."""
+
+    def __init__(self, foods):
+        # (length, food id, stems) by the start of their longest stem, so a
+        # name is only checked against keywords one of its words could match
+        self.phrases = {}
+        for food in foods:
+            for stems in food['phrases']:
+                phrase = (sum(map(len, stems)), food['id'], tuple(stems))
+                self.phrases.setdefault(max(stems, key=len)[:PREFIX], []).append(phrase)
+
+    def match(self, name):
+        words = WORD.findall(fold(name) or '')
+        candidates = {
+            phrase
+            for word in words for n in range(1, PREFIX + 1)
+            for phrase in self.phrases.get(word[:n], ())
+        }
+        # The longest keyword wins, the lower id on a tie
+        for _, food_id, stems in sorted(candidates, key=lambda phrase: (-phrase[0], phrase[1])):
+            if all(any(word.startswith(stem) for word in words) for stem in stems):
+                return food_id
+        return None
+
+
+def normalize_unit(unit):
+    unit = (unit or '').strip().lower()
+    return UNIT_ALIASES.get(unit, unit)
+
+
+def unit_grams(food, unit):
+    """Grams in one `unit` of `food`, or None when the unit has no known weight."""
+    unit = normalize_unit(unit)
+    if unit in UNIT_GRAMS:
+        return UNIT_GRAMS[unit]
+    if unit in UNIT_ML:
+        return UNIT_ML[unit] * food['density']
+    if unit in ('szt', ''):
+        return food['piece_grams']
+    if unit == 'opakowanie':
+        return food['package_grams']
+    return None
+
+
+def load_targets(cursor, recipe_ids=None, id_range=None):
+    """
+    temp.nutrition_targets = the eligible recipes among `recipe_ids`, or with
+    ids in `id_range` (first, last), or else all of them.
+    """
+    cursor.execute('CREATE TEMP TABLE IF NOT EXISTS nutrition_targets (id INTEGER PRIMARY KEY)')
+    cursor.execute('DELETE FROM temp.nutrition_targets')
+    if id_range is not None:
+        cursor.execute(f'INSERT INTO temp.nutrition_targets SELECT id FROM recipes '
+                       f'WHERE id BETWEEN ? AND ? AND {ELIGIBLE}', id_range)
+    elif recipe_ids is None:
+        cursor.execute(f'INSERT INTO temp.nutrition_targets SELECT id FROM recipes WHERE {ELIGIBLE}')
+    else:
+        cursor.execute(
+            f'INSERT INTO temp.nutrition_targets SELECT id FROM recipes '
+            f'WHERE id IN (SELECT value FROM json_each(?)) AND {ELIGIBLE}',
+            (json.dumps(list(recipe_ids)),)
+        )
+
+
+def weight_hint(notes):
+    """Grams in a parse_ingredient weight hint, or None."""
+    match = WEIGHT_HINT.match((notes or '').strip())
+    return float(match.group(1).replace(',', '.')) if match else None
+
+
+def load_matches(cursor, foods):
+    """
+    Match the targets' ingredient names into temp.nutrition_matches (name ->
+    food), temp.nutrition_units (food, unit as stored -> grams) and
+    temp.nutrition_hints (notes -> grams, for weight hints).
+    """
+    matcher = FoodMatcher(foods)
+    by_id = {food['id']: food for food in foods}
+    rows = cursor.execute('''
+        SELECT DISTINCT i.name, COALESCE(i.unit, '')
+        FROM temp.nutrition_targets t CROSS JOIN ingredients i ON i.recipe_id = t.id
+    ''').fetchall()
+
+    matches = {}
+    units = {}
+    for name, unit in rows:
+        if name not in matches:
+            matches[name] = matcher.match(name)
+        food_id = matches[name]
+        if food_id is not None and (food_id, unit) not in units:
+            units[food_id, unit] = unit_grams(by_id[food_id], unit)
+
+    cursor.execute('CREATE TEMP TABLE IF NOT EXISTS nutrition_matches (name TEXT PRIMARY KEY, food_id INTEGER)')
+    cursor.execute('''
+        CREATE TEMP TABLE IF NOT EXISTS nutrition_units (
+            food_id INTEGER, unit TEXT, grams REAL, PRIMARY KEY (food_id, unit)
+        )
+    ''')
+    cursor.execute('DELETE FROM temp.nutrition_matches')
+    cursor.execute('DELETE FROM temp.nutrition_units')
+    cursor.executemany('INSERT INTO temp.nutrition_matches VALUES (?, ?)',
+                       ((name, food_id) for name, food_id in matches.items() if food_id is not None))
+    cursor.executemany('INSERT INTO temp.nutrition_units VALUES (?, ?, ?)',
+                       ((food_id, unit, grams) for (food_id, unit), grams in units.items()))
+
+    notes = cursor.execute('''
+        SELECT DISTINCT i.notes
+        FROM temp.nutrition_targets t CROSS JOIN ingredients i ON i.recipe_id = t.id
+        WHERE i.notes IS NOT NULL
+    ''').fetchall()
+    cursor.execute('CREATE TEMP TABLE IF NOT EXISTS nutrition_hints (notes TEXT PRIMARY KEY, grams REAL)')
+    cursor.execute('DELETE FROM temp.nutrition_hints')
+    cursor.executemany('INSERT INTO temp.nutrition_hints VALUES (?, ?)',
+                       ((note, grams) for (note,) in notes if (grams := weight_hint(note)) is not None))
+
+
+def recompute(cursor, recipe_ids=None, foods=None, id_range=None):
+    """
+    Recompute the per-serving nutrition of the eligible recipes among
+    `recipe_ids` or in `id_range` (neither: the whole library, in one
+    statement; recompute_all for the live database). Returns how many rows
+    changed.
+    """
+    load_targets(cursor, recipe_ids, id_range)
+    load_matches(cursor, foods if foods is not None else load_foods(cursor))
+
+    grams = 'COALESCE(h.grams, i.amount * u.grams)'
+    totals = ', '.join(f'SUM(({grams}) * f.{food}) / 100 AS {food}' for food in NUTRIENTS)
+    per_serving = {
+        column: f'ROUND(COALESCE(s.{food}, 0) / MAX(COALESCE(recipes.servings, 1), 1), 1)'
+        for food, column in NUTRIENTS.items()
+    }
+    assignments = ', '.join(f'{column} = {value}' for column, value in per_serving.items())
+    # Grouped by the targets' rowid, which they're scanned in, so no sort.
+    # Rows whose numbers don't move aren't written (no change_log churn).
+    cursor.execute(f'''
+        UPDATE recipes SET {assignments}, nutrition_source = 'ingredients'
+        FROM (
+            SELECT t.id, {totals}
+            FROM temp.nutrition_targets t
+            LEFT JOIN ingredients i ON i.recipe_id = t.id
+            LEFT JOIN temp.nutrition_matches m ON m.name = i.name
+            LEFT JOIN temp.nutrition_units u ON u.food_id = m.food_id AND u.unit = COALESCE(i.unit, '')
+            LEFT JOIN temp.nutrition_hints h ON h.notes = i.notes
+            LEFT JOIN nutrition_foods f ON f.id = m.food_id
+            GROUP BY t.id
+        ) s
+        WHERE s.id = recipes.id
+          AND (nutrition_source IS NOT 'ingredients'
+               OR ({', '.join(per_serving)}) IS NOT ({', '.join(per_serving.values())}))
+    ''')
+    return cursor.rowcount
+
+
+def recompute_all(progress=None):
+    """
+    Recompute the whole library by id range, each chunk in its own write
+    transaction. Returns how many rows changed.
+    """
+    conn = get_db_connection()
+    first, last = conn.execute('SELECT MIN(id), MAX(id) FROM recipes').fetchone()
+    foods = load_foods(conn)
+    conn.close()
+    if first is None:
+        return 0
+
+    changed = 0
+    for start in range(first, last + 1, CHUNK_SIZE):
+        end = min(start + CHUNK_SIZE - 1, last)
+        with write_transaction() as conn:
+            changed += recompute(conn.cursor(), foods=foods, id_range=(start, end))
+        if progress:
+            progress((end - first + 1) / (last - first + 1), f'{end - first + 1}/{last - first + 1} ids')
+        time.sleep(CHUNK_PAUSE)
+    return changed
+
+
+def unmatched_names(conn, limit=20, foods=None):
+    """[(name, uses)] of the commonest ingredient names no food matches."""
+    matcher = FoodMatcher(foods if foods is not None else load_foods(conn))
+    rows = conn.execute('SELECT name, COUNT(*) AS uses FROM ingredients GROUP BY name ORDER BY uses DESC')
+    unmatched = []
+    for name, uses in rows:
+        if matcher.match(name) is None:
+            unmatched.append((name, uses))
+            if len(unmatched) == limit:
+                break
+    return unmatched
+
+
+if __name__ == '__main__':
+    started = time.perf_counter()
+    changed = recompute_all()
+    print(f'Recomputed nutrition of {changed} recipes in {time.perf_counter() - started:.2f} s')
+
+    if '--unmatched' in sys.argv:
+        index = sys.argv.index('--unmatched')
+        limit = int(sys.argv[index + 1]) if len(sys.argv) > index + 1 else 20
+        conn = get_db_connection()
+        for name, uses in unmatched_names(conn, limit):
+            print(f'{uses:6d}  {name}')
+        conn.close()
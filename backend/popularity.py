@@ -0,0 +1,51 @@
+"""
+Popularity counters on recipes: favorite_count, plan_count and the
+time-decayed popularity score behind ?sort=popular (migrations/0010, 0012).
+A plan counts from when it was made, not from its date.
+
+Triggers on favorites and meal_plans keep them current. rebuild() recounts
+everything from scratch, for when they drift: floating point sums after
+many adds and removes, or rows written with the triggers missing (an old
+backup restored, a manual fix in the sqlite shell).
+
+Usage:
+    python popularity.py     # recount, print how many recipes were off
+"""
+
+# exp(min((time - EPOCH) / DECAY_SECONDS, MAX_EXPONENT)) per favorite or
+# plan, like the triggers
+EPOCH = 1704067200          # 2024-01-01
+DECAY_SECONDS = 30 * 86400
+MAX_EXPONENT = 600          # around 2073, far below where exp() overflows
+
+
+def weight(time_column):
+    exponent = f'(COALESCE(unixepoch({time_column}), unixepoch()) - {EPOCH}) / {float(DECAY_SECONDS)}'
+    return f'exp(min({exponent}, {MAX_EXPONENT}))'
+
+
+def rebuild(cursor):
+    """Recount favorite_count, plan_count and popularity. Returns how many recipes changed."""
+    cursor.execute(f'''
+        UPDATE recipes SET favorite_count = c.favorites, plan_count = c.plans, popularity = c.score
+        FROM (
+            SELECT r.id, COALESCE(f.n, 0) AS favorites, COALESCE(p.n, 0) AS plans,
+                   COALESCE(f.score, 0) + COALESCE(p.score, 0) AS score
+            FROM recipes r
+            LEFT JOIN (SELECT recipe_id, COUNT(*) AS n, SUM({weight('created_at')}) AS score
+                       FROM favorites GROUP BY recipe_id) f ON f.recipe_id = r.id
+            LEFT JOIN (SELECT recipe_id, COUNT(*) AS n, SUM({weight('created_at')}) AS score
+                       FROM meal_plans GROUP BY recipe_id) p ON p.recipe_id = r.id
+        ) c
+        WHERE c.id = recipes.id
+          AND (recipes.favorite_count != c.favorites OR recipes.plan_count != c.plans
+               OR abs(recipes.popularity - c.score) > 1e-9 * c.score)
+    ''')
+    return cursor.rowcount
+
+
+if __name__ == '__main__':
+    from database import write_transaction
+
+    with write_transaction() as conn:
+        print(f'Repaired popularity counters of {rebuild(conn.cursor())} recipes')
@@ -0,0 +1,211 @@
+"""
+On-demand profiling of single API requests, for admins.
+
+With PROFILING=1 an admin (see ADMIN_USERS in routes/auth.py) can add
+`X-Profile: cprofile` (or `?profile=cprofile`) to any request:
+
+    cprofile  deterministic, cProfile -> <id>.pstats (snakeviz, pstats)
+    sample    a thread samples the request's stack every PROFILE_INTERVAL
+              seconds -> <id>.collapsed, one "a;b;c count" line per stack
+              (flamegraph.pl, speedscope)
+
+Next to it <id>.json has the request, its timing and every SQL statement it
+ran (with its offset from the start). The response says where it went in
+an X-Profile-Id header; /api/admin/profiles lists and serves the files.
+
+Without PROFILING=1 none of the hooks are installed, so normal requests pay
+nothing. Streamed responses are only profiled up to the start of the body.
+"""
+
+import cProfile
+import json
+import os
+import secrets
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+from flask import g, request
+from flask_login import current_user
+
+import database
+from routes.auth import is_admin
+
+PROFILE_DIR = os.environ.get(
+    'PROFILE_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'profiles'),
+)
+PROFILE_INTERVAL = 0.001
+PROFILE_KEEP = 50
+PROFILE_MODES = ('cprofile', 'sample')
+
+# Profiler files by kind, for the admin download endpoint
+PROFILE_FILES = {
+    'pstats': ('.pstats', 'application/octet-stream'),
+    'collapsed': ('.collapsed', 'text/plain'),
+    'json': ('.json', 'application/json'),
+}
+
+# One profiled request at a time per process (profilers are process-wide
+# from Python 3.12 on)
+_busy = threading.Lock()
+
+
+class Sampler:
+    """Samples one thread's Python stack from a background thread."""
+
+    def __init__(self, thread_id, interval=PROFILE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})')
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def collapsed(self):
+        return ''.join(f'{stack} {count}\n' for stack, count in self.stacks.most_common())
+
+
+def requested_mode():
+    mode = request.headers.get('X-Profile') or request.args.get('profile')
+    if not mode:
+        return None
+    mode = mode.lower()
+    return 'cprofile' if mode in ('1', 'true') else mode
+
+
+def start_profile():
+    mode = requested_mode()
+    if mode not in PROFILE_MODES:
+        return
+    if not is_admin(current_user) or not _busy.acquire(blocking=False):
+        return
+
+    sql = []
+    started = time.perf_counter()
+    g.profile = {
+        'mode': mode,
+        'started': started,
+        'sql': sql,
+        'sql_token': database.SQL_TRACE.set(
+            lambda statement: sql.append({'at_ms': round((time.perf_counter() - started) * 1000, 3),
+                                          'sql': statement})
+        ),
+    }
+    if mode == 'sample':
+        g.profile['profiler'] = Sampler(threading.get_ident())
+        g.profile['profiler'].start()
+    else:
+        g.profile['profiler'] = cProfile.Profile()
+        g.profile['profiler'].enable()
+
+
+def stop_profile(profile):
+    profiler = profile.pop('profiler')
+    if profile['mode'] == 'sample':
+        profiler.stop()
+    else:
+        profiler.disable()
+    database.SQL_TRACE.reset(profile.pop('sql_token'))
+    _busy.release()
+    return profiler
+
+
+def finish_profile(response):
+    profile = g.pop('profile', None)
+    if profile is None:
+        return response
+
+    duration_ms = (time.perf_counter() - profile['started']) * 1000
+    profiler = stop_profile(profile)
+
+    # Sorts by time, so the newest are easy to find and to keep
+    profile_id = f"{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}-{secrets.token_hex(2)}"
+    base = os.path.join(PROFILE_DIR, profile_id)
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    if profile['mode'] == 'sample':
+        with open(base + '.collapsed', 'w') as f:
+            f.write(profiler.collapsed())
+    else:
+        profiler.dump_stats(base + '.pstats')
+    with open(base + '.json', 'w') as f:
+        json.dump({
+            'id': profile_id,
+            'mode': profile['mode'],
+            'method': request.method,
+            'path': request.full_path.rstrip('?'),
+            'status': response.status_code,
+            'duration_ms': round(duration_ms, 3),
+            'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'sql': profile['sql'],
+        }, f, ensure_ascii=False, indent=1)
+
+    prune_profiles()
+    response.headers['X-Profile-Id'] = profile_id
+    return response
+
+
+def abandon_profile(error=None):
+    """Stop a profile whose request never reached after_request."""
+    profile = g.pop('profile', None)
+    if profile is not None:
+        stop_profile(profile)
+
+
+def list_profiles():
+    """Stored profiles, newest first (without their SQL traces)."""
+    if not os.path.isdir(PROFILE_DIR):
+        return []
+    profiles = []
+    for name in sorted(os.listdir(PROFILE_DIR), reverse=True):
+        if not name.endswith('.json'):
+            continue
+        with open(os.path.join(PROFILE_DIR, name)) as f:
+            meta = json.load(f)
+        meta['sql_statements'] = len(meta.pop('sql'))
+        meta['files'] = [
+            kind for kind, (ext, _) in PROFILE_FILES.items()
+            if os.path.exists(os.path.join(PROFILE_DIR, meta['id'] + ext))
+        ]
+        profiles.append(meta)
+    return profiles
+
+
+def prune_profiles(keep=PROFILE_KEEP):
+    """Delete all but the newest `keep` profiles."""
+    ids = sorted(
+        (name[:-len('.json')] for name in os.listdir(PROFILE_DIR) if name.endswith('.json')),
+        reverse=True,
+    )
+    for profile_id in ids[keep:]:
+        for ext, _ in PROFILE_FILES.values():
+            path = os.path.join(PROFILE_DIR, profile_id + ext)
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def init_profiling(app):
+    if not app.config.get('PROFILING'):
+        return
+    app.before_request(start_profile)
+    app.after_request(finish_profile)
+    app.teardown_request(abandon_profile)
@@ -0,0 +1,104 @@
+"""
+Range filters and sorting for recipe listings (/api/recipes).
+
+    ?calories_max=500&protein_min=30&prep_time_max=20
+    ?sort=-protein_per_kcal,calories      (a leading "-" sorts descending)
+    ?sort=popular                         (a preset, see SORT_PRESETS)
+
+Only the names below are accepted, so user input never reaches the SQL text.
+The numeric filters and sort keys have indexes (migrations/0007), the ratios
+on the very same expressions so SQLite can use them.
+"""
+
+# filter name -> column, used as <name>_min / <name>_max
+RANGE_FILTERS = {
+    'calories': 'r.calories_per_serving',
+    'protein': 'r.protein_per_serving',
+    'fat': 'r.fat_per_serving',
+    'carbs': 'r.carbs_per_serving',
+    'sodium': 'r.sodium_per_serving',
+    'fiber': 'r.fiber_per_serving',
+    'prep_time': 'r.prep_time_minutes',
+    'total_time': 'r.total_time_minutes',
+}
+
+# Grams of a macro per kcal; NULL for recipes without calories
+RATIOS = {
+    'protein_per_kcal': 'r.protein_per_serving / NULLIF(r.calories_per_serving, 0)',
+    'fiber_per_kcal': 'r.fiber_per_serving / NULLIF(r.calories_per_serving, 0)',
+}
+
+SORT_KEYS = {
+    'id': 'r.id',
+    'name': 'r.name',
+    'rating': 'r.rating',
+    # Counters kept by triggers (migrations/0010, popularity.py)
+    'popularity': 'r.popularity',
+    'favorites': 'r.favorite_count',
+    'plans': 'r.plan_count',
+    **RANGE_FILTERS,
+    **RATIOS,
+}
+
+# Whole sort args that stand for another one
+SORT_PRESETS = {
+    'popular': '-popularity',
+}
+
+MAX_SORT_KEYS = 3
+
+
+def parse_ranges(args):
+    """[(filter name, '>=' or '<=', value)] for the <name>_min/_max args. Raises ValueError."""
+    ranges = []
+    for name in RANGE_FILTERS:
+        for suffix, operator in (('_min', '>='), ('_max', '<=')):
+            raw = args.get(name + suffix)
+            if raw is None or raw == '':
+                continue
+            try:
+                value = float(raw)
+            except ValueError:
+                raise ValueError(f'{name}{suffix} must be a number')
+            ranges.append((name, operator, value))
+    return ranges
+
+
+def range_conditions(args):
+    """SQL conditions and params for the <name>_min/_max args. Raises ValueError."""
+    ranges = parse_ranges(args)
+    conditions = [f'{RANGE_FILTERS[name]} {operator} ?' for name, operator, _ in ranges]
+    return conditions, [value for _, _, value in ranges]
+
+
+def parse_sort(sort):
+    """
+    [(key, descending)] for a sort arg like "-protein_per_kcal,calories",
+    ending with id so pages don't overlap; None without one. Raises ValueError.
+    """
+    if not sort:
+        return None
+
+    sort = SORT_PRESETS.get(sort.strip(), sort)
+    keys = [key.strip() for key in sort.split(',') if key.strip()]
+    if len(keys) > MAX_SORT_KEYS:
+        raise ValueError(f'At most {MAX_SORT_KEYS} sort keys')
+
+    parsed = []
+    for key in keys:
+        name = key.lstrip('-')
+        if name not in SORT_KEYS:
+            raise ValueError(f'Unknown sort key: {name} (valid: {", ".join(sorted(SORT_KEYS))})')
+        parsed.append((name, key.startswith('-')))
+
+    if not any(name == 'id' for name, _ in parsed):
+        parsed.append(('id', True))
+    return parsed
+
+
+def order_clause(sort, default='r.id DESC'):
+    """ORDER BY clause for a sort arg (see parse_sort). Raises ValueError."""
+    keys = parse_sort(sort)
+    if keys is None:
+        return default
+    return ', '.join(f"{SORT_KEYS[name]} {'DESC' if descending else 'ASC'}" for name, descending in keys)
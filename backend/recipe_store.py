@@ -0,0 +1,347 @@
+"""
+Shared write helpers for recipes and their child rows (ingredients, recipe_categories).
+
+The routes and the bulk endpoint both go through these, so a single recipe and
+a batch of 500 are written the same way: one INSERT/UPDATE per recipe row and
+one executemany per child table for the whole batch.
+"""
+
+import json
+
+import nutrition
+from serializers import JSON_COLUMNS, decode_json_column
+
+VALID_CATEGORIES = ['breakfast', 'lunch', 'dinner', 'snack']
+
+# Columns written on create, in INSERT order. Not nutrition_source: only
+# nutrition.recompute (and a dedup merge clearing it) may set that
+CREATE_COLUMNS = [
+    'name', 'description', 'category', 'image_url', 'source_url', 'source',
+    'difficulty', 'prep_time_minutes', 'total_time_minutes', 'servings',
+    'instructions', 'notes', 'tags',
+    'calories_per_serving', 'protein_per_serving', 'fat_per_serving',
+    'carbs_per_serving', 'sodium_per_serving', 'fiber_per_serving',
+    'rating', 'rating_count',
+]
+
+# Columns a PUT rewrites (source and rating stay as imported)
+UPDATE_COLUMNS = [
+    'name', 'description', 'category', 'image_url', 'source_url',
+    'difficulty', 'prep_time_minutes', 'total_time_minutes', 'servings',
+    'instructions', 'notes', 'tags',
+    'calories_per_serving', 'protein_per_serving', 'fat_per_serving',
+    'carbs_per_serving', 'sodium_per_serving', 'fiber_per_serving',
+]
+
+INGREDIENT_FIELDS = ['amount', 'unit', 'notes', 'original_text']
+
+DEFAULTS = {
+    'source': 'manual',
+    'servings': 1,
+    'calories_per_serving': 0,
+    'protein_per_serving': 0,
+    'fat_per_serving': 0,
+    'carbs_per_serving': 0,
+    'sodium_per_serving': 0,
+    'fiber_per_serving': 0,
+    'rating_count': 0,
+}
+
+
+def validate_recipe(data, partial=False):
+    """
+    Return an error message for an invalid recipe document, or None.
+    With partial=True (PATCH) every field is optional, but present ones must be valid,
+    and ingredient ids are converted to ints in place.
+    """
+    if not isinstance(data, dict):
+        return 'Recipe must be a JSON object'
+    if not data.get('name') and (not partial or 'name' in data):
+        return 'Missing required field: name'
+    if data.get('category') and data['category'] not in VALID_CATEGORIES:
+        return 'Invalid category'
+    for column in CREATE_COLUMNS:
+        if column not in JSON_COLUMNS and isinstance(data.get(column), (dict, list)):
+            return f'{column} must be a single value'
+    if not isinstance(data.get('ingredients', []), list):
+        return 'ingredients must be a list'
+    for ing in data.get('ingredients', []):
+        if not isinstance(ing, dict):
+            return 'Each ingredient must be an object'
+        if not isinstance(ing.get('name'), str) or not ing['name'].strip():
+            return 'Each ingredient needs a name'
+        for field in INGREDIENT_FIELDS:
+            if isinstance(ing.get(field), (dict, list)):
+                return f'Ingredient {field} must be a single value'
+        if partial and ing.get('id') is not None:
+            # PATCH matches ingredients by id; accept "12" but store it as 12
+            if isinstance(ing['id'], bool) or not isinstance(ing['id'], (int, str)):
+                return 'Ingredient id must be an integer'
+            try:
+                ing['id'] = int(ing['id'])
+            except ValueError:
+                return 'Ingredient id must be an integer'
+    if not isinstance(data.get('recipe_categories', []), list):
+        return 'recipe_categories must be a list'
+    for cat in data.get('recipe_categories', []):
+        if not isinstance(cat, str):
+            return 'recipe_categories must be strings'
+    return None
+
+
+def column_value(data, column):
+    """Value to store for `column`, with defaults and JSON columns encoded."""
+    if column in JSON_COLUMNS:
+        return json.dumps(data.get(column) or [], ensure_ascii=False)
+    if column == 'category':
+        return data.get('category') or None
+    return data.get(column, DEFAULTS.get(column))
+
+
+def ingredient_row(recipe_id, ing):
+    return (
+        recipe_id,
+        ing.get('name', ''),
+        ing.get('amount', 0),
+        ing.get('unit', ''),
+        ing.get('notes'),
+        ing.get('original_text'),
+    )
+
+
+def insert_children(cursor, items):
+    """Insert ingredients and recipe_categories for (recipe_id, data) pairs."""
+    cursor.executemany('''
+        INSERT INTO ingredients (recipe_id, name, amount, unit, notes, original_text)
+        VALUES (?, ?, ?, ?, ?, ?)
+    ''', (
+        ingredient_row(recipe_id, ing)
+        for recipe_id, data in items
+        for ing in data.get('ingredients', [])
+    ))
+    cursor.executemany(
+        'INSERT INTO recipe_categories (recipe_id, category_name) VALUES (?, ?)',
+        (
+            (recipe_id, cat)
+            for recipe_id, data in items
+            for cat in data.get('recipe_categories', [])
+        )
+    )
+
+
+def insert_recipes(cursor, documents):
+    """Insert recipe documents with their child rows. Returns the new ids."""
+    columns = ', '.join(CREATE_COLUMNS)
+    placeholders = ','.join('?' * len(CREATE_COLUMNS))
+    sql = f'INSERT INTO recipes ({columns}) VALUES ({placeholders})'
+
+    ids = []
+    for data in documents:
+        cursor.execute(sql, [column_value(data, c) for c in CREATE_COLUMNS])
+        ids.append(cursor.lastrowid)
+
+    insert_children(cursor, list(zip(ids, documents)))
+    nutrition.recompute(cursor, ids)
+    return ids
+
+
+def update_recipes(cursor, items):
+    """Rewrite recipes from (recipe_id, data) pairs, replacing all child rows."""
+    assignments = ', '.join(f'{c} = ?' for c in UPDATE_COLUMNS)
+    nutrition_columns = list(nutrition.NUTRIENTS.values())
+    # Computed nutrition sent back unchanged stays computed; other values were typed in
+    keep_source = (f"nutrition_source = CASE WHEN ({', '.join(nutrition_columns)}) "
+                   f"IS ({', '.join('?' * len(nutrition_columns))}) THEN nutrition_source END")
+    cursor.executemany(
+        f'UPDATE recipes SET {assignments}, {keep_source} WHERE id = ?',
+        ([column_value(data, c) for c in UPDATE_COLUMNS]
+         + [column_value(data, c) for c in nutrition_columns] + [recipe_id]
+         for recipe_id, data in items)
+    )
+
+    load_temp_ids(cursor, [recipe_id for recipe_id, _ in items])
+    cursor.execute('DELETE FROM ingredients WHERE recipe_id IN (SELECT id FROM temp.bulk_ids)')
+    cursor.execute('DELETE FROM recipe_categories WHERE recipe_id IN (SELECT id FROM temp.bulk_ids)')
+    insert_children(cursor, items)
+    nutrition.recompute(cursor, [recipe_id for recipe_id, _ in items])
+
+
+def load_temp_ids(cursor, ids):
+    """
+    Fill temp.bulk_ids with `ids`, so statements can use
+    `IN (SELECT id FROM temp.bulk_ids)` instead of one placeholder per id
+    (SQLite caps the number of host parameters per statement).
+    """
+    cursor.execute('CREATE TEMP TABLE IF NOT EXISTS bulk_ids (id INTEGER PRIMARY KEY)')
+    cursor.execute('DELETE FROM temp.bulk_ids')
+    cursor.executemany(
+        'INSERT OR IGNORE INTO temp.bulk_ids (id) VALUES (?)',
+        ((i,) for i in ids)
+    )
+
+
+def existing_ids(cursor, ids):
+    """Return the subset of `ids` that exist in recipes."""
+    load_temp_ids(cursor, ids)
+    rows = cursor.execute(
+        'SELECT r.id FROM recipes r JOIN temp.bulk_ids b ON b.id = r.id'
+    ).fetchall()
+    return {row[0] for row in rows}
+
+
+def delete_recipes(cursor, ids):
+    """Delete recipes (and their child rows) by id. Returns the number deleted."""
+    load_temp_ids(cursor, ids)
+    cursor.execute('DELETE FROM recipe_categories WHERE recipe_id IN (SELECT id FROM temp.bulk_ids)')
+    cursor.execute('DELETE FROM ingredients WHERE recipe_id IN (SELECT id FROM temp.bulk_ids)')
+    cursor.execute('DELETE FROM recipes WHERE id IN (SELECT id FROM temp.bulk_ids)')
+    return cursor.rowcount
+
+
+def patch_recipe(cursor, recipe_id, data):
+    """
+    Apply a partial recipe document, writing only what actually changed.
+
+    Scalar fields are compared with the stored row and only differing columns
+    are updated. `ingredients` and `recipe_categories`, when present, are the
+    full desired lists: ingredients are matched by id first, then by content,
+    and only the needed inserts/updates/deletes run. Categories are a set diff.
+
+    Returns a dict describing the changes, or None if the recipe doesn't exist.
+    Raises ValueError for ingredient ids that belong to another recipe.
+    """
+    current = cursor.execute('SELECT * FROM recipes WHERE id = ?', (recipe_id,)).fetchone()
+    if current is None:
+        return None
+
+    changed = {}
+
+    new_values = {
+        column: column_value(data, column)
+        for column in UPDATE_COLUMNS
+        if column in data
+    }
+    fields = [
+        column for column, value in new_values.items()
+        if not same_value(current[column], value, column)
+    ]
+    if fields:
+        assignments = ', '.join(f'{c} = ?' for c in fields)
+        if set(fields) & set(nutrition.NUTRIENTS.values()):
+            assignments += ', nutrition_source = NULL'
+        cursor.execute(
+            f'UPDATE recipes SET {assignments} WHERE id = ?',
+            [new_values[c] for c in fields] + [recipe_id]
+        )
+        changed['fields'] = fields
+
+    if 'ingredients' in data:
+        ingredient_changes = diff_ingredients(cursor, recipe_id, data['ingredients'])
+        if ingredient_changes:
+            changed['ingredients'] = ingredient_changes
+
+    if 'recipe_categories' in data:
+        category_changes = diff_categories(cursor, recipe_id, data['recipe_categories'])
+        if category_changes:
+            changed['recipe_categories'] = category_changes
+
+    if changed:
+        nutrition.recompute(cursor, [recipe_id])
+    return changed
+
+
+def same_value(stored, new, column):
+    if column in JSON_COLUMNS:
+        # Compare decoded: older rows were written with ensure_ascii=True,
+        # and legacy rows hold plain text instead of a JSON array
+        return decode_json_column(stored) == decode_json_column(new)
+    return stored == new
+
+
+def diff_ingredients(cursor, recipe_id, wanted):
+    existing = {
+        row['id']: tuple(row)[2:]
+        for row in cursor.execute(
+            'SELECT id, recipe_id, name, amount, unit, notes, original_text '
+            'FROM ingredients WHERE recipe_id = ?', (recipe_id,)
+        )
+    }
+
+    to_update = []
+    to_insert = []
+    unmatched = []
+    for ing in wanted:
+        content = ingredient_row(recipe_id, ing)[1:]
+        ing_id = ing.get('id')
+        if ing_id is None:
+            unmatched.append(content)
+            continue
+        if ing_id not in existing:
+            raise ValueError(f'Ingredient {ing_id} does not belong to recipe {recipe_id}')
+        if existing.pop(ing_id) != content:
+            to_update.append((ing_id, content))
+
+    # Rows sent without an id: reuse an identical existing row if there is one
+    by_content = {}
+    for ing_id, content in existing.items():
+        by_content.setdefault(content, []).append(ing_id)
+    for content in unmatched:
+        if by_content.get(content):
+            existing.pop(by_content[content].pop(0))
+        else:
+            to_insert.append(content)
+
+    to_delete = list(existing)
+
+    if to_update:
+        cursor.executemany(
+            'UPDATE ingredients SET name = ?, amount = ?, unit = ?, notes = ?, original_text = ? '
+            'WHERE id = ?',
+            (content + (ing_id,) for ing_id, content in to_update)
+        )
+    if to_delete:
+        cursor.executemany('DELETE FROM ingredients WHERE id = ?', ((i,) for i in to_delete))
+
+    inserted = []
+    for content in to_insert:
+        cursor.execute(
+            'INSERT INTO ingredients (recipe_id, name, amount, unit, notes, original_text) '
+            'VALUES (?, ?, ?, ?, ?, ?)', (recipe_id,) + content
+        )
+        inserted.append(cursor.lastrowid)
+
+    changes = {}
+    if inserted:
+        changes['inserted'] = inserted
+    if to_update:
+        changes['updated'] = [ing_id for ing_id, _ in to_update]
+    if to_delete:
+        changes['deleted'] = to_delete
+    return changes
+
+
+def diff_categories(cursor, recipe_id, wanted):
+    current = {
+        row[0] for row in cursor.execute(
+            'SELECT category_name FROM recipe_categories WHERE recipe_id = ?', (recipe_id,)
+        )
+    }
+    wanted = set(wanted)
+    added = sorted(wanted - current)
+    removed = sorted(current - wanted)
+
+    cursor.executemany(
+        'DELETE FROM recipe_categories WHERE recipe_id = ? AND category_name = ?',
+        ((recipe_id, name) for name in removed)
+    )
+    cursor.executemany(
+        'INSERT INTO recipe_categories (recipe_id, category_name) VALUES (?, ?)',
+        ((recipe_id, name) for name in added)
+    )
+
+    changes = {}
+    if added:
+        changes['added'] = added
+    if removed:
+        changes['removed'] = removed
+    return changes
@@ -0,0 +1,51 @@
+import os
+
+from flask import Blueprint, jsonify, send_file, abort
+from database import get_db_connection
+from dedup import find_clusters
+from maintenance import due_steps, recent_runs, stats
+from routes.auth import admin_required
+from profiling import PROFILE_DIR, PROFILE_FILES, list_profiles
+
+admin_bp = Blueprint('admin', __name__, url_prefix='/api/admin')
+
+
+@admin_bp.route('/profiles')
+@admin_required
+def get_profiles():
+    """Request profiles taken with X-Profile (see profiling.py), newest first."""
+    return jsonify(list_profiles())
+
+
+@admin_bp.route('/profiles/<profile_id>/<kind>')
+@admin_required
+def download_profile(profile_id, kind):
+    """One profile's file: kind is pstats, collapsed or json (request + SQL trace)."""
+    if kind not in PROFILE_FILES or not profile_id.replace('-', '').isalnum():
+        abort(404)
+    ext, mimetype = PROFILE_FILES[kind]
+    path = os.path.join(PROFILE_DIR, profile_id + ext)
+    if not os.path.isfile(path):
+        abort(404)
+    return send_file(path, mimetype=mimetype, as_attachment=True, download_name=profile_id + ext)
+
+
+@admin_bp.route('/duplicates')
+@admin_required
+def get_duplicates():
+    """Clusters of likely duplicate recipes (see dedup.py), biggest first."""
+    conn = get_db_connection()
+    clusters = find_clusters(conn)
+    conn.close()
+    return jsonify({'clusters': clusters, 'recipes': sum(len(c['ids']) for c in clusters)})
+
+
+@admin_bp.route('/maintenance')
+@admin_required
+def get_maintenance():
+    """Database stats, the maintenance steps due now and the last runs (see maintenance.py)."""
+    conn = get_db_connection()
+    current = stats(conn)
+    result = {'stats': current, 'due': due_steps(conn, current), 'runs': recent_runs(conn)}
+    conn.close()
+    return jsonify(result)
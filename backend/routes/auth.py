@@ -1,3 +1,6 @@
+import os
+from functools import wraps
+
 from flask import Blueprint, request, jsonify
 from flask_login import LoginManager, UserMixin, login_user, logout_user, login_required, current_user
 from werkzeug.security import generate_password_hash, check_password_hash
@@ -6,6 +9,9 @@ from extensions import limiter
 
 auth_bp = Blueprint('auth', __name__, url_prefix='/api/auth')
 
+# Usernames allowed to use the admin endpoints, e.g. ADMIN_USERS=natalia,adam
+ADMIN_USERS = {u.strip() for u in os.environ.get('ADMIN_USERS', '').split(',') if u.strip()}
+
 # --- User model for Flask-Login ---
 
 class User(UserMixin):
@@ -13,6 +19,20 @@ class User(UserMixin):
         self.id = id
         self.username = username
 
+def is_admin(user):
+    return user.is_authenticated and user.username in ADMIN_USERS
+
+
+def admin_required(view):
+    """Like login_required, but only for ADMIN_USERS (403 for everyone else)."""
+    @wraps(view)
+    @login_required
+    def wrapper(*args, **kwargs):
+        if not is_admin(current_user):
+            return jsonify({'error': 'Admin only'}), 403
+        return view(*args, **kwargs)
+    return wrapper
+
 # --- Auth routes ---
 
 @auth_bp.route('/login', methods=['POST'])
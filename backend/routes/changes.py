@@ -0,0 +1,39 @@
+import os
+
+from flask import Blueprint, jsonify, request
+from flask_login import login_required, current_user
+from database import get_db_connection
+from changes import PAGE_SIZE, changes_since, head_revision, watcher
+
+changes_bp = Blueprint('changes', __name__, url_prefix='/api')
+
+# ?wait= long-polls for at most WAIT_SECONDS. A waiting request holds a
+# worker thread, so only MAX_WAITERS per worker wait (see gunicorn.conf.py's
+# threads); beyond that the answer comes straight away and the client waits
+# before asking again.
+WAIT_SECONDS = 25.0
+MAX_WAITERS = int(os.environ.get('CHANGES_MAX_WAITERS', 2))
+
+
+@changes_bp.route('/changes')
+@login_required
+def get_changes():
+    """
+    Recipes, favorites and meal plans changed after ?since=<revision> (see
+    changes.py); since=latest starts from the current revision. With
+    ?wait=<seconds> and nothing new yet, waits for the next change first.
+    """
+    limit = max(1, min(request.args.get('limit', PAGE_SIZE, type=int), PAGE_SIZE))
+    wait = max(0.0, min(request.args.get('wait', 0, type=float), WAIT_SECONDS))
+    conn = get_db_connection()
+    try:
+        head = head_revision(conn)
+        since = head if request.args.get('since') == 'latest' else request.args.get('since', 0, type=int)
+        if wait and head == since and watcher.waiters < MAX_WAITERS:
+            # No connection held while waiting
+            conn.close()
+            watcher.wait(since, wait)
+            conn = get_db_connection()
+        return jsonify(changes_since(conn, since, current_user.id, limit))
+    finally:
+        conn.close()
@@ -0,0 +1,27 @@
+from datetime import date
+
+from flask import Blueprint, Response, jsonify, request, stream_with_context
+from flask_login import login_required, current_user
+from export import EXPORT_FORMATS, export_chunks
+
+export_bp = Blueprint('export', __name__)
+
+
+@export_bp.route('/api/export')
+@login_required
+def export_library():
+    """
+    Stream every recipe plus the current user's favorites and the meal plans.
+    ?format=ndjson (default), csv (recipes only) or zip.
+    """
+    fmt = request.args.get('format', 'ndjson')
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({'error': 'Unknown format', 'valid_formats': sorted(EXPORT_FORMATS)}), 400
+
+    mimetype, extension = EXPORT_FORMATS[fmt]
+    filename = f'recipes-{date.today().isoformat()}.{extension}'
+    return Response(
+        stream_with_context(export_chunks(fmt, user_id=current_user.id)),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename="{filename}"'},
+    )
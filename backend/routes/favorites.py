@@ -1,6 +1,9 @@
 from flask import jsonify, request, Blueprint
 from flask_login import login_required, current_user
-from database import get_db_connection
+from database import get_db_connection, write_transaction
+from serializers import recipe_to_dict
+from facets import facet_counts
+from search import load_search_hits
  
 favorites_bp = Blueprint('favorites', __name__)
  
@@ -13,6 +16,8 @@ def get_favorites():
     per_page = min(request.args.get('per_page', 20, type=int), 100)
     search = request.args.get('search', '').strip()
     tag = request.args.get('tag', '').strip()
+    with_facets = request.args.get('facets', '').lower() in ('1', 'true')
+    fuzzy = request.args.get('fuzzy', '').lower() in ('1', 'true')
 
     conn = get_db_connection()
     cursor = conn.cursor()
@@ -20,7 +25,12 @@ def get_favorites():
     base_join = 'favorites f JOIN recipes r ON r.id = f.recipe_id'
     conditions = ['f.user_id = ?']
     params = [current_user.id]
-    if search:
+    order_by = 'f.created_at DESC'
+    if search and fuzzy:
+        load_search_hits(conn, search)
+        base_join += ' JOIN temp.search_hits sh ON sh.id = r.id'
+        order_by = 'sh.rank'
+    elif search:
         conditions.append('r.name LIKE ?')
         params.append(f'%{search}%')
     if tag:
@@ -40,22 +50,24 @@ def get_favorites():
     offset = (page - 1) * per_page
 
     rows = cursor.execute(f'''
-        SELECT r.* FROM recipes r
-        JOIN favorites f ON r.id = f.recipe_id
-        {f"JOIN recipe_categories rc ON r.id = rc.recipe_id" if tag else ""}
+        SELECT r.* FROM {base_join}
         WHERE {where}
-        ORDER BY f.created_at DESC
+        ORDER BY {order_by}
         LIMIT ? OFFSET ?
     ''', params + [per_page, offset]).fetchall()
 
-    conn.close()
-    return jsonify({
-        "recipes": [dict(row) for row in rows],
+    result = {
+        "recipes": [recipe_to_dict(row) for row in rows],
         "page": page,
         "per_page": per_page,
         "total": total,
         "total_pages": total_pages
-    })
+    }
+    if with_facets:
+        result["facets"] = facet_counts(conn, tag=tag, search=search, user_id=current_user.id, fuzzy=fuzzy)
+
+    conn.close()
+    return jsonify(result)
  
  
 @favorites_bp.route("/api/favorites/ids")
@@ -75,40 +87,22 @@ def get_favorite_ids():
 @login_required
 def add_favorite(recipe_id):
     """Add a recipe to the current user's favorites."""
-    conn = get_db_connection()
-    cursor = conn.cursor()
- 
-    try:
-        cursor.execute(
+    with write_transaction() as conn:
+        conn.execute(
             'INSERT OR IGNORE INTO favorites (user_id, recipe_id) VALUES (?, ?)',
             (current_user.id, recipe_id)
         )
-        conn.commit()
-        return jsonify({'message': 'Recipe added to favorites'}), 201
-    except Exception as e:
-        conn.rollback()
-        return jsonify({'error': str(e)}), 500
-    finally:
-        conn.close()
+    return jsonify({'message': 'Recipe added to favorites'}), 201
  
  
 @favorites_bp.route("/api/favorites/<int:recipe_id>", methods=['DELETE'])
 @login_required
 def remove_favorite(recipe_id):
     """Remove a recipe from the current user's favorites."""
-    conn = get_db_connection()
-    cursor = conn.cursor()
- 
-    try:
-        cursor.execute(
+    with write_transaction() as conn:
+        conn.execute(
             'DELETE FROM favorites WHERE user_id = ? AND recipe_id = ?',
             (current_user.id, recipe_id)
         )
-        conn.commit()
-        return jsonify({'message': 'Recipe removed from favorites'})
-    except Exception as e:
-        conn.rollback()
-        return jsonify({'error': str(e)}), 500
-    finally:
-        conn.close()
+    return jsonify({'message': 'Recipe removed from favorites'})
  
\ No newline at end of file
@@ -0,0 +1,123 @@
+import os
+import re
+
+from flask import Blueprint, jsonify, request, send_file, redirect, abort
+from flask_login import login_required
+from database import get_db_connection
+from images import (
+    MAX_IMAGE_BYTES, THUMBNAIL_SIZES, THUMBNAIL_FORMATS,
+    Image, store_image, attach_image, image_url, original_path, thumbnail_path,
+    check_download_url,
+)
+from jobs import enqueue, get_job
+
+images_bp = Blueprint('images', __name__)
+
+# Content-addressed files never change, so browsers/nginx may cache them forever
+IMMUTABLE = 'public, max-age=31536000, immutable'
+
+MEDIA_NAME = re.compile(r'^(?P<sha256>[0-9a-f]{64})(?:_(?P<size>\d+))?\.(?P<ext>[a-z]+)$')
+
+
+@images_bp.route('/api/recipes/<int:recipe_id>/image', methods=['POST'])
+@login_required
+def upload_recipe_image(recipe_id):
+    """Upload a photo (multipart field "image") and make it the recipe's image."""
+    if request.content_length and request.content_length > MAX_IMAGE_BYTES + 64 * 1024:
+        return jsonify({'error': 'Image is too large'}), 413
+
+    upload = request.files.get('image')
+    if upload is None:
+        return jsonify({'error': 'Missing file: image'}), 400
+
+    conn = get_db_connection()
+    exists = conn.execute('SELECT id FROM recipes WHERE id = ?', (recipe_id,)).fetchone()
+    conn.close()
+    if exists is None:
+        return jsonify({'error': 'Recipe not found'}), 404
+
+    try:
+        image = store_image(upload.read(MAX_IMAGE_BYTES + 1))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    attach_image(recipe_id, image)
+
+    # Thumbnails are made off the request path (and only with Pillow installed)
+    job_id = None
+    if Image is not None and not image['thumbnails_ready']:
+        job_id = enqueue('image_thumbnails', {'sha256': image['sha256']})
+
+    return jsonify({
+        'image_url': image_url(image['sha256'], image['ext']),
+        'sha256': image['sha256'],
+        'thumbnails': thumbnail_urls(image['sha256']),
+        'job_id': job_id,
+    }), 201
+
+
+@images_bp.route('/api/recipes/<int:recipe_id>/image/ingest', methods=['POST'])
+@login_required
+def ingest_recipe_image(recipe_id):
+    """Download an image from {"url": ...} in the background and attach it."""
+    data = request.get_json()
+    if not data or not data.get('url'):
+        return jsonify({'error': 'Missing field: url'}), 400
+    try:
+        check_download_url(data['url'])
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    job_id = enqueue('ingest_image', {'recipe_id': recipe_id, 'url': data['url']})
+    return jsonify(get_job(job_id)), 202
+
+
+@images_bp.route('/api/images/localize', methods=['POST'])
+@login_required
+def localize_recipe_images():
+    """Copy remote images of imported recipes (default: centrumrespo) to local storage."""
+    data = request.get_json(silent=True) or {}
+    job_id = enqueue('localize_images', {'source': data.get('source', 'centrumrespo')})
+    return jsonify(get_job(job_id)), 202
+
+
+def thumbnail_urls(sha256):
+    return {
+        str(size): {fmt: f'/media/{sha256}_{size}.{fmt}' for fmt in THUMBNAIL_FORMATS}
+        for size in THUMBNAIL_SIZES
+    }
+
+
+@images_bp.route('/media/<name>')
+def serve_media(name):
+    """
+    /media/<sha256>.<ext>             original
+    /media/<sha256>_<size>.<webp|jpg> thumbnail (redirects to the original until it exists)
+    """
+    match = MEDIA_NAME.match(name)
+    if not match:
+        abort(404)
+    sha256, size, ext = match.group('sha256'), match.group('size'), match.group('ext')
+
+    if size is None:
+        path = original_path(sha256, ext)
+    else:
+        if int(size) not in THUMBNAIL_SIZES or ext not in THUMBNAIL_FORMATS:
+            abort(404)
+        path = thumbnail_path(sha256, int(size), ext)
+        if not os.path.isfile(path):
+            conn = get_db_connection()
+            image = conn.execute('SELECT ext FROM images WHERE sha256 = ?', (sha256,)).fetchone()
+            conn.close()
+            if image is None:
+                abort(404)
+            response = redirect(image_url(sha256, image['ext']))
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+
+    if not os.path.isfile(path):
+        abort(404)
+
+    response = send_file(path, conditional=True, etag=sha256 if size is None else f'{sha256}_{size}')
+    response.headers['Cache-Control'] = IMMUTABLE
+    return response
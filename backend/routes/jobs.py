@@ -0,0 +1,41 @@
+from flask import jsonify, request, Blueprint
+from flask_login import login_required, current_user
+from jobs import JOB_TYPES, enqueue, get_job, list_jobs
+
+jobs_bp = Blueprint('jobs', __name__, url_prefix='/api')
+
+
+@jobs_bp.route('/jobs', methods=['POST'])
+@login_required
+def create_job():
+    """Queue a background job: {"kind": "import_centrumrespo", "params": {"path": "res.json"}}."""
+    data = request.get_json()
+
+    if not data or not data.get('kind'):
+        return jsonify({'error': 'Missing field: kind'}), 400
+
+    if data['kind'] not in JOB_TYPES:
+        return jsonify({'error': 'Unknown job type', 'valid_kinds': sorted(JOB_TYPES)}), 400
+
+    params = data.get('params') or {}
+    if not isinstance(params, dict):
+        return jsonify({'error': 'params must be an object'}), 400
+
+    job_id = enqueue(data['kind'], params, user_id=current_user.id)
+    return jsonify(get_job(job_id)), 202
+
+
+@jobs_bp.route('/jobs')
+@login_required
+def get_jobs():
+    limit = min(request.args.get('limit', 50, type=int), 200)
+    return jsonify(list_jobs(limit))
+
+
+@jobs_bp.route('/jobs/<int:job_id>')
+@login_required
+def get_job_status(job_id):
+    found = get_job(job_id)
+    if found is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(found)
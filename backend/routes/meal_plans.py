@@ -1,7 +1,7 @@
 from flask import jsonify, Blueprint, request
 from flask_login import login_required
-from database import get_db_connection
-from datetime import datetime
+from database import get_db_connection, write_transaction
+from datetime import datetime, timedelta
 
 meal_plans_bp = Blueprint('meal_plans', __name__, url_prefix="/api")
 
@@ -59,35 +59,31 @@ def is_valid_date(date_string):
 @meal_plans_bp.route('/meal-plans', methods=["POST"])
 @login_required
 def add_plans():
-    conn = get_db_connection()
-    if request.method == 'POST':
-        data = request.get_json()
+    data = request.get_json()
 
-        if not data:
-            return jsonify({'error': 'No JSON data'}), 400
+    if not data:
+        return jsonify({'error': 'No JSON data'}), 400
 
-        date = data.get('date')
-        meal_type = data.get('meal_type')
-        recipe_id = data.get('recipe_id')
-        servings = data.get('servings')
+    date = data.get('date')
+    meal_type = data.get('meal_type')
+    recipe_id = data.get('recipe_id')
+    servings = data.get('servings')
 
-        required = ['date', 'meal_type', 'recipe_id']
+    required = ['date', 'meal_type', 'recipe_id']
 
-        for field in required:
-            if field not in data:
-                return jsonify({'error': f'Missing field: {field}'}), 400
+    for field in required:
+        if field not in data:
+            return jsonify({'error': f'Missing field: {field}'}), 400
 
-    recipe = conn.execute('''SELECT * FROM recipes WHERE id = ?''', (recipe_id,)).fetchone()
+    new_id = None
+    with write_transaction() as conn:
+        recipe = conn.execute('''SELECT id FROM recipes WHERE id = ?''', (recipe_id,)).fetchone()
+        if recipe:
+            new_id = conn.execute('''INSERT INTO meal_plans (date, meal_type, recipe_id, servings) VALUES (?, ?, ?, ?)''', (date, meal_type, recipe_id, servings)).lastrowid
 
-    if recipe:
-        cursor = conn.execute('''INSERT INTO meal_plans (date, meal_type, recipe_id, servings) VALUES (?, ?, ?, ?)''', (date, meal_type, recipe_id, servings))
-    else:
+    if new_id is None:
         return jsonify({'error': 'Recipe not found'}), 404
 
-    new_id = cursor.lastrowid
-    conn.commit()
-    conn.close()
-
     return jsonify({
         'id': new_id,
         'date': date,
@@ -100,8 +96,6 @@ def add_plans():
 @meal_plans_bp.route('/meal-plans/<int:meal_id>', methods=['PATCH'])
 @login_required
 def update_meal(meal_id):
-    conn = get_db_connection()
-
     data = request.get_json()
 
     if not data:
@@ -115,20 +109,14 @@ def update_meal(meal_id):
     if servings < 0:
         return jsonify({'error': 'Servings must be positive number'}), 400
     
-    existing = conn.execute(
-        'SELECT * from meal_plans WHERE id = ?', (meal_id,) 
-    ).fetchone()
+    with write_transaction() as conn:
+        updated = conn.execute(
+            'UPDATE meal_plans SET servings = ? WHERE id =?',
+            (servings, meal_id)
+        ).rowcount
 
-    if not existing:
-        conn.close()
+    if not updated:
         return jsonify({'error': 'Meal plan not found'}), 404
-    
-    conn.execute(
-        'UPDATE meal_plans SET servings = ? WHERE id =?',
-        (servings, meal_id)
-    )
-    conn.commit()
-    conn.close()
 
     return jsonify({
         'id': meal_id,
@@ -140,20 +128,214 @@ def update_meal(meal_id):
 @meal_plans_bp.route('/meal-plans/<int:meal_id>', methods = ['DELETE'])
 @login_required
 def delete_meal(meal_id):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-
-    cursor.execute('DELETE FROM meal_plans WHERE id = ?', (meal_id,))
+    with write_transaction() as conn:
+        deleted = conn.execute('DELETE FROM meal_plans WHERE id = ?', (meal_id,)).rowcount
 
     #Checking if a meal plan existed
-    if cursor.rowcount == 0:
+    if deleted == 0:
         return jsonify({
             'error': 'Meal plan not found'
         }), 404
 
-    conn.commit()
-    conn.close()
-
     return jsonify({
         'message': 'Meal plan deleted successfully'
-    })
\ No newline at end of file
+    })
+
+VALID_MEAL_TYPES = ['breakfast', 'lunch', 'dinner', 'snack']
+
+
+def day_shift(days):
+    """SQLite date() modifier for moving a date by `days`."""
+    return f'{days:+d} days'
+
+
+def days_between(start, end):
+    return (datetime.strptime(end, '%Y-%m-%d') - datetime.strptime(start, '%Y-%m-%d')).days
+
+
+@meal_plans_bp.route('/meal-plans/batch', methods=['POST'])
+@login_required
+def add_plans_batch():
+    """
+    Add many meals at once: {"meals": [{"date", "meal_type", "recipe_id", "servings"}, ...]}.
+    All or nothing - if any recipe is missing nothing is inserted.
+    """
+    data = request.get_json()
+    meals = data.get('meals') if isinstance(data, dict) else None
+    if not meals or not isinstance(meals, list):
+        return jsonify({'error': 'meals must be a non-empty list'}), 400
+
+    rows = []
+    for index, meal in enumerate(meals):
+        if not isinstance(meal, dict):
+            return jsonify({'error': f'Meal {index} must be an object'}), 400
+        for field in ['date', 'meal_type', 'recipe_id']:
+            if field not in meal:
+                return jsonify({'error': f'Meal {index}: missing field: {field}'}), 400
+        if not is_valid_date(str(meal['date'])):
+            return jsonify({'error': f'Meal {index}: invalid date'}), 400
+        if meal['meal_type'] not in VALID_MEAL_TYPES:
+            return jsonify({'error': f'Meal {index}: invalid meal_type'}), 400
+        rows.append((index, meal['date'], meal['meal_type'], meal['recipe_id'], meal.get('servings')))
+
+    missing = []
+    with write_transaction() as conn:
+        conn.execute('''CREATE TEMP TABLE IF NOT EXISTS plan_entries (
+            pos INTEGER PRIMARY KEY, date TEXT, meal_type TEXT, recipe_id INTEGER, servings REAL)''')
+        conn.execute('DELETE FROM temp.plan_entries')
+        conn.executemany('INSERT INTO temp.plan_entries VALUES (?, ?, ?, ?, ?)', rows)
+
+        # One existence check for every referenced recipe
+        missing = [row[0] for row in conn.execute('''
+            SELECT DISTINCT e.recipe_id FROM temp.plan_entries e
+            LEFT JOIN recipes r ON r.id = e.recipe_id
+            WHERE r.id IS NULL
+        ''')]
+        if not missing:
+            created = conn.execute('''
+                INSERT INTO meal_plans (date, meal_type, recipe_id, servings)
+                SELECT date, meal_type, recipe_id, servings FROM temp.plan_entries ORDER BY pos
+            ''').rowcount
+
+    if missing:
+        return jsonify({'error': 'Recipe not found', 'missing_recipe_ids': missing}), 404
+
+    return jsonify({'created': created, 'message': 'Meal plans created successfully'}), 201
+
+
+@meal_plans_bp.route('/meal-plans/copy', methods=['POST'])
+@login_required
+def copy_plans():
+    """
+    Copy every meal between from_start and from_end (inclusive) so the range
+    starts at to_start. With "replace": true the target range is cleared first.
+    """
+    data = request.get_json()
+    if not data:
+        return jsonify({'error': 'No JSON data'}), 400
+
+    for field in ['from_start', 'from_end', 'to_start']:
+        if not is_valid_date(str(data.get(field))):
+            return jsonify({'error': f'Missing or invalid field: {field}'}), 400
+
+    from_start, from_end, to_start = data['from_start'], data['from_end'], data['to_start']
+    length = days_between(from_start, from_end)
+    if length < 0:
+        return jsonify({'error': 'from_end is before from_start'}), 400
+
+    shift = day_shift(days_between(from_start, to_start))
+    to_end = (datetime.strptime(to_start, '%Y-%m-%d') + timedelta(days=length)).strftime('%Y-%m-%d')
+
+    with write_transaction() as conn:
+        # Stage the source first, so overlapping ranges with replace work
+        conn.execute('''CREATE TEMP TABLE IF NOT EXISTS plan_copy (
+            date TEXT, meal_type TEXT, recipe_id INTEGER, servings REAL)''')
+        conn.execute('DELETE FROM temp.plan_copy')
+        conn.execute('''
+            INSERT INTO temp.plan_copy
+            SELECT date(date, ?), meal_type, recipe_id, servings
+            FROM meal_plans WHERE date BETWEEN ? AND ?
+            ORDER BY date, id
+        ''', (shift, from_start, from_end))
+
+        removed = 0
+        if data.get('replace'):
+            removed = conn.execute(
+                'DELETE FROM meal_plans WHERE date BETWEEN ? AND ?', (to_start, to_end)
+            ).rowcount
+
+        created = conn.execute('''
+            INSERT INTO meal_plans (date, meal_type, recipe_id, servings)
+            SELECT date, meal_type, recipe_id, servings FROM temp.plan_copy
+        ''').rowcount
+
+    return jsonify({'created': created, 'removed': removed, 'to_start': to_start, 'to_end': to_end}), 201
+
+
+@meal_plans_bp.route('/meal-plan-templates')
+@login_required
+def get_templates():
+    conn = get_db_connection()
+    rows = conn.execute('''
+        SELECT t.id, t.name, t.created_at, COUNT(i.id) AS meal_count
+        FROM meal_plan_templates t
+        LEFT JOIN meal_plan_template_items i ON i.template_id = t.id
+        GROUP BY t.id
+        ORDER BY t.name
+    ''').fetchall()
+    conn.close()
+    return jsonify([dict(row) for row in rows])
+
+
+@meal_plans_bp.route('/meal-plan-templates', methods=['POST'])
+@login_required
+def save_template():
+    """Save the 7 days starting at week_start as a named template (same name overwrites)."""
+    data = request.get_json()
+    if not data or not data.get('name'):
+        return jsonify({'error': 'Missing field: name'}), 400
+    week_start = data.get('week_start')
+    if not is_valid_date(str(week_start)):
+        return jsonify({'error': 'Missing or invalid field: week_start'}), 400
+
+    with write_transaction() as conn:
+        conn.execute('DELETE FROM meal_plan_templates WHERE name = ?', (data['name'],))
+        template_id = conn.execute(
+            'INSERT INTO meal_plan_templates (name) VALUES (?)', (data['name'],)
+        ).lastrowid
+        meal_count = conn.execute('''
+            INSERT INTO meal_plan_template_items (template_id, day_offset, meal_type, recipe_id, servings)
+            SELECT ?, CAST(julianday(date) - julianday(?) AS INTEGER), meal_type, recipe_id, servings
+            FROM meal_plans
+            WHERE date BETWEEN ? AND date(?, '+6 days')
+            ORDER BY date, id
+        ''', (template_id, week_start, week_start, week_start)).rowcount
+
+    return jsonify({'id': template_id, 'name': data['name'], 'meal_count': meal_count}), 201
+
+
+@meal_plans_bp.route('/meal-plan-templates/<int:template_id>/apply', methods=['POST'])
+@login_required
+def apply_template(template_id):
+    """Fill the week starting at week_start from a template ("replace": true clears it first)."""
+    data = request.get_json()
+    week_start = data.get('week_start') if data else None
+    if not is_valid_date(str(week_start)):
+        return jsonify({'error': 'Missing or invalid field: week_start'}), 400
+
+    with write_transaction() as conn:
+        template = conn.execute(
+            'SELECT id FROM meal_plan_templates WHERE id = ?', (template_id,)
+        ).fetchone()
+        if template is None:
+            return jsonify({'error': 'Template not found'}), 404
+
+        removed = 0
+        if data.get('replace'):
+            removed = conn.execute(
+                "DELETE FROM meal_plans WHERE date BETWEEN ? AND date(?, '+6 days')",
+                (week_start, week_start)
+            ).rowcount
+
+        created = conn.execute('''
+            INSERT INTO meal_plans (date, meal_type, recipe_id, servings)
+            SELECT date(?, '+' || day_offset || ' days'), meal_type, recipe_id, servings
+            FROM meal_plan_template_items
+            WHERE template_id = ?
+            ORDER BY day_offset, id
+        ''', (week_start, template_id)).rowcount
+
+    return jsonify({'created': created, 'removed': removed, 'week_start': week_start}), 201
+
+
+@meal_plans_bp.route('/meal-plan-templates/<int:template_id>', methods=['DELETE'])
+@login_required
+def delete_template(template_id):
+    with write_transaction() as conn:
+        deleted = conn.execute(
+            'DELETE FROM meal_plan_templates WHERE id = ?', (template_id,)
+        ).rowcount
+
+    if deleted == 0:
+        return jsonify({'error': 'Template not found'}), 404
+    return jsonify({'message': 'Template deleted successfully'})
@@ -1,23 +1,34 @@
+from collections import Counter
+
 from flask import Flask, jsonify, abort, request, Blueprint
 from flask_login import login_required
-from database import get_db_connection
-import json
+from database import get_db_connection, write_transaction
+from serializers import recipe_to_dict
+from facets import facet_counts
+from tag_index import get_index as get_tag_index
+from search import load_search_hits
+from recipe_filters import range_conditions, order_clause, parse_ranges, parse_sort
+import catalog
+from recipe_store import (
+    VALID_CATEGORIES, validate_recipe, insert_recipes, update_recipes,
+    existing_ids, delete_recipes, patch_recipe,
+)
 
 recipes_bp = Blueprint('recipes', __name__)
 
-VALID_CATEGORIES = ['breakfast', 'lunch', 'dinner', 'snack']
+# Most recipes accepted by one POST /api/recipes/bulk
+BULK_MAX_ITEMS = 500
 
 @recipes_bp.route("/api/recipes")
 @login_required
 def get_recipes():
-    connection = get_db_connection()
-    cursor = connection.cursor()
-
     category = request.args.get('category')
     tag = request.args.get('tag')  # NEW: filter by recipe_categories tag
     search = request.args.get('search')
     page = request.args.get('page', type=int)
     per_page = request.args.get('per_page', 20, type=int)
+    with_facets = request.args.get('facets', '').lower() in ('1', 'true')
+    fuzzy = request.args.get('fuzzy', '').lower() in ('1', 'true')
 
     if category and category not in VALID_CATEGORIES:
         return jsonify({
@@ -25,11 +36,33 @@ def get_recipes():
             "valid_categories": VALID_CATEGORIES
         }), 400
 
+    # Nutrition/time ranges and ?sort= (see recipe_filters.py)
+    try:
+        conditions, params = range_conditions(request.args)
+        sort = order_clause(request.args.get('sort'))
+        ranges = parse_ranges(request.args)
+        sort_keys = parse_sort(request.args.get('sort'))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    range_filter = (list(conditions), list(params))
+
     per_page = min(per_page, 100)
 
+    connection = get_db_connection()
+    cursor = connection.cursor()
+
+    # Pages without a text search come from the in-memory catalog when it's current
+    result = None
+    if page is not None and not search:
+        result = catalog.list_page(connection, category=category, tag=tag, ranges=ranges,
+                                   sort=sort_keys, page=page, per_page=per_page)
+    if result is not None:
+        if with_facets:
+            result["facets"] = facet_counts(connection, category=category, tag=tag, ranges=range_filter)
+        connection.close()
+        return jsonify(result)
+
     base_from = "FROM recipes r"
-    conditions = []
-    params = []
 
     if tag:
         base_from += " JOIN recipe_categories rc ON r.id = rc.recipe_id"
@@ -40,7 +73,14 @@ def get_recipes():
         conditions.append("r.category = ?")
         params.append(category)
 
-    if search:
+    order_by = sort
+    if search and fuzzy:
+        # Typo/diacritic tolerant, best matches first unless ?sort= says otherwise
+        load_search_hits(connection, search)
+        base_from += " JOIN temp.search_hits sh ON sh.id = r.id"
+        if not request.args.get('sort'):
+            order_by = "sh.rank"
+    elif search:
         conditions.append("r.name LIKE ?")
         params.append(f"%{search}%")
 
@@ -50,11 +90,11 @@ def get_recipes():
  
     # If no page parameter, return all results (backwards compatible)
     if page is None:
-        query = f"SELECT DISTINCT r.* {base_from}{where_clause} ORDER BY r.id DESC"
+        query = f"SELECT DISTINCT r.* {base_from}{where_clause} ORDER BY {order_by}"
         cursor.execute(query, params)
         rows = cursor.fetchall()
         connection.close()
-        return jsonify([dict(row) for row in rows])
+        return jsonify([recipe_to_dict(row) for row in rows])
  
     # Count total matching recipes
     count_query = f"SELECT COUNT(DISTINCT r.id) {base_from}{where_clause}"
@@ -65,19 +105,25 @@ def get_recipes():
     page = max(1, min(page, total_pages))
     offset = (page - 1) * per_page
 
-    query = f"SELECT DISTINCT r.* {base_from}{where_clause} ORDER BY r.id DESC LIMIT ? OFFSET ?"
+    query = f"SELECT DISTINCT r.* {base_from}{where_clause} ORDER BY {order_by} LIMIT ? OFFSET ?"
     cursor.execute(query, params + [per_page, offset])
 
     rows = cursor.fetchall()
-    connection.close()
 
-    return jsonify({
-        "recipes": [dict(row) for row in rows],
+    result = {
+        "recipes": [recipe_to_dict(row) for row in rows],
         "page": page,
         "per_page": per_page,
         "total": total,
         "total_pages": total_pages
-    })
+    }
+    if with_facets:
+        result["facets"] = facet_counts(
+            connection, category=category, tag=tag, search=search, fuzzy=fuzzy, ranges=range_filter
+        )
+
+    connection.close()
+    return jsonify(result)
 
 
 @recipes_bp.route("/api/recipes/<int:recipe_id>")
@@ -101,7 +147,7 @@ def get_recipe(recipe_id):
 
     connection.close()
 
-    result = dict(recipe)
+    result = recipe_to_dict(recipe)
     result['ingredients'] = [dict(ing) for ing in ingredients]
     result['recipe_categories'] = [row['category_name'] for row in categories]
 
@@ -116,115 +162,109 @@ def create_recipe():
     if not data:
         return jsonify({'error': 'No JSON data'}), 400
 
-    required_fields = ['name']
-    for field in required_fields:
-        if field not in data or not data[field]:
-            return jsonify({'error': f"Missing required field: {field}"}), 400
-
-    # Category is now optional
-    if data.get('category') and data['category'] not in VALID_CATEGORIES:
+    error = validate_recipe(data)
+    if error == 'Invalid category':
         return jsonify({
             'error': 'Invalid category',
             'valid_categories': VALID_CATEGORIES
         }), 400
+    if error:
+        return jsonify({'error': error}), 400
 
-    conn = get_db_connection()
-    cursor = conn.cursor()
+    with write_transaction() as conn:
+        recipe_id = insert_recipes(conn.cursor(), [data])[0]
 
-    try:
-        cursor.execute('''
-            INSERT INTO recipes
-                (name, description, category, image_url, source_url, source,
-                 difficulty, prep_time_minutes, total_time_minutes, servings,
-                 instructions, notes, tags,
-                 calories_per_serving, protein_per_serving, fat_per_serving,
-                 carbs_per_serving, sodium_per_serving, fiber_per_serving,
-                 rating, rating_count)
-            VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)
-        ''', (
-            data['name'],
-            data.get('description'),
-            data.get('category'),
-            data.get('image_url'),
-            data.get('source_url'),
-            data.get('source', 'manual'),
-            data.get('difficulty'),
-            data.get('prep_time_minutes'),
-            data.get('total_time_minutes'),
-            data.get('servings', 1),
-            json.dumps(data.get('instructions', [])),
-            data.get('notes'),
-            json.dumps(data.get('tags', [])),
-            data.get('calories_per_serving', 0),
-            data.get('protein_per_serving', 0),
-            data.get('fat_per_serving', 0),
-            data.get('carbs_per_serving', 0),
-            data.get('sodium_per_serving', 0),
-            data.get('fiber_per_serving', 0),
-            data.get('rating'),
-            data.get('rating_count', 0),
-        ))
-        recipe_id = cursor.lastrowid
-
-        # Insert ingredients
-        for ing in data.get('ingredients', []):
-            cursor.execute('''
-                INSERT INTO ingredients (recipe_id, name, amount, unit, notes, original_text)
-                VALUES (?, ?, ?, ?, ?, ?)
-            ''', (
-                recipe_id,
-                ing.get('name', ''),
-                ing.get('amount', 0),
-                ing.get('unit', ''),
-                ing.get('notes'),
-                ing.get('original_text'),
-            ))
-
-        # Insert recipe categories/tags
-        for cat in data.get('recipe_categories', []):
-            cursor.execute(
-                'INSERT INTO recipe_categories (recipe_id, category_name) VALUES (?, ?)',
-                (recipe_id, cat)
-            )
-
-        conn.commit()
+    return jsonify({
+        'id': recipe_id,
+        'message': 'Recipe created successfully'
+    }), 201
 
-        return jsonify({
-            'id': recipe_id,
-            'message': 'Recipe created successfully'
-        }), 201
 
-    except Exception as e:
-        conn.rollback()
-        return jsonify({'error': str(e)}), 500
+@recipes_bp.route("/api/recipes/bulk", methods=['POST'])
+@login_required
+def bulk_upsert_recipes():
+    """
+    Create or update many recipes in one transaction.
+
+    Body: {"recipes": [{...}, {"id": 12, ...}]} - items with an id are updated
+    (full replace, like PUT), items without one are created. Invalid items and
+    unknown ids are reported per item and skipped; the rest are written.
+    """
+    data = request.get_json()
+    items = data.get('recipes') if isinstance(data, dict) else None
+    if not items or not isinstance(items, list):
+        return jsonify({'error': 'recipes must be a non-empty list'}), 400
+    if len(items) > BULK_MAX_ITEMS:
+        return jsonify({'error': f'At most {BULK_MAX_ITEMS} recipes per request'}), 400
+
+    results = [None] * len(items)
+    to_create = []
+    to_update = []
+    ids = []
+
+    for index, item in enumerate(items):
+        error = validate_recipe(item)
+        if error is None and item.get('id') is not None:
+            try:
+                ids.append(int(item['id']))
+            except (TypeError, ValueError):
+                error = 'id must be an integer'
+            else:
+                to_update.append((index, ids[-1], item))
+                continue
+        if error:
+            results[index] = {'index': index, 'status': 'error', 'error': error}
+        else:
+            to_create.append((index, item))
+
+    # An id sent twice is ambiguous, reject every copy rather than pick one
+    duplicates = {item_id for item_id, count in Counter(ids).items() if count > 1}
+    for index, item_id, _ in to_update:
+        if item_id in duplicates:
+            results[index] = {
+                'index': index, 'id': item_id, 'status': 'error', 'error': 'Duplicate id in batch'
+            }
+    to_update = [entry for entry in to_update if entry[1] not in duplicates]
+
+    with write_transaction() as conn:
+        cursor = conn.cursor()
+        found = existing_ids(cursor, [item_id for _, item_id, _ in to_update])
+        updates = []
+        for index, item_id, item in to_update:
+            if item_id in found:
+                updates.append((item_id, item))
+                results[index] = {'index': index, 'id': item_id, 'status': 'updated'}
+            else:
+                results[index] = {
+                    'index': index, 'id': item_id, 'status': 'error', 'error': 'Recipe not found'
+                }
+
+        if updates:
+            update_recipes(cursor, updates)
+
+        new_ids = insert_recipes(cursor, [item for _, item in to_create])
+        for (index, _), recipe_id in zip(to_create, new_ids):
+            results[index] = {'index': index, 'id': recipe_id, 'status': 'created'}
 
-    finally:
-        conn.close()
+    return jsonify({
+        'results': results,
+        'created': len(new_ids),
+        'updated': len(updates),
+        'failed': sum(1 for r in results if r['status'] == 'error'),
+    })
 
 
 @recipes_bp.route("/api/recipes/<int:recipe_id>", methods=['DELETE'])
 @login_required
 def remove_recipe(recipe_id):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-
-    try:
-        cursor.execute('DELETE FROM recipe_categories WHERE recipe_id = ?', (recipe_id,))
-        cursor.execute('DELETE FROM ingredients WHERE recipe_id = ?', (recipe_id,))
-        cursor.execute('DELETE FROM recipes WHERE id = ?', (recipe_id,))
-
-        if cursor.rowcount == 0:
-            return jsonify({'error': 'Recipe not found'}), 404
-
-        conn.commit()
-        return jsonify({'message': 'Recipe deleted successfully'})
-
-    except Exception as e:
-        conn.rollback()
-        return jsonify({'error': str(e)}), 500
+    with write_transaction() as conn:
+        conn.execute('DELETE FROM recipe_categories WHERE recipe_id = ?', (recipe_id,))
+        conn.execute('DELETE FROM ingredients WHERE recipe_id = ?', (recipe_id,))
+        deleted = conn.execute('DELETE FROM recipes WHERE id = ?', (recipe_id,)).rowcount
 
-    finally:
-        conn.close()
+    if deleted == 0:
+        return jsonify({'error': 'Recipe not found'}), 404
+    return jsonify({'message': 'Recipe deleted successfully'})
 
 
 @recipes_bp.route("/api/recipes/bulk-delete", methods=['POST'])
@@ -239,20 +279,10 @@ def bulk_delete_recipes():
     except (TypeError, ValueError):
         return jsonify({'error': 'All ids must be integers'}), 400
 
-    placeholders = ','.join('?' * len(ids))
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    try:
-        cursor.execute(f'DELETE FROM recipe_categories WHERE recipe_id IN ({placeholders})', ids)
-        cursor.execute(f'DELETE FROM ingredients WHERE recipe_id IN ({placeholders})', ids)
-        cursor.execute(f'DELETE FROM recipes WHERE id IN ({placeholders})', ids)
-        conn.commit()
-        return jsonify({'deleted': cursor.rowcount}), 200
-    except Exception as e:
-        conn.rollback()
-        return jsonify({'error': str(e)}), 500
-    finally:
-        conn.close()
+    # ids go through a temp table, so any number of them fits in one statement
+    with write_transaction() as conn:
+        deleted = delete_recipes(conn.cursor(), ids)
+    return jsonify({'deleted': deleted}), 200
 
 
 @recipes_bp.route("/api/recipes/<int:recipe_id>", methods=['PUT'])
@@ -263,89 +293,67 @@ def update_recipe(recipe_id):
     if not data:
         return jsonify({'error': 'No JSON data'}), 400
 
-    if not data.get('name'):
-        return jsonify({'error': 'Missing required field: name'}), 400
-
-    if data.get('category') and data['category'] not in VALID_CATEGORIES:
+    error = validate_recipe(data)
+    if error == 'Invalid category':
         return jsonify({'error': 'Invalid category', 'valid_categories': VALID_CATEGORIES}), 400
+    if error:
+        return jsonify({'error': error}), 400
 
-    conn = get_db_connection()
-    cursor = conn.cursor()
+    with write_transaction() as conn:
+        cursor = conn.cursor()
+        existing = cursor.execute('SELECT id FROM recipes WHERE id = ?', (recipe_id,)).fetchone()
+        if existing is not None:
+            update_recipes(cursor, [(recipe_id, data)])
 
-    existing = cursor.execute('SELECT id FROM recipes WHERE id = ?', (recipe_id,)).fetchone()
     if existing is None:
-        conn.close()
         return jsonify({'error': 'Recipe not found'}), 404
+    return jsonify({'id': recipe_id, 'message': 'Recipe updated successfully'})
+
+
+@recipes_bp.route("/api/recipes/<int:recipe_id>", methods=['PATCH'])
+@login_required
+def patch_recipe_route(recipe_id):
+    """
+    Partial update: only the fields present in the body are touched, and only
+    if they differ from what is stored. The response lists what changed.
+    """
+    data = request.get_json()
+
+    if not data:
+        return jsonify({'error': 'No JSON data'}), 400
+
+    error = validate_recipe(data, partial=True)
+    if error == 'Invalid category':
+        return jsonify({'error': 'Invalid category', 'valid_categories': VALID_CATEGORIES}), 400
+    if error:
+        return jsonify({'error': error}), 400
 
     try:
-        cursor.execute('''
-            UPDATE recipes SET
-                name = ?, description = ?, category = ?, image_url = ?, source_url = ?,
-                difficulty = ?, prep_time_minutes = ?, total_time_minutes = ?,
-                servings = ?, instructions = ?, notes = ?, tags = ?,
-                calories_per_serving = ?, protein_per_serving = ?, fat_per_serving = ?,
-                carbs_per_serving = ?, sodium_per_serving = ?, fiber_per_serving = ?
-            WHERE id = ?
-        ''', (
-            data['name'],
-            data.get('description'),
-            data.get('category') or None,
-            data.get('image_url'),
-            data.get('source_url'),
-            data.get('difficulty'),
-            data.get('prep_time_minutes'),
-            data.get('total_time_minutes'),
-            data.get('servings', 1),
-            json.dumps(data.get('instructions', [])),
-            data.get('notes'),
-            json.dumps(data.get('tags', [])),
-            data.get('calories_per_serving', 0),
-            data.get('protein_per_serving', 0),
-            data.get('fat_per_serving', 0),
-            data.get('carbs_per_serving', 0),
-            data.get('sodium_per_serving', 0),
-            data.get('fiber_per_serving', 0),
-            recipe_id,
-        ))
-
-        cursor.execute('DELETE FROM ingredients WHERE recipe_id = ?', (recipe_id,))
-        for ing in data.get('ingredients', []):
-            cursor.execute('''
-                INSERT INTO ingredients (recipe_id, name, amount, unit, notes, original_text)
-                VALUES (?, ?, ?, ?, ?, ?)
-            ''', (
-                recipe_id,
-                ing.get('name', ''),
-                ing.get('amount', 0),
-                ing.get('unit', ''),
-                ing.get('notes'),
-                ing.get('original_text'),
-            ))
-
-        cursor.execute('DELETE FROM recipe_categories WHERE recipe_id = ?', (recipe_id,))
-        for cat in data.get('recipe_categories', []):
-            cursor.execute(
-                'INSERT INTO recipe_categories (recipe_id, category_name) VALUES (?, ?)',
-                (recipe_id, cat)
-            )
-
-        conn.commit()
-        return jsonify({'id': recipe_id, 'message': 'Recipe updated successfully'})
-
-    except Exception as e:
-        conn.rollback()
-        return jsonify({'error': str(e)}), 500
-
-    finally:
-        conn.close()
+        with write_transaction() as conn:
+            changed = patch_recipe(conn.cursor(), recipe_id, data)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    if changed is None:
+        return jsonify({'error': 'Recipe not found'}), 404
+    return jsonify({
+        'id': recipe_id,
+        'changed': changed,
+        'message': 'Recipe updated successfully' if changed else 'Nothing to update'
+    })
 
 
 @recipes_bp.route("/api/recipe-tags")
 def get_all_tags():
-    """Return all unique recipe category tags for filtering."""
-    conn = get_db_connection()
-    rows = conn.execute(
-        'SELECT DISTINCT category_name FROM recipe_categories ORDER BY category_name'
-    ).fetchall()
-    conn.close()
-    return jsonify([row['category_name'] for row in rows])
\ No newline at end of file
+    """
+    All unique recipe category tags, by name. With ?prefix= (and optional
+    &limit=, default 10) autocomplete instead: [{"name", "count"}], most used
+    first, ignoring diacritics ("sniad" finds "Śniadanie").
+    """
+    index = get_tag_index()
+    if 'prefix' not in request.args and 'limit' not in request.args:
+        return jsonify(index.names())
+
+    limit = max(1, min(request.args.get('limit', 10, type=int), 100))
+    matches = index.complete(request.args.get('prefix', ''), limit)
+    return jsonify([{'name': name, 'count': count} for name, count in matches])
@@ -0,0 +1,90 @@
+"""
+Tiny in-process scheduler for periodic maintenance (backups, ...).
+
+Every gunicorn worker runs the same schedule in a daemon thread. When a task
+is due, a worker takes a non-blocking lock file for it and re-checks the last
+run time in `task_runs`, so exactly one worker runs it and restarts don't make
+it run early.
+"""
+
+import json
+import os
+import threading
+import time
+import traceback
+
+from database import DATABASE, get_db_connection, file_lock, write_transaction
+
+# How often the thread wakes up to look for due tasks (seconds)
+TICK_SECONDS = 60
+
+TASKS = {}
+
+_thread = None
+_thread_pid = None
+
+
+def schedule(name, interval_seconds, fn):
+    """Run fn() every interval_seconds. Does nothing if the interval is 0."""
+    if interval_seconds > 0:
+        TASKS[name] = (interval_seconds, fn)
+
+
+def last_run(conn, name):
+    row = conn.execute('SELECT last_run_at FROM task_runs WHERE name = ?', (name,)).fetchone()
+    return row[0] if row else 0
+
+
+def record_run(name, status, result):
+    with write_transaction() as conn:
+        conn.execute('''
+            INSERT INTO task_runs (name, last_run_at, last_status, last_result) VALUES (?, ?, ?, ?)
+            ON CONFLICT(name) DO UPDATE SET
+                last_run_at = excluded.last_run_at,
+                last_status = excluded.last_status,
+                last_result = excluded.last_result
+        ''', (name, time.time(), status, result))
+
+
+def run_due_tasks():
+    for name, (interval, fn) in TASKS.items():
+        conn = get_db_connection()
+        due = time.time() - last_run(conn, name) >= interval
+        conn.close()
+        if not due:
+            continue
+
+        with file_lock(f'{DATABASE}.{name}.lock', blocking=False) as locked:
+            if not locked:
+                continue        # another worker is running it right now
+            conn = get_db_connection()
+            due = time.time() - last_run(conn, name) >= interval
+            conn.close()
+            if not due:
+                continue        # it finished while we were checking
+
+            try:
+                result = fn()
+            except Exception:
+                record_run(name, 'failed', traceback.format_exc())
+            else:
+                record_run(name, 'ok', json.dumps(result, default=str))
+
+
+def loop():
+    while True:
+        try:
+            run_due_tasks()
+        except Exception:
+            traceback.print_exc()
+        time.sleep(TICK_SECONDS)
+
+
+def start():
+    """Start the scheduler thread for this process (again after a fork)."""
+    global _thread, _thread_pid
+    if not TASKS or (_thread is not None and _thread_pid == os.getpid()):
+        return
+    _thread = threading.Thread(target=loop, name='scheduler', daemon=True)
+    _thread.start()
+    _thread_pid = os.getpid()
@@ -1,7 +1,23 @@
+-- New database files reclaim free pages in small steps (maintenance.py);
+-- on an existing one this only takes effect with `maintenance.py --vacuum`
+PRAGMA auto_vacuum = INCREMENTAL;
+
+-- Reset the migration history too, init_db() re-applies every migration
+DROP TABLE IF EXISTS schema_version;
+-- Jobs are transient, and later migrations add columns to the table
+DROP TABLE IF EXISTS jobs;
+DROP TABLE IF EXISTS meal_plan_template_items;
+DROP TABLE IF EXISTS meal_plan_templates;
 DROP TABLE IF EXISTS recipe_categories;
 DROP TABLE IF EXISTS ingredients;
 DROP TABLE IF EXISTS meal_plans;
 DROP TABLE IF EXISTS recipes;
+-- Index of recipe names, rebuilt by migration 0006
+DROP TABLE IF EXISTS recipe_search;
+-- Describes the tables above, migration 0008 starts it again from what exists
+DROP TABLE IF EXISTS change_log;
+-- Its revisions count writes to the tables above
+DROP TABLE IF EXISTS maintenance_log;
 
 CREATE TABLE recipes (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -65,6 +81,24 @@ CREATE TABLE meal_plans (
     FOREIGN KEY (recipe_id) REFERENCES recipes(id) ON DELETE CASCADE
 );
 
+-- Named weekly templates: day_offset 0-6 counts from the week's first day
+CREATE TABLE meal_plan_templates (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL UNIQUE,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE meal_plan_template_items (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    template_id INTEGER NOT NULL,
+    day_offset INTEGER NOT NULL,
+    meal_type TEXT NOT NULL,
+    recipe_id INTEGER NOT NULL,
+    servings REAL DEFAULT 1,
+    FOREIGN KEY (template_id) REFERENCES meal_plan_templates(id) ON DELETE CASCADE,
+    FOREIGN KEY (recipe_id) REFERENCES recipes(id) ON DELETE CASCADE
+);
+
 CREATE TABLE IF NOT EXISTS users (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     username TEXT NOT NULL UNIQUE,
@@ -80,4 +114,33 @@ CREATE TABLE IF NOT EXISTS favorites (
     FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
     FOREIGN KEY (recipe_id) REFERENCES recipes(id) ON DELETE CASCADE,
     UNIQUE(user_id, recipe_id)
-);
\ No newline at end of file
+);
+
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,                -- registered job type, see jobs.py
+    status TEXT NOT NULL DEFAULT 'queued',  -- queued / running / succeeded / failed
+    params TEXT,                      -- JSON
+    progress REAL DEFAULT 0,          -- 0..1
+    message TEXT,
+    result TEXT,                      -- JSON
+    error TEXT,
+    worker_pid INTEGER,
+    created_by INTEGER,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    started_at TIMESTAMP,
+    finished_at TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status, id);
+
+CREATE TABLE IF NOT EXISTS images (
+    sha256 TEXT PRIMARY KEY,          -- content hash, also the file name under media/
+    ext TEXT NOT NULL,                -- jpg / png / gif / webp
+    size_bytes INTEGER,
+    width INTEGER,
+    height INTEGER,
+    thumbnails_ready INTEGER DEFAULT 0,
+    source_url TEXT,                  -- where it was downloaded from, if anywhere
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
@@ -0,0 +1,80 @@
+"""
+Fuzzy recipe name search: forgiving of missing Polish characters and typos
+("zurek" finds "Żurek", "pierogii" finds "Pierogi ruskie").
+
+Names are folded (folding.py) into the recipe_search FTS5 trigram index. A
+query is split into the trigrams of its words; SQLite counts, per recipe, how
+many of them its name contains (one posting-list lookup per trigram), and a
+recipe's score is that share of the query's trigrams. Recipes below
+MIN_SIMILARITY are dropped, the best MAX_CANDIDATES are returned.
+"""
+
+import math
+
+from folding import fold
+
+MIN_SIMILARITY = 0.5
+MAX_CANDIDATES = 500
+
+
+def trigrams(text):
+    """Trigrams of each word (none across the spaces between words)."""
+    return {word[i:i + 3] for word in text.split() for i in range(len(word) - 2)}
+
+
+def normalize_query(term):
+    return ' '.join(fold(term).split())
+
+
+def fuzzy_matches(conn, term, limit=MAX_CANDIDATES):
+    """[(recipe_id, score)] for a search term, best match first."""
+    query = normalize_query(term)
+    grams = sorted(trigrams(query))
+
+    if not grams:
+        if not query:
+            return []
+        # Too short for trigrams, plain substring match on the folded names
+        pattern = '%' + query.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+        rows = conn.execute(
+            "SELECT rowid, name FROM recipe_search WHERE name LIKE ? ESCAPE '\\' LIMIT ?",
+            (pattern, limit)
+        ).fetchall()
+        return [(row[0], 1.0) for row in sorted(rows, key=lambda row: (len(row[1]), row[0]))]
+
+    needed = max(1, math.ceil(len(grams) * MIN_SIMILARITY))
+    per_gram = ' UNION ALL '.join(
+        'SELECT rowid FROM recipe_search WHERE recipe_search MATCH ?' for _ in grams
+    )
+    rows = conn.execute(f'''
+        SELECT hits.rowid, hits.shared, s.name
+        FROM (
+            SELECT rowid, COUNT(*) AS shared FROM ({per_gram})
+            GROUP BY rowid HAVING shared >= ?
+            ORDER BY shared DESC LIMIT ?
+        ) hits
+        JOIN recipe_search s ON s.rowid = hits.rowid
+    ''', ['"' + gram.replace('"', '""') + '"' for gram in grams] + [needed, limit]).fetchall()
+
+    # Ties go to the closer name: fewer trigrams the query didn't ask for
+    scored = [
+        (recipe_id, round(shared / len(grams), 3), shared / max(len(trigrams(name)), 1))
+        for recipe_id, shared, name in rows
+    ]
+    scored.sort(key=lambda hit: (-hit[1], -hit[2], hit[0]))
+    return [(recipe_id, score) for recipe_id, score, _ in scored]
+
+
+def load_search_hits(conn, term):
+    """
+    Fill temp.search_hits (id, rank) with the fuzzy matches for `term`, so a
+    listing query can join it and ORDER BY rank. Returns the number of hits.
+    """
+    conn.execute('CREATE TEMP TABLE IF NOT EXISTS search_hits (id INTEGER PRIMARY KEY, rank INTEGER)')
+    conn.execute('DELETE FROM temp.search_hits')
+    hits = fuzzy_matches(conn, term)
+    conn.executemany(
+        'INSERT INTO temp.search_hits (id, rank) VALUES (?, ?)',
+        ((recipe_id, rank) for rank, (recipe_id, _) in enumerate(hits))
+    )
+    return len(hits)
@@ -0,0 +1,27 @@
+import json
+
+# Columns stored as JSON strings in SQLite but sent to clients as real arrays
+JSON_COLUMNS = ('instructions', 'tags')
+
+
+def decode_json_column(value):
+    """Turn a stored JSON array string into a list (bad/empty values -> [])."""
+    if value is None or value == '':
+        return []
+    if isinstance(value, list):
+        return value
+    try:
+        decoded = json.loads(value)
+    except (TypeError, ValueError):
+        # Legacy rows with a plain string instead of a JSON array
+        return [value]
+    return decoded if isinstance(decoded, list) else [decoded]
+
+
+def recipe_to_dict(row):
+    """Convert a recipes row to a dict, decoding the JSON columns."""
+    recipe = dict(row)
+    for column in JSON_COLUMNS:
+        if column in recipe:
+            recipe[column] = decode_json_column(recipe[column])
+    return recipe
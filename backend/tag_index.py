@@ -0,0 +1,81 @@
+"""
+In-memory prefix index over recipe tags (recipe_categories.category_name)
+for autocomplete.
+
+Every word start of every tag is folded (see folding.py) and kept in one
+sorted list, so a prefix is two bisects and "laktoz" finds "Bez laktozy".
+Matches are ranked by how many recipes use the tag.
+
+The index is rebuilt when data_revision changes. The revision is checked at
+most once per REVISION_CHECK_SECONDS, so nearly every request is answered
+from memory without opening the database.
+"""
+
+import bisect
+import heapq
+import threading
+import time
+
+from database import get_db_connection, data_revision
+from folding import fold
+
+REVISION_CHECK_SECONDS = 1.0
+
+_index = None
+_checked_at = 0.0
+_lock = threading.Lock()
+
+
+class TagIndex:
+    def __init__(self, revision, counts):
+        self.revision = revision
+        # (name, count), most used first: the answer for an empty prefix
+        self.tags = sorted(counts.items(), key=lambda tag: (-tag[1], tag[0]))
+        keys = []
+        for position, (name, _) in enumerate(self.tags):
+            words = fold(name).split()
+            for start in range(len(words)):
+                keys.append((' '.join(words[start:]), position))
+        keys.sort()
+        self.keys = [key for key, _ in keys]
+        self.positions = [position for _, position in keys]
+
+    @classmethod
+    def build(cls, conn, revision):
+        rows = conn.execute(
+            'SELECT category_name, COUNT(*) FROM recipe_categories GROUP BY category_name'
+        )
+        return cls(revision, dict(rows.fetchall()))
+
+    def names(self):
+        return sorted(name for name, _ in self.tags)
+
+    def complete(self, prefix, limit):
+        """Up to `limit` tags with a word starting with `prefix`, most used first."""
+        prefix = fold(prefix).strip()
+        if not prefix:
+            return self.tags[:limit]
+        lo = bisect.bisect_left(self.keys, prefix)
+        hi = bisect.bisect_left(self.keys, prefix + '\U0010ffff', lo)
+        # Positions are in ranking order already, the smallest ones win
+        matches = heapq.nsmallest(limit, set(self.positions[lo:hi]))
+        return [self.tags[position] for position in matches]
+
+
+def get_index():
+    global _index, _checked_at
+    now = time.monotonic()
+    if _index is not None and now - _checked_at < REVISION_CHECK_SECONDS:
+        return _index
+
+    with _lock:
+        if _index is None or time.monotonic() - _checked_at >= REVISION_CHECK_SECONDS:
+            conn = get_db_connection()
+            try:
+                revision = data_revision(conn)
+                if _index is None or _index.revision != revision:
+                    _index = TagIndex.build(conn, revision)
+            finally:
+                conn.close()
+            _checked_at = time.monotonic()
+        return _index
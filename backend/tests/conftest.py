@@ -14,6 +14,10 @@ os.environ.setdefault("SECRET_KEY", "test-only-secret-key")
 _fd, _tmp_db_path = tempfile.mkstemp(suffix=".db")
 os.close(_fd)          # we only want the path; SQLite opens its own handle
 os.environ["DATABASE_PATH"] = _tmp_db_path
+os.environ["IMAGE_DIR"] = tempfile.mkdtemp(prefix="recipes-media-")
+os.environ["PROFILE_DIR"] = tempfile.mkdtemp(prefix="recipes-profiles-")
+os.environ["PROFILING"] = "1"
+os.environ["ADMIN_USERS"] = "admin"
 
 import database          # noqa: E402  (import after env is set, on purpose)
 from app import app as flask_app   # noqa: E402
@@ -28,4 +32,52 @@ def app():
 
 @pytest.fixture()
 def client(app):
-    return app.test_client()
\ No newline at end of file
+    return app.test_client()
+
+
+def logged_in_client(app, username):
+    """Test client logged in as a fresh `username` (skips the rate-limited login)."""
+    conn = database.get_db_connection()
+    conn.execute("DELETE FROM users WHERE username = ?", (username,))
+    cursor = conn.execute(
+        "INSERT INTO users (username, password_hash) VALUES (?, 'x')", (username,)
+    )
+    user_id = cursor.lastrowid
+    conn.commit()
+    conn.close()
+
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(user_id)
+        session['_fresh'] = True
+    return client
+
+
+@pytest.fixture()
+def auth_client(app):
+    """Test client already logged in as a fresh user."""
+    return logged_in_client(app, 'tester')
+
+
+@pytest.fixture()
+def admin_client(app):
+    """Test client logged in as a user listed in ADMIN_USERS."""
+    return logged_in_client(app, 'admin')
+
+
+@pytest.fixture()
+def make_recipe():
+    """Create a recipe through the API and return its id; fields override the defaults."""
+    def create(client, **fields):
+        payload = {
+            "name": "Żurek",
+            "instructions": ["Pokrój kiełbasę", "Gotuj 20 minut"],
+            "tags": ["zupa"],
+            "ingredients": [{"name": "kiełbasa", "amount": 200, "unit": "g"}],
+            "recipe_categories": ["Obiad"],
+        }
+        payload.update(fields)
+        res = client.post("/api/recipes", json=payload)
+        assert res.status_code == 201
+        return res.get_json()["id"]
+    return create
@@ -1,3 +1,16 @@
+import gzip
+import io
+import json
+import os
+import time
+import urllib.request
+
+import pytest
+
+import database
+import jobs
+import tag_index
+from images import CheckedRedirectHandler
 
 
 def test_statistics_returns_a_count(client):
@@ -12,6 +25,19 @@ def test_recipe_tags_is_public_and_returns_a_list(client):
     assert res.get_json() == []
 
 
+def test_recipe_tags_autocomplete_ranks_by_use_and_ignores_diacritics(client, auth_client, make_recipe, monkeypatch):
+    monkeypatch.setattr(tag_index, "REVISION_CHECK_SECONDS", 0)
+    make_recipe(auth_client, recipe_categories=["Śniadanie", "Bez laktozy"])
+    make_recipe(auth_client, recipe_categories=["Śniadanie", "Słodkie"])
+    make_recipe(auth_client, recipe_categories=["Sałatki"])
+
+    assert client.get("/api/recipe-tags").get_json() == ["Bez laktozy", "Sałatki", "Słodkie", "Śniadanie"]
+    assert client.get("/api/recipe-tags?prefix=sniad").get_json() == [{"name": "Śniadanie", "count": 2}]
+    assert client.get("/api/recipe-tags?prefix=laktoz").get_json() == [{"name": "Bez laktozy", "count": 1}]
+    assert [t["name"] for t in client.get("/api/recipe-tags?prefix=S&limit=2").get_json()] == ["Śniadanie", "Sałatki"]
+    assert [t["name"] for t in client.get("/api/recipe-tags?limit=1").get_json()] == ["Śniadanie"]
+
+
 def test_recipes_requires_login(client):
     res = client.get("/api/recipes")
     assert res.status_code == 401       # @login_required kicks in
@@ -27,4 +53,348 @@ def test_login_rejects_bad_credentials(client):
 
 def test_login_requires_username_and_password(client):
     res = client.post("/api/auth/login", json={})
-    assert res.status_code == 400
\ No newline at end of file
+    assert res.status_code == 400
+
+
+def test_recipe_json_columns_are_arrays(auth_client, make_recipe):
+    recipe_id = make_recipe(auth_client)
+
+    detail = auth_client.get(f"/api/recipes/{recipe_id}").get_json()
+    assert detail["instructions"] == ["Pokrój kiełbasę", "Gotuj 20 minut"]
+    assert detail["tags"] == ["zupa"]
+
+    listing = auth_client.get("/api/recipes").get_json()
+    assert listing[0]["instructions"] == ["Pokrój kiełbasę", "Gotuj 20 minut"]
+
+
+def test_polish_text_is_not_ascii_escaped(auth_client, make_recipe):
+    recipe_id = make_recipe(auth_client)
+    res = auth_client.get(f"/api/recipes/{recipe_id}")
+    assert "Żurek".encode("utf-8") in res.data
+
+
+def test_large_responses_are_gzipped(auth_client, make_recipe):
+    for i in range(10):
+        make_recipe(auth_client, name=f"Żurek {i}", notes="Długi opis " * 50)
+
+    res = auth_client.get("/api/recipes", headers={"Accept-Encoding": "gzip"})
+    assert res.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in res.headers["Vary"]
+    assert len(json.loads(gzip.decompress(res.data))) == 10
+
+
+def test_small_responses_are_not_compressed(client):
+    res = client.get("/api/statistics", headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in res.headers
+    assert res.get_json() == 0
+
+
+def test_facet_counts_follow_the_other_filters(auth_client, make_recipe):
+    make_recipe(auth_client, name="Żurek", category="lunch", recipe_categories=["Zupy", "Polskie"])
+    make_recipe(auth_client, name="Barszcz", category="dinner", recipe_categories=["Zupy"])
+    favorite = make_recipe(auth_client, name="Owsianka", category="breakfast", recipe_categories=["Vege"])
+    auth_client.post(f"/api/favorites/{favorite}")
+
+    facets = auth_client.get("/api/recipes?page=1&facets=1&tag=Zupy").get_json()["facets"]
+    assert facets["category"] == {"dinner": 1, "lunch": 1}
+    assert facets["tag"] == {"Zupy": 2, "Polskie": 1, "Vege": 1}   # own filter not applied
+    assert facets["source"] == {"manual": 2}
+
+    make_recipe(auth_client, name="Rosół", category="dinner", recipe_categories=["Zupy"])
+    facets = auth_client.get("/api/recipes?page=1&facets=true&category=dinner").get_json()["facets"]
+    assert facets["tag"] == {"Zupy": 2}
+    assert facets["category"] == {"dinner": 2, "breakfast": 1, "lunch": 1}
+
+    facets = auth_client.get("/api/favorites?facets=1").get_json()["facets"]
+    assert facets["tag"] == {"Vege": 1}
+    assert "facets" not in auth_client.get("/api/recipes?page=1").get_json()
+
+
+def test_fuzzy_search_ignores_diacritics_and_typos(auth_client, make_recipe):
+    zurek = make_recipe(auth_client, name="Żurek staropolski", recipe_categories=["Zupy"])
+    pierogi = make_recipe(auth_client, name="Pierogi ruskie", recipe_categories=["Obiad"])
+    make_recipe(auth_client, name="Barszcz czerwony", recipe_categories=["Zupy"])
+
+    def ids(query):
+        return [r["id"] for r in auth_client.get(f"/api/recipes?fuzzy=1&{query}").get_json()]
+
+    assert ids("search=zurek") == [zurek]
+    assert ids("search=pierogii") == [pierogi]
+    assert ids("search=ZUREK&tag=Obiad") == []
+    assert ids("search=rus") == [pierogi]
+    assert auth_client.get("/api/recipes?search=zurek").get_json() == []      # plain LIKE
+
+    auth_client.patch(f"/api/recipes/{pierogi}", json={"name": "Pierogi z mięsem"})
+    assert ids("search=miesem") == [pierogi]
+
+    auth_client.post(f"/api/favorites/{zurek}")
+    body = auth_client.get("/api/favorites?fuzzy=1&search=zurk&facets=1").get_json()
+    assert [r["id"] for r in body["recipes"]] == [zurek]
+    assert body["facets"]["tag"] == {"Zupy": 1}
+
+
+def test_bulk_upsert_creates_updates_and_reports_errors(auth_client, make_recipe):
+    existing_id = make_recipe(auth_client)
+
+    res = auth_client.post("/api/recipes/bulk", json={"recipes": [
+        {"name": "Pierogi", "ingredients": [{"name": "mąka", "amount": 500, "unit": "g"}],
+         "recipe_categories": ["Obiad", "Vege"]},
+        {"id": existing_id, "name": "Żurek staropolski", "ingredients": []},
+        {"id": 999999, "name": "Ghost"},
+        {"description": "no name"},
+    ]})
+    assert res.status_code == 200
+    body = res.get_json()
+    assert (body["created"], body["updated"], body["failed"]) == (1, 1, 2)
+    assert [r["status"] for r in body["results"]] == ["created", "updated", "error", "error"]
+
+    created = auth_client.get(f"/api/recipes/{body['results'][0]['id']}").get_json()
+    assert created["recipe_categories"] == ["Obiad", "Vege"]
+    assert created["ingredients"][0]["name"] == "mąka"
+
+    updated = auth_client.get(f"/api/recipes/{existing_id}").get_json()
+    assert updated["name"] == "Żurek staropolski"
+    assert updated["ingredients"] == []
+
+
+def test_bulk_upsert_rejects_bad_items_without_failing_the_batch(auth_client, make_recipe):
+    existing_id = make_recipe(auth_client)
+
+    res = auth_client.post("/api/recipes/bulk", json={"recipes": [
+        {"name": "Bigos"},
+        {"name": "Bez nazwy składnika", "ingredients": [{"amount": 1}]},
+        {"name": "Zła kategoria", "recipe_categories": [{"name": "Obiad"}]},
+        {"name": "Zły opis", "description": {"pl": "opis"}},
+        {"id": existing_id, "name": "Raz"},
+        {"id": str(existing_id), "name": "Dwa"},
+    ]})
+    assert res.status_code == 200
+    body = res.get_json()
+    assert (body["created"], body["updated"], body["failed"]) == (1, 0, 5)
+    assert body["results"][4]["error"] == body["results"][5]["error"] == "Duplicate id in batch"
+    assert auth_client.get(f"/api/recipes/{existing_id}").get_json()["name"] == "Żurek"
+
+    res = auth_client.post("/api/recipes/bulk", json={"recipes": [{"name": "x"}] * 501})
+    assert res.status_code == 400
+
+
+def test_bulk_delete_handles_more_ids_than_sqlite_parameters(auth_client):
+    res = auth_client.post("/api/recipes/bulk", json={
+        "recipes": [{"name": f"Przepis {i}"} for i in range(5)]
+    })
+    ids = [r["id"] for r in res.get_json()["results"]]
+
+    res = auth_client.post("/api/recipes/bulk-delete", json={"ids": ids + list(range(10**6, 10**6 + 40000))})
+    assert res.status_code == 200
+    assert res.get_json() == {"deleted": 5}
+    assert auth_client.get("/api/recipes").get_json() == []
+
+
+def test_patch_updates_only_changed_fields_and_rows(auth_client, make_recipe):
+    recipe_id = make_recipe(auth_client, ingredients=[
+        {"name": "kiełbasa", "amount": 200, "unit": "g"},
+        {"name": "zakwas", "amount": 500, "unit": "ml"},
+    ])
+    before = auth_client.get(f"/api/recipes/{recipe_id}").get_json()
+    sausage, sourdough = before["ingredients"]
+
+    res = auth_client.patch(f"/api/recipes/{recipe_id}", json={
+        "name": "Żurek",                       # unchanged
+        "servings": 4,
+        "ingredients": [
+            {"id": sausage["id"], "name": "kiełbasa", "amount": 250, "unit": "g"},
+            {"name": "zakwas", "amount": 500, "unit": "ml"},  # same content, no id
+            {"name": "jajko", "amount": 2, "unit": "szt"},
+        ],
+        "recipe_categories": ["Obiad", "Zupa"],
+    })
+    assert res.status_code == 200
+    changed = res.get_json()["changed"]
+    assert changed["fields"] == ["servings"]
+    assert changed["ingredients"]["updated"] == [sausage["id"]]
+    assert "deleted" not in changed["ingredients"]
+    assert len(changed["ingredients"]["inserted"]) == 1
+    assert changed["recipe_categories"] == {"added": ["Zupa"]}
+
+    after = auth_client.get(f"/api/recipes/{recipe_id}").get_json()
+    assert after["servings"] == 4
+    assert after["instructions"] == before["instructions"]
+    assert [i["id"] for i in after["ingredients"]][:2] == [sausage["id"], sourdough["id"]]
+
+
+def test_patch_without_changes_and_missing_recipe(auth_client, make_recipe):
+    recipe_id = make_recipe(auth_client)
+    res = auth_client.patch(f"/api/recipes/{recipe_id}", json={"tags": ["zupa"]})
+    assert res.get_json()["changed"] == {}
+
+    assert auth_client.patch("/api/recipes/999999", json={"servings": 2}).status_code == 404
+    assert auth_client.patch(f"/api/recipes/{recipe_id}", json={"name": ""}).status_code == 400
+
+
+def test_patch_handles_legacy_text_columns_and_string_ids(auth_client, make_recipe):
+    recipe_id = make_recipe(auth_client)
+    conn = database.get_db_connection()
+    conn.execute("UPDATE recipes SET instructions = 'Gotuj 20 minut', tags = 'zupa' WHERE id = ?",
+                 (recipe_id,))
+    conn.commit()
+    conn.close()
+    ingredient_id = auth_client.get(f"/api/recipes/{recipe_id}").get_json()["ingredients"][0]["id"]
+
+    res = auth_client.patch(f"/api/recipes/{recipe_id}", json={
+        "tags": ["zupa"],
+        "instructions": ["Gotuj 30 minut"],
+        "ingredients": [{"id": str(ingredient_id), "name": "kiełbasa", "amount": 200, "unit": "g"}],
+    })
+    assert res.status_code == 200
+    assert res.get_json()["changed"] == {"fields": ["instructions"]}
+
+    res = auth_client.patch(f"/api/recipes/{recipe_id}", json={
+        "ingredients": [{"id": ["x"], "name": "kiełbasa"}],
+    })
+    assert res.status_code == 400
+
+
+def test_meal_plan_batch_copy_and_templates(auth_client, make_recipe):
+    soup = make_recipe(auth_client)
+    week = [f"2026-03-0{d}" for d in range(2, 9)]     # Monday..Sunday
+
+    res = auth_client.post("/api/meal-plans/batch", json={"meals": [
+        {"date": day, "meal_type": meal_type, "recipe_id": soup, "servings": 1}
+        for day in week for meal_type in ("breakfast", "lunch", "dinner", "snack")
+    ]})
+    assert res.status_code == 201
+    assert res.get_json()["created"] == 28
+
+    res = auth_client.post("/api/meal-plans/batch", json={"meals": [
+        {"date": week[0], "meal_type": "lunch", "recipe_id": soup},
+        {"date": week[0], "meal_type": "lunch", "recipe_id": 999999},
+    ]})
+    assert res.status_code == 404
+    assert res.get_json()["missing_recipe_ids"] == [999999]
+
+    res = auth_client.post("/api/meal-plans/copy", json={
+        "from_start": week[0], "from_end": week[1], "to_start": "2026-03-09",
+    })
+    assert res.get_json()["created"] == 8
+    assert len(auth_client.get("/api/meal-plans?date=2026-03-10").get_json()["meals"]) == 4
+
+    res = auth_client.post("/api/meal-plan-templates", json={"name": "Zupy", "week_start": week[0]})
+    template_id = res.get_json()["id"]
+    assert res.get_json()["meal_count"] == 28
+
+    res = auth_client.post(f"/api/meal-plan-templates/{template_id}/apply",
+                           json={"week_start": "2026-03-09", "replace": True})
+    assert res.get_json() == {"created": 28, "removed": 8, "week_start": "2026-03-09"}
+    assert len(auth_client.get("/api/meal-plans?date=2026-03-15").get_json()["meals"]) == 4
+
+
+def wait_for_job(client, job_id, timeout=10):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        found = client.get(f"/api/jobs/{job_id}").get_json()
+        if found["status"] in ("succeeded", "failed"):
+            return found
+        time.sleep(0.05)
+    raise AssertionError(f"job {job_id} did not finish: {found}")
+
+
+def test_import_job_runs_in_background(auth_client):
+    res = auth_client.post("/api/jobs", json={"kind": "import_recipes", "params": {"path": "recipes.json"}})
+    assert res.status_code == 202
+    assert res.get_json()["status"] in ("queued", "running", "succeeded")
+
+    finished = wait_for_job(auth_client, res.get_json()["id"])
+    assert finished["status"] == "succeeded", finished["error"]
+    assert finished["result"] == {"imported": 12, "skipped": 0, "merged": 0, "flagged": []}
+    assert finished["progress"] == 1
+    assert auth_client.get("/api/statistics").get_json() == 12
+
+
+def test_jobs_reject_unknown_kinds_and_paths_outside_data(auth_client):
+    assert auth_client.post("/api/jobs", json={"kind": "rm -rf"}).status_code == 400
+
+    res = auth_client.post("/api/jobs", json={"kind": "import_recipes", "params": {"path": "../backend/app.py"}})
+    finished = wait_for_job(auth_client, res.get_json()["id"])
+    assert finished["status"] == "failed"
+    assert "No such file in data/" in finished["error"]
+
+
+def test_jobs_with_a_stale_heartbeat_are_failed(auth_client):
+    conn = database.get_db_connection()
+    stale, alive = [
+        conn.execute(
+            "INSERT INTO jobs (kind, status, worker_pid, heartbeat_at) VALUES ('analyze', 'running', ?, ?)",
+            (os.getpid(), heartbeat_at)
+        ).lastrowid
+        for heartbeat_at in (time.time() - jobs.STALE_SECONDS - 1, time.time())
+    ]
+    conn.commit()
+    conn.close()
+
+    jobs.recover_jobs()
+
+    assert auth_client.get(f"/api/jobs/{stale}").get_json()["status"] == "failed"
+    assert auth_client.get(f"/api/jobs/{alive}").get_json()["status"] == "running"
+
+
+def test_jobs_queued_before_a_restart_run_once_a_worker_starts(auth_client):
+    conn = database.get_db_connection()
+    queued = conn.execute("INSERT INTO jobs (kind, status) VALUES ('analyze', 'queued')").lastrowid
+    conn.commit()
+    conn.close()
+
+    jobs.recover_jobs()
+    assert auth_client.get(f"/api/jobs/{queued}").get_json()["status"] == "queued"
+
+    jobs.resume_queued_jobs()
+    assert wait_for_job(auth_client, queued)["status"] == "succeeded"
+
+
+def test_image_upload_is_served_immutable_with_thumbnails(auth_client, make_recipe):
+    Image = pytest.importorskip("PIL.Image")
+
+    buffer = io.BytesIO()
+    Image.new("RGB", (1200, 800), (200, 80, 40)).save(buffer, "JPEG")
+    recipe_id = make_recipe(auth_client)
+
+    res = auth_client.post(f"/api/recipes/{recipe_id}/image",
+                           data={"image": (io.BytesIO(buffer.getvalue()), "zurek.jpg")})
+    assert res.status_code == 201
+    body = res.get_json()
+    assert auth_client.get(f"/api/recipes/{recipe_id}").get_json()["image_url"] == body["image_url"]
+
+    original = auth_client.get(body["image_url"])
+    assert original.status_code == 200
+    assert "immutable" in original.headers["Cache-Control"]
+
+    assert wait_for_job(auth_client, body["job_id"])["status"] == "succeeded"
+    thumb = auth_client.get(body["thumbnails"]["320"]["webp"])
+    assert thumb.status_code == 200
+    assert Image.open(io.BytesIO(thumb.data)).size == (320, 213)
+
+
+def test_image_upload_rejects_non_images(auth_client, make_recipe):
+    recipe_id = make_recipe(auth_client)
+    res = auth_client.post(f"/api/recipes/{recipe_id}/image",
+                           data={"image": (io.BytesIO(b"<script>"), "x.jpg")})
+    assert res.status_code == 400
+
+
+@pytest.mark.parametrize("url", [
+    "http://127.0.0.1/zurek.jpg",
+    "http://localhost:5000/api/recipes",
+    "http://169.254.169.254/latest/meta-data/",
+    "http://10.0.0.5/zurek.jpg",
+    "http://[::ffff:127.0.0.1]/zurek.jpg",
+    "file:///etc/passwd",
+])
+def test_image_ingest_refuses_internal_urls(auth_client, make_recipe, url):
+    recipe_id = make_recipe(auth_client)
+    res = auth_client.post(f"/api/recipes/{recipe_id}/image/ingest", json={"url": url})
+    assert res.status_code == 400
+
+
+def test_image_download_checks_every_redirect():
+    req = urllib.request.Request("https://example.com/zurek.jpg")
+    with pytest.raises(ValueError, match="not a public address"):
+        CheckedRedirectHandler().redirect_request(req, None, 302, "Found", {}, "http://127.0.0.1/admin")
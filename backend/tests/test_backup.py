@@ -0,0 +1,90 @@
+import gzip
+import sqlite3
+import threading
+import time
+
+import pytest
+
+import backup
+import database
+import scheduler
+
+
+def add_recipes(count):
+    conn = database.get_db_connection()
+    conn.executemany("INSERT INTO recipes (name, notes) VALUES (?, ?)",
+                     [(f"Przepis {i}", "x" * 2000) for i in range(count)])
+    conn.commit()
+    conn.close()
+
+
+def test_backup_is_verified_compressed_and_rotated(app, tmp_path):
+    add_recipes(500)
+
+    for _ in range(3):
+        result = backup.create_backup(str(tmp_path), keep=2, prefix="test")
+
+    files = backup.list_backups(str(tmp_path), "test")
+    assert len(files) == 2
+    assert result["path"] == files[-1] and result["path"].endswith(".db.gz")
+    assert result["steps"] > 1                      # copied in several page batches
+    assert backup.verify(result["path"]) == "ok"
+
+    restored = tmp_path / "restored.db"
+    restored.write_bytes(gzip.decompress(open(result["path"], "rb").read()))
+    conn = sqlite3.connect(restored)
+    assert conn.execute("SELECT COUNT(*) FROM recipes").fetchone()[0] == 500
+    conn.close()
+
+
+def run_with_writer(interval, fn):
+    stop = threading.Event()
+
+    def writer():
+        while not stop.is_set():
+            add_recipes(1)
+            time.sleep(interval)
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    try:
+        return fn()
+    finally:
+        stop.set()
+        thread.join()
+
+
+def test_backup_runs_while_the_app_writes(app, tmp_path, monkeypatch):
+    add_recipes(500)
+    monkeypatch.setattr(backup, "PAGES_PER_STEP", 64)
+
+    result = run_with_writer(0.25, lambda: backup.create_backup(str(tmp_path), keep=1, prefix="live"))
+
+    assert result["steps"] > 1
+    assert backup.verify(result["path"]) == "ok"
+
+
+def test_backup_gives_up_instead_of_locking_out_writers(app, tmp_path, monkeypatch):
+    add_recipes(500)
+    monkeypatch.setattr(backup, "PAGES_PER_STEP", 8)
+    monkeypatch.setattr(backup, "MAX_RESTARTS", 0)
+
+    with pytest.raises(RuntimeError, match="restarted"):
+        run_with_writer(0, lambda: backup.create_backup(str(tmp_path), keep=1, prefix="busy"))
+
+    assert backup.list_backups(str(tmp_path), "busy") == []
+
+
+def test_scheduled_task_runs_once_per_interval(app, monkeypatch):
+    calls = []
+    monkeypatch.setattr(scheduler, "TASKS", {})
+    scheduler.schedule("test-task", 3600, lambda: calls.append(1) or {"ok": True})
+
+    scheduler.run_due_tasks()
+    scheduler.run_due_tasks()
+
+    assert calls == [1]
+    conn = database.get_db_connection()
+    row = conn.execute("SELECT last_status FROM task_runs WHERE name = 'test-task'").fetchone()
+    conn.close()
+    assert row[0] == "ok"
@@ -0,0 +1,70 @@
+import random
+
+import pytest
+
+import catalog
+import database
+
+pytest.importorskip("numpy")
+
+QUERIES = [
+    "",
+    "category=dinner",
+    "tag=Vege",
+    "tag=Vege&category=lunch&calories_max=600",
+    "protein_min=20&prep_time_max=45",
+    "sort=name",
+    "sort=-name,calories",
+    "sort=-protein_per_kcal",
+    "sort=fiber_per_kcal,-rating",
+    "sort=rating&tag=Fit",
+    "sort=-calories,name&calories_min=100",
+    "sort=id&total_time_max=60",
+]
+
+
+@pytest.fixture()
+def library(app, monkeypatch):
+    monkeypatch.setattr(catalog, "REBUILD_SECONDS", 0)
+    rng = random.Random(5)
+    maybe = lambda value: None if rng.random() < 0.1 else value  # noqa: E731
+    conn = database.get_db_connection()
+    conn.executemany(
+        "INSERT INTO recipes (name, category, calories_per_serving, protein_per_serving, fiber_per_serving, "
+        "prep_time_minutes, total_time_minutes, rating) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        ((rng.choice(["Zupa", "Bigos", "Żurek", "curry", "Sałatka"]),
+          rng.choice(["breakfast", "lunch", "dinner", None]),
+          maybe(rng.choice([0, 150, 300, 450, 600, 900])), maybe(rng.randint(0, 40)),
+          maybe(rng.randint(0, 12)), maybe(rng.randint(5, 90)), maybe(rng.randint(5, 120)),
+          maybe(rng.randint(1, 5)))
+         for _ in range(300))
+    )
+    conn.executemany(
+        "INSERT INTO recipe_categories (recipe_id, category_name) VALUES (?, ?)",
+        ((recipe_id, tag) for recipe_id in range(1, 301) for tag in rng.sample(["Vege", "Fit", "Zupy"], 2))
+    )
+    conn.commit()
+    conn.close()
+
+
+def listing(client, query, page):
+    res = client.get(f"/api/recipes?{query}&page={page}&per_page=25")
+    assert res.status_code == 200
+    body = res.get_json()
+    return body["total"], [r["id"] for r in body["recipes"]]
+
+
+@pytest.mark.parametrize("query", QUERIES)
+def test_catalog_matches_sql(auth_client, library, monkeypatch, query):
+    from_catalog = [listing(auth_client, query, page) for page in (1, 2, 13)]
+    assert catalog._catalog is not None and catalog._catalog.size == 300
+
+    monkeypatch.setattr(catalog, "ENABLED", False)
+    from_sql = [listing(auth_client, query, page) for page in (1, 2, 13)]
+    assert from_catalog == from_sql
+
+
+def test_catalog_follows_writes(auth_client, library, make_recipe):
+    total, _ = listing(auth_client, "category=snack", 1)
+    new_id = make_recipe(auth_client, category="snack")
+    assert listing(auth_client, "category=snack", 1) == (total + 1, [new_id])
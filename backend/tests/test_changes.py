@@ -0,0 +1,70 @@
+import threading
+import time
+
+import changes as changes_module
+import routes.changes
+
+
+def changes(client, since, **params):
+    res = client.get("/api/changes", query_string={"since": since, **params})
+    assert res.status_code == 200
+    return res.get_json()
+
+
+def test_full_sync_then_deltas(auth_client, make_recipe):
+    soup = make_recipe(auth_client)
+    salad = make_recipe(auth_client, name="Sałatka")
+
+    full = changes(auth_client, 0)
+    assert [r["id"] for r in full["recipes"]["upserted"]] == [soup, salad]
+    assert full["has_more"] is False and full["reset"] is False
+
+    since = full["revision"]
+    assert changes(auth_client, since)["recipes"]["upserted"] == []
+
+    auth_client.patch(f"/api/recipes/{soup}", json={"ingredients": [{"name": "ziemniaki"}]})
+    auth_client.post(f"/api/favorites/{salad}")
+    plan = auth_client.post("/api/meal-plans", json={
+        "date": "2026-03-02", "meal_type": "lunch", "recipe_id": soup,
+    }).get_json()["id"]
+    auth_client.delete(f"/api/recipes/{salad}")
+
+    delta = changes(auth_client, since)
+    assert [r["id"] for r in delta["recipes"]["upserted"]] == [soup]
+    assert delta["recipes"]["deleted"] == [salad]
+    # Deleting the recipe took the favorite with it
+    assert delta["favorites"] == {"added": [], "removed": [salad]}
+    assert [m["id"] for m in delta["meal_plans"]["upserted"]] == [plan]
+    assert delta["revision"] > since
+
+
+def test_pages_and_reset(auth_client, make_recipe):
+    ids = [make_recipe(auth_client, name=f"Przepis {i}") for i in range(5)]
+
+    page = changes(auth_client, 0, limit=2)
+    assert [r["id"] for r in page["recipes"]["upserted"]] == ids[:2]
+    assert page["has_more"] is True
+    rest = changes(auth_client, page["revision"], limit=10)
+    assert [r["id"] for r in rest["recipes"]["upserted"]] == ids[2:]
+
+    assert changes(auth_client, rest["revision"] + 100)["reset"] is True
+
+
+def test_long_poll_answers_when_something_changes(auth_client, make_recipe, monkeypatch):
+    monkeypatch.setattr(changes_module.watcher, "poll_seconds", 0.01)
+    make_recipe(auth_client)
+    head = changes(auth_client, "latest")["revision"]
+    assert changes(auth_client, "latest", wait=0.05)["revision"] == head    # timed out, nothing new
+
+    threading.Timer(0.1, make_recipe, (auth_client,), {"name": "Bigos"}).start()
+    started = time.monotonic()
+    delta = changes(auth_client, head, wait=5)
+    assert time.monotonic() - started < 4
+    assert [r["name"] for r in delta["recipes"]["upserted"]] == ["Bigos"]
+
+
+def test_long_poll_answers_at_once_over_the_waiter_cap(auth_client, monkeypatch):
+    monkeypatch.setattr(routes.changes, "MAX_WAITERS", 0)
+    started = time.monotonic()
+    changes(auth_client, "latest", wait=5)
+    assert time.monotonic() - started < 1
@@ -0,0 +1,85 @@
+import json
+
+import database
+import dedup
+import import_recipes
+from import_res import import_centrumrespo
+
+
+def scraped(url, title, ingredients, **fields):
+    return {"url": url, "title": title, "categories": ["Obiad"],
+            "ingredients": [{"amount": "100 g", "ingredient": name} for name in ingredients], **fields}
+
+
+LEGO = ["mięsa z piersi kurczaka", "ryżu basmati", "czerwonej papryki", "cebuli"]
+
+
+def run_import(tmp_path, recipes, **kwargs):
+    path = tmp_path / "res.json"
+    path.write_text(json.dumps({"recipes": recipes}), encoding="utf-8")
+    return import_centrumrespo(str(path), **kwargs)
+
+
+def test_title_key_ignores_case_accents_filler_and_endings():
+    assert dedup.title_key("Kurczak z ryżem i papryką (FIT)") == dedup.title_key("kurczakiem z ryzem i papryka")
+    assert dedup.title_key("Leczo") != dedup.title_key("Bigos")
+
+
+def test_import_skips_merges_or_flags_duplicates(app, tmp_path):
+    first = run_import(tmp_path, [scraped("https://x/1", "Kurczak z ryżem i papryką", LEGO)])
+    assert first["imported"] == 1
+
+    rescrape = scraped("https://x/1-nowy", "Kurczak z ryżem i papryką fit", LEGO + ["soli"],
+                       image_url="https://x/1.jpg", categories=["Fit"])
+    other_dish = scraped("https://x/2", "Kurczak z ryżem i papryką", ["makaronu", "śmietany", "sera"])
+    result = run_import(tmp_path, [rescrape, other_dish])
+    assert (result["imported"], result["skipped"]) == (1, 1)
+
+    result = run_import(tmp_path, [dict(rescrape, url="https://x/1-trzeci")], on_duplicate="merge")
+    assert result["merged"] == 1
+    conn = database.get_db_connection()
+    row = conn.execute("SELECT image_url FROM recipes WHERE source_url = 'https://x/1'").fetchone()
+    tags = {r[0] for r in conn.execute("SELECT category_name FROM recipe_categories WHERE recipe_id = 1")}
+    conn.close()
+    assert row["image_url"] == "https://x/1.jpg"
+    assert tags == {"Obiad", "Fit"}
+
+    result = run_import(tmp_path, [dict(rescrape, url="https://x/1-czwarty")], on_duplicate="flag")
+    assert result["imported"] == 1
+    assert result["flagged"][0]["duplicate_of"] == 1
+
+
+def test_skipped_recipes_still_report_progress(app, tmp_path, monkeypatch):
+    monkeypatch.setattr(import_recipes, "BATCH_SIZE", 1)
+    path = tmp_path / "recipes.json"
+    path.write_text(json.dumps([{
+        "name": name, "category": "obiad", "prep_time_minutes": 30, "servings": 2, "instructions": [],
+        "nutrition_per_serving": {"calories": 500, "protein_g": 30, "fat_g": 20, "carbs_g": 50},
+        "tags": [], "source": None, "notes": None,
+        "ingredients": [{"name": "cebuli", "amount": 1, "unit": "szt", "notes": None}],
+    } for name in ("Leczo", "Bigos")]), encoding="utf-8")
+    assert import_recipes.import_recipes(str(path))["imported"] == 2
+
+    progress = []
+    result = import_recipes.import_recipes(str(path), progress=lambda fraction, message: progress.append(fraction))
+    assert result["skipped"] == 2
+    assert progress == [0.5, 1.0]
+
+
+def test_report_lists_clusters(app, tmp_path):
+    run_import(tmp_path, [
+        scraped("https://x/1", "Kurczak z ryżem", LEGO),
+        scraped("https://x/2", "Leczo", ["cukinii", "papryki", "cebuli"]),
+        scraped("https://x/3", "Kurczak z ryżem", LEGO),
+        scraped("https://x/4", "kurczak z ryzem (fit)", LEGO[:3]),
+    ], on_duplicate="keep")
+
+    conn = database.get_db_connection()
+    clusters = dedup.find_clusters(conn)
+    conn.close()
+    assert [c["ids"] for c in clusters] == [[1, 3, 4]]
+
+
+def test_admin_duplicates_endpoint(admin_client, client):
+    assert admin_client.get("/api/admin/duplicates").get_json() == {"clusters": [], "recipes": 0}
+    assert client.get("/api/admin/duplicates").status_code in (401, 403)
@@ -0,0 +1,74 @@
+import csv
+import io
+import json
+import zipfile
+
+import database
+from import_export import import_export
+
+
+def export(client, fmt):
+    res = client.get(f"/api/export?format={fmt}")
+    assert res.status_code == 200
+    assert res.is_streamed
+    return res.data
+
+
+def without_ids(recipes):
+    return [{k: v for k, v in r.items() if k not in ("id", "created_at")} for r in recipes]
+
+
+def make_library(client, make_recipe):
+    soup = make_recipe(client)
+    salad = make_recipe(client, name="Sałatka", ingredients=[], recipe_categories=[])
+    client.post(f"/api/favorites/{soup}")
+    res = client.post("/api/meal-plans/batch", json={"meals": [
+        {"date": "2026-03-02", "meal_type": "lunch", "recipe_id": soup},
+        {"date": "2026-03-02", "meal_type": "dinner", "recipe_id": salad},
+    ]})
+    assert res.status_code == 201
+    return soup, salad
+
+
+def test_export_formats(auth_client, make_recipe):
+    soup, salad = make_library(auth_client, make_recipe)
+
+    lines = [json.loads(line) for line in export(auth_client, "ndjson").decode().splitlines()]
+    assert [line["type"] for line in lines] == ["export", "recipe", "recipe", "favorite", "meal_plan", "meal_plan"]
+    assert lines[0]["recipes"] == 2
+    assert lines[1]["ingredients"] == [
+        {"name": "kiełbasa", "amount": 200, "unit": "g", "notes": None, "original_text": None}
+    ]
+    assert lines[1]["recipe_categories"] == ["Obiad"]
+    assert lines[2]["ingredients"] == [] and lines[2]["name"] == "Sałatka"
+    assert lines[3] == {"type": "favorite", "username": "tester", "recipe_id": soup,
+                        "created_at": lines[3]["created_at"]}
+
+    rows = list(csv.DictReader(io.StringIO(export(auth_client, "csv").decode())))
+    assert [row["name"] for row in rows] == ["Żurek", "Sałatka"]
+    assert json.loads(rows[0]["instructions"]) == ["Pokrój kiełbasę", "Gotuj 20 minut"]
+
+    archive = zipfile.ZipFile(io.BytesIO(export(auth_client, "zip")))
+    assert sorted(archive.namelist()) == ["favorites.csv", "library.ndjson", "meal_plans.csv", "recipes.csv"]
+    assert archive.testzip() is None
+
+    assert auth_client.get("/api/export?format=xml").status_code == 400
+
+
+def test_export_round_trips_through_the_importer(auth_client, make_recipe, tmp_path):
+    make_library(auth_client, make_recipe)
+    before = auth_client.get("/api/recipes").get_json()
+    path = tmp_path / "library.zip"
+    path.write_bytes(export(auth_client, "zip"))
+
+    conn = database.get_db_connection()
+    conn.executescript("DELETE FROM meal_plans; DELETE FROM favorites; DELETE FROM ingredients; "
+                       "DELETE FROM recipe_categories; DELETE FROM recipes;")
+    conn.close()
+
+    result = import_export(str(path))
+    assert result == {"imported": 2, "favorites": 1, "meal_plans": 2, "skipped": 0}
+
+    after = auth_client.get("/api/recipes").get_json()
+    assert without_ids(after) == without_ids(before)
+    assert len(auth_client.get("/api/favorites").get_json()["recipes"]) == 1
@@ -0,0 +1,53 @@
+import database
+import maintenance
+
+
+def test_maintenance_runs_what_is_due_and_logs_it(app, auth_client, make_recipe, monkeypatch):
+    monkeypatch.setattr(maintenance, "STEP_PAUSE", 0)
+    ids = [make_recipe(auth_client, name=f"Przepis {i}", description="x" * 2000) for i in range(40)]
+
+    first = maintenance.run()
+    assert list(first["steps"]) == ["analyze"]      # never analyzed
+    assert first["before"]["auto_vacuum"] == "incremental"
+    assert set(first["after"]["query_ms"]) == set(maintenance.QUERIES)
+    assert maintenance.run()["steps"] == {}         # nothing written since
+
+    assert auth_client.post("/api/recipes/bulk-delete", json={"ids": ids}).status_code == 200
+    monkeypatch.setattr(maintenance, "FREE_PAGES", 5)
+    monkeypatch.setattr(maintenance, "ANALYZE_WRITES", 10)
+    result = maintenance.run()
+    assert set(result["steps"]) == {"analyze", "incremental_vacuum"}
+    assert result["before"]["freelist_count"] >= 5
+    assert result["after"]["freelist_count"] == 0
+    assert result["after"]["page_count"] < result["before"]["page_count"]
+
+    conn = database.get_db_connection()
+    logged = maintenance.recent_runs(conn)
+    conn.close()
+    assert [run["step"] for run in logged] == ["incremental_vacuum", "analyze", "analyze"]
+    assert logged[0]["detail"]["freed_pages"] == result["before"]["freelist_count"]
+
+
+def test_analyze_out_of_time_carries_on_where_it_stopped(app, monkeypatch):
+    monkeypatch.setattr(maintenance, "STEP_PAUSE", 0)
+    stopped = maintenance.run(max_seconds=0)["steps"]["analyze"]
+    assert stopped["tables"] == 0
+    assert stopped["resume_from"]
+
+    conn = database.get_db_connection()
+    assert maintenance.due_steps(conn, maintenance.stats(conn, timings=False)) == ["analyze"]
+    conn.execute("UPDATE maintenance_log SET detail = json_set(detail, '$.resume_from', 'recipes')")
+    conn.commit()
+    conn.close()
+
+    done = maintenance.run()["steps"]["analyze"]
+    assert done["tables"] == done["of"] < stopped["of"]
+    assert "resume_from" not in done
+    assert maintenance.run()["steps"] == {}
+
+
+def test_admin_maintenance_endpoint(admin_client):
+    body = admin_client.get("/api/admin/maintenance").get_json()
+    assert body["due"] == ["analyze"]
+    assert body["runs"] == []
+    assert body["stats"]["freelist_count"] == 0
@@ -0,0 +1,82 @@
+import sqlite3
+
+import pytest
+
+import database
+import migrate
+
+
+def use_database(monkeypatch, path):
+    monkeypatch.setattr(database, "DATABASE", str(path))
+    monkeypatch.setattr(migrate, "DATABASE", str(path))
+
+
+def index_names(path):
+    conn = sqlite3.connect(path)
+    names = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    conn.close()
+    return names
+
+
+def test_migrates_an_old_database_in_place(monkeypatch, tmp_path):
+    db_path = tmp_path / "old.db"
+    conn = sqlite3.connect(db_path)
+    conn.executescript("""
+        CREATE TABLE recipes (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL,
+                              source_url TEXT, category TEXT, prep_time_minutes INTEGER,
+                              total_time_minutes INTEGER, calories_per_serving REAL,
+                              protein_per_serving REAL, fat_per_serving REAL, carbs_per_serving REAL,
+                              sodium_per_serving REAL, fiber_per_serving REAL, rating REAL);
+        CREATE TABLE ingredients (id INTEGER PRIMARY KEY, recipe_id INTEGER, name TEXT);
+        CREATE TABLE recipe_categories (id INTEGER PRIMARY KEY, recipe_id INTEGER, category_name TEXT);
+        CREATE TABLE meal_plans (id INTEGER PRIMARY KEY, date TEXT, meal_type TEXT,
+                                 recipe_id INTEGER, servings REAL);
+        CREATE TABLE users (id INTEGER PRIMARY KEY, username TEXT, password_hash TEXT);
+        INSERT INTO recipes (name) VALUES ('Bigos');
+    """)
+    conn.commit()
+    conn.close()
+    use_database(monkeypatch, db_path)
+
+    applied = migrate.migrate()
+    assert applied[:2] == [1, 2]
+    assert {"idx_ingredients_recipe", "idx_meal_plans_date",
+            "idx_favorites_user_created", "idx_recipes_source_url"} <= index_names(db_path)
+
+    conn = sqlite3.connect(db_path)
+    assert conn.execute("SELECT name FROM recipes").fetchall() == [("Bigos",)]
+    assert conn.execute("SELECT COUNT(*) FROM sqlite_stat1").fetchone()[0] > 0
+    conn.close()
+
+    # Second run (next worker) has nothing to do
+    assert migrate.migrate() == []
+
+
+def test_fresh_database_gets_base_schema_and_migrations(monkeypatch, tmp_path):
+    db_path = tmp_path / "new.db"
+    use_database(monkeypatch, db_path)
+
+    migrate.migrate()
+
+    conn = sqlite3.connect(db_path)
+    versions = [row[0] for row in conn.execute("SELECT version FROM schema_version ORDER BY version")]
+    conn.close()
+    assert versions == [v for v, _, _ in migrate.available_migrations()]
+
+
+def test_failed_migration_is_rolled_back(monkeypatch, tmp_path):
+    db_path = tmp_path / "broken.db"
+    use_database(monkeypatch, db_path)
+    migrate.migrate()
+
+    bad = tmp_path / "9999_broken.sql"
+    bad.write_text("CREATE TABLE half_done (id INTEGER);\nTHIS IS NOT SQL;\n")
+    monkeypatch.setattr(migrate, "available_migrations", lambda: [(9999, "broken", str(bad))])
+
+    with pytest.raises(sqlite3.OperationalError):
+        migrate.migrate()
+
+    conn = sqlite3.connect(db_path)
+    assert conn.execute("SELECT name FROM sqlite_master WHERE name = 'half_done'").fetchone() is None
+    assert conn.execute("SELECT 1 FROM schema_version WHERE version = 9999").fetchone() is None
+    conn.close()
@@ -0,0 +1,99 @@
+import pytest
+
+import database
+import nutrition
+
+
+@pytest.mark.parametrize("name, food", [
+    ("mięsa z piersi kurczaka", "pierś z kurczaka"),
+    ("oliwy z oliwek", "oliwa z oliwek"),
+    ("czerwonej papryki", "papryka"),
+    ("papryki słodkiej mielonej", "papryka mielona"),
+    ("Jajka", "jajko"),
+    ("kamienie", None),
+])
+def test_matcher_picks_the_most_specific_food(app, name, food):
+    conn = database.get_db_connection()
+    foods = nutrition.load_foods(conn)
+    conn.close()
+    names = {f["id"]: f["name"] for f in foods}
+    assert names.get(nutrition.FoodMatcher(foods).match(name)) == food
+
+
+def test_recipe_without_nutrition_is_computed_on_write(auth_client, make_recipe):
+    recipe_id = make_recipe(auth_client, servings=2, ingredients=[
+        {"name": "pierś z kurczaka", "amount": 200, "unit": "g"},
+        {"name": "jajka", "amount": 1, "unit": "szt"},
+        {"name": "oliwy z oliwek", "amount": 1, "unit": "łyżka"},
+        {"name": "kamienie", "amount": 3, "unit": "g"},
+    ])
+    recipe = auth_client.get(f"/api/recipes/{recipe_id}").get_json()
+    grams_of_oil = 15 * 0.92
+    assert recipe["nutrition_source"] == "ingredients"
+    assert recipe["calories_per_serving"] == round((200 * 120 + 55 * 140 + grams_of_oil * 884) / 100 / 2, 1)
+    assert recipe["protein_per_serving"] == round((200 * 22.5 + 55 * 12.5) / 100 / 2, 1)
+
+    # Sent back as it was, with another ingredient list: still computed
+    recipe["ingredients"] = [{"name": "pierś z kurczaka", "amount": 100, "unit": "g"}]
+    auth_client.put(f"/api/recipes/{recipe_id}", json=recipe)
+    assert auth_client.get(f"/api/recipes/{recipe_id}").get_json()["calories_per_serving"] == 60
+
+    # Typed in values win from then on
+    auth_client.patch(f"/api/recipes/{recipe_id}", json={"calories_per_serving": 333})
+    auth_client.patch(f"/api/recipes/{recipe_id}", json={"servings": 1})
+    recipe = auth_client.get(f"/api/recipes/{recipe_id}").get_json()
+    assert (recipe["calories_per_serving"], recipe["nutrition_source"]) == (333, None)
+
+
+def test_given_nutrition_is_kept(auth_client, make_recipe):
+    # nutrition_source isn't for clients to set
+    recipe_id = make_recipe(auth_client, calories_per_serving=480, protein_per_serving=30,
+                            nutrition_source="ingredients")
+    recipe = auth_client.get(f"/api/recipes/{recipe_id}").get_json()
+    assert (recipe["calories_per_serving"], recipe["fat_per_serving"], recipe["nutrition_source"]) == (480, 0, None)
+
+
+@pytest.mark.parametrize("notes, grams", [
+    ("85 g", 85), ("12,5 g", 12.5), ("30g", 30),
+    ("1 kg", None), ("2 opakowania po 500g", None), ("ok. 100 g", None), (None, None),
+])
+def test_only_parse_ingredient_weight_hints_count(notes, grams):
+    assert nutrition.weight_hint(notes) == grams
+
+
+def test_full_recompute_uses_weight_hints(app):
+    conn = database.get_db_connection()
+    conn.execute("INSERT INTO recipes (id, name, servings) VALUES (1, 'Leczo', 1), (2, 'Bigos', 1)")
+    conn.execute("UPDATE recipes SET calories_per_serving = 700 WHERE id = 2")
+    conn.executemany(
+        "INSERT INTO ingredients (recipe_id, name, amount, unit, notes) VALUES (?, ?, ?, ?, ?)",
+        [(1, "czerwonej papryki", 0.5, "szt", "85 g"), (1, "cebuli", 1, "", None),
+         (2, "kiełbasy", 100, "g", None)],
+    )
+    conn.commit()
+
+    with database.write_transaction() as conn:
+        assert nutrition.recompute(conn.cursor()) == 1
+        assert nutrition.recompute(conn.cursor()) == 0
+
+    conn = database.get_db_connection()
+    rows = dict(conn.execute("SELECT id, calories_per_serving FROM recipes").fetchall())
+    conn.close()
+    assert rows == {1: round((85 * 30 + 110 * 40) / 100, 1), 2: 700}
+
+
+def test_recompute_all_goes_chunk_by_chunk(app, monkeypatch):
+    monkeypatch.setattr(nutrition, "CHUNK_SIZE", 2)
+    monkeypatch.setattr(nutrition, "CHUNK_PAUSE", 0)
+    conn = database.get_db_connection()
+    conn.executemany("INSERT INTO recipes (id, name, servings) VALUES (?, 'Jajecznica', 1)",
+                     [(i,) for i in (3, 4, 5, 9, 10)])
+    conn.executemany("INSERT INTO ingredients (recipe_id, name, amount, unit) VALUES (?, 'jajka', 2, 'szt')",
+                     [(i,) for i in (3, 4, 5, 9, 10)])
+    conn.commit()
+    conn.close()
+
+    progress = []
+    assert nutrition.recompute_all(lambda fraction, message: progress.append(fraction)) == 5
+    assert progress == [0.25, 0.5, 0.75, 1.0]
+    assert nutrition.recompute_all() == 0
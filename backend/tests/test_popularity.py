@@ -0,0 +1,66 @@
+import pytest
+
+import database
+import popularity
+
+
+def counters(recipe_id):
+    conn = database.get_db_connection()
+    row = conn.execute(
+        'SELECT favorite_count, plan_count, popularity FROM recipes WHERE id = ?', (recipe_id,)
+    ).fetchone()
+    conn.close()
+    return tuple(row)
+
+
+def revision():
+    conn = database.get_db_connection()
+    value = database.data_revision(conn)
+    conn.close()
+    return value
+
+
+def test_triggers_keep_counters_and_sort_popular(auth_client, make_recipe):
+    old, loved, planned = (make_recipe(auth_client, name=name) for name in ("Bigos", "Pierogi", "Żurek"))
+    before = revision()
+
+    auth_client.post(f"/api/favorites/{loved}")
+    plan = auth_client.post("/api/meal-plans", json={"date": "2024-03-01", "meal_type": "lunch", "recipe_id": planned})
+    auth_client.post("/api/meal-plans", json={"date": "2024-03-02", "meal_type": "lunch", "recipe_id": planned})
+    auth_client.post("/api/meal-plans", json={"date": "2024-03-03", "meal_type": "lunch", "recipe_id": planned})
+    auth_client.delete(f"/api/meal-plans/{plan.get_json()['id']}")
+
+    assert counters(loved)[:2] == (1, 0)
+    assert counters(planned)[:2] == (0, 2)
+    assert counters(old) == (0, 0, 0)
+    # Favorites and plans count from when they were made: two plans weigh more
+    res = auth_client.get("/api/recipes?page=1&sort=popular")
+    assert [r["id"] for r in res.get_json()["recipes"]] == [planned, loved, old]
+    # Counter updates aren't recipe changes
+    assert revision() == before
+
+    auth_client.delete(f"/api/favorites/{loved}")
+    assert counters(loved) == (0, 0, 0)
+
+
+def test_rebuild_repairs_drifted_counters(auth_client, make_recipe):
+    recipe_id = make_recipe(auth_client)
+    auth_client.post(f"/api/favorites/{recipe_id}")
+    expected = counters(recipe_id)
+
+    with database.write_transaction() as conn:
+        conn.execute('UPDATE recipes SET favorite_count = 7, popularity = 0 WHERE id = ?', (recipe_id,))
+    with database.write_transaction() as conn:
+        assert popularity.rebuild(conn.cursor()) == 1
+        assert popularity.rebuild(conn.cursor()) == 0
+    assert counters(recipe_id) == expected
+
+
+def test_far_future_plan_counts_from_today_and_can_be_deleted(auth_client, make_recipe):
+    planned, loved = make_recipe(auth_client, name="Bigos"), make_recipe(auth_client, name="Pierogi")
+    auth_client.post(f"/api/favorites/{loved}")
+    res = auth_client.post("/api/meal-plans", json={"date": "2090-01-01", "meal_type": "lunch", "recipe_id": planned})
+    assert counters(planned)[2] == pytest.approx(counters(loved)[2], rel=1e-5)
+
+    assert auth_client.delete(f"/api/meal-plans/{res.get_json()['id']}").status_code == 200
+    assert counters(planned) == (0, 0, 0)
@@ -0,0 +1,41 @@
+import pstats
+
+
+def test_admin_profiles_a_request(admin_client, make_recipe, tmp_path):
+    make_recipe(admin_client)
+    res = admin_client.get("/api/recipes?tag=Obiad&page=1", headers={"X-Profile": "cprofile"})
+    assert res.status_code == 200
+    profile_id = res.headers["X-Profile-Id"]
+
+    listed = admin_client.get("/api/admin/profiles").get_json()
+    entry = next(p for p in listed if p["id"] == profile_id)
+    assert entry["path"] == "/api/recipes?tag=Obiad&page=1"
+    assert entry["files"] == ["pstats", "json"]
+    assert entry["sql_statements"] >= 2
+
+    trace = admin_client.get(f"/api/admin/profiles/{profile_id}/json").get_json()
+    assert any("COUNT(DISTINCT r.id)" in s["sql"] for s in trace["sql"])
+
+    res = admin_client.get(f"/api/admin/profiles/{profile_id}/pstats")
+    assert res.status_code == 200
+    path = tmp_path / "profile.pstats"
+    path.write_bytes(res.data)
+    functions = {func for _, _, func in pstats.Stats(str(path)).stats}
+    assert "get_recipes" in functions
+
+
+def test_sampling_profile_is_collapsed_stacks(admin_client):
+    res = admin_client.get("/api/recipes?profile=sample")
+    profile_id = res.headers["X-Profile-Id"]
+    res = admin_client.get(f"/api/admin/profiles/{profile_id}/collapsed")
+    assert res.status_code == 200
+    for line in res.get_data(as_text=True).splitlines():
+        stack, count = line.rsplit(" ", 1)
+        assert int(count) > 0 and stack
+
+
+def test_profiling_is_admin_only(auth_client):
+    res = auth_client.get("/api/recipes", headers={"X-Profile": "cprofile"})
+    assert res.status_code == 200
+    assert "X-Profile-Id" not in res.headers
+    assert auth_client.get("/api/admin/profiles").status_code == 403
@@ -0,0 +1,69 @@
+import pytest
+
+import database
+from recipe_filters import range_conditions, order_clause
+
+
+def query_plan(conn, args, sort=None):
+    """
+    Plan of the listing's COUNT query for range filters, or of the page query
+    for a sort. (With the default id order the page query itself may rightly
+    walk the table by id and stop after a page of matches.)
+    """
+    conditions, params = range_conditions(args)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    if sort:
+        sql = f"SELECT r.* FROM recipes r {where} ORDER BY {order_clause(sort)} LIMIT 20"
+    else:
+        sql = f"SELECT COUNT(DISTINCT r.id) FROM recipes r {where}"
+    return " | ".join(row["detail"] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params))
+
+
+def test_range_filters_and_sorting(auth_client, make_recipe):
+    light = make_recipe(auth_client, name="Sałatka", calories_per_serving=300, protein_per_serving=30,
+                        prep_time_minutes=10)
+    heavy = make_recipe(auth_client, name="Schabowy", calories_per_serving=900, protein_per_serving=45,
+                        prep_time_minutes=40)
+    lean = make_recipe(auth_client, name="Twaróg", calories_per_serving=200, protein_per_serving=28,
+                       prep_time_minutes=5)
+
+    def ids(query):
+        res = auth_client.get(f"/api/recipes?{query}")
+        assert res.status_code == 200, res.get_json()
+        return [r["id"] for r in res.get_json()]
+
+    assert ids("calories_max=500&protein_min=29") == [light]
+    assert ids("prep_time_max=20&sort=calories") == [lean, light]
+    assert ids("sort=-protein_per_kcal") == [lean, light, heavy]
+    assert ids("sort=-protein,name") == [heavy, light, lean]
+
+    body = auth_client.get("/api/recipes?page=1&calories_max=500&facets=1").get_json()
+    assert body["total"] == 2
+    assert body["facets"]["source"] == {"manual": 2}
+
+
+@pytest.mark.parametrize("query", ["calories_max=abc", "sort=password", "sort=a,b,c,d", "sort=-id;DROP"])
+def test_bad_filters_are_rejected(auth_client, query):
+    assert auth_client.get(f"/api/recipes?{query}").status_code == 400
+
+
+@pytest.mark.parametrize("args, sort, index", [
+    ({"calories_max": "40"}, None, "idx_recipes_calories"),
+    ({"protein_min": "58"}, None, "idx_recipes_protein"),
+    ({"prep_time_max": "2"}, None, "idx_recipes_prep_time"),
+    ({}, "-protein_per_kcal", "idx_recipes_protein_per_kcal"),
+    ({}, "-rating", "idx_recipes_rating"),
+    ({}, "popular", "idx_recipes_popularity"),
+])
+def test_selective_filters_and_sorts_use_an_index(app, args, sort, index):
+    conn = database.get_db_connection()
+    conn.executemany(
+        "INSERT INTO recipes (name, calories_per_serving, protein_per_serving, prep_time_minutes, rating) "
+        "VALUES (?, ?, ?, ?, ?)",
+        ((f"Przepis {i}", i % 1200, i % 60, i % 90, i % 5) for i in range(2000))
+    )
+    conn.execute("ANALYZE")
+    plan = query_plan(conn, args, sort)
+    conn.close()
+
+    assert index in plan, plan
@@ -0,0 +1,23 @@
+import catalog
+import database
+import facets
+import tag_index
+import warmup
+
+
+def test_warm_up_builds_the_caches(app, auth_client, make_recipe, monkeypatch):
+    make_recipe(auth_client, name="Bigos", tags=["Obiad"])
+    # As in a fresh process: no rebuild throttling from earlier tests
+    monkeypatch.setattr(catalog, "_built_at", 0.0)
+    monkeypatch.setattr(tag_index, "_checked_at", 0.0)
+
+    timings = warmup.warm_up(app)
+    assert set(timings) == {"read_ahead", "catalog", "facets", "tag_index", "first_page"}
+
+    conn = database.get_db_connection()
+    revision = database.data_revision(conn)
+    conn.close()
+    assert facets._index.revision == revision
+    assert tag_index._index.revision == revision
+    if catalog.np is not None and catalog.ENABLED:
+        assert catalog._catalog.revision == revision
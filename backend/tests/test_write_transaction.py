@@ -0,0 +1,91 @@
+import threading
+import time
+
+import pytest
+
+import database
+
+
+def hold_write_lock(seconds):
+    """Take the write lock on another connection for `seconds`, in a thread."""
+    locked = threading.Event()
+
+    def hold():
+        conn = database.get_db_connection()
+        conn.execute('BEGIN IMMEDIATE')
+        locked.set()
+        time.sleep(seconds)
+        conn.rollback()
+        conn.close()
+
+    thread = threading.Thread(target=hold)
+    thread.start()
+    locked.wait()
+    return thread
+
+
+@pytest.fixture()
+def short_timeouts(monkeypatch):
+    # SQLite gives up at once, so only our retries wait for the lock
+    monkeypatch.setattr(database, 'WRITE_BUSY_TIMEOUT', 0)
+    monkeypatch.setattr(database, 'WRITE_BACKOFF', 0.05)
+
+
+def test_write_waits_out_a_held_lock(app, short_timeouts, monkeypatch):
+    monkeypatch.setattr(database, 'WRITE_RETRIES', 8)
+    holder = hold_write_lock(0.2)
+
+    with database.write_transaction() as conn:
+        conn.execute("INSERT INTO recipes (name) VALUES ('Bigos')")
+    holder.join()
+
+    conn = database.get_db_connection()
+    assert conn.execute("SELECT COUNT(*) FROM recipes WHERE name = 'Bigos'").fetchone()[0] == 1
+    conn.close()
+
+
+def test_busy_database_returns_503(auth_client, short_timeouts, monkeypatch):
+    monkeypatch.setattr(database, 'WRITE_RETRIES', 1)
+    holder = hold_write_lock(0.5)
+
+    res = auth_client.post('/api/favorites/1')
+    holder.join()
+
+    assert res.status_code == 503
+    assert res.headers['Retry-After'] == '1'
+
+
+def test_failed_block_rolls_back(app):
+    with pytest.raises(ValueError):
+        with database.write_transaction() as conn:
+            conn.execute("INSERT INTO recipes (name) VALUES ('Bigos')")
+            raise ValueError('boom')
+
+    conn = database.get_db_connection()
+    assert conn.execute('SELECT COUNT(*) FROM recipes').fetchone()[0] == 0
+    conn.close()
+
+
+def test_write_queue_runs_writers_one_at_a_time(app, monkeypatch):
+    monkeypatch.setattr(database, 'WRITE_QUEUE', True)
+    inside = []
+    overlaps = []
+
+    def write(n):
+        with database.write_transaction() as conn:
+            inside.append(n)
+            overlaps.append(len(inside))
+            conn.execute('INSERT INTO recipes (name) VALUES (?)', (f'Przepis {n}',))
+            time.sleep(0.01)
+            inside.remove(n)
+
+    threads = [threading.Thread(target=write, args=(n,)) for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert max(overlaps) == 1
+    conn = database.get_db_connection()
+    assert conn.execute('SELECT COUNT(*) FROM recipes').fetchone()[0] == 8
+    conn.close()
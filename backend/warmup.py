@@ -0,0 +1,60 @@
+"""
+Warm-up before a worker takes traffic (gunicorn.conf.py calls warm_up()).
+
+A fresh process builds its per-worker caches on its first requests: the
+list catalog (catalog.py), the facet bitsets (facets.py) and the tag index
+(tag_index.py), each a full read of the recipe tables. warm_up() builds them
+up front, renders one list page so routing, serializers and the JSON
+provider have run once, and asks the kernel to read the database file into
+the page cache.
+
+Under preload_app the master warms up before forking, so workers start with
+the caches already built and share their memory copy-on-write until the
+data changes. Each cache still checks data_revision, so nothing stale is
+served. WARM_UP=0 turns it off.
+"""
+
+import os
+import time
+
+import catalog
+import facets
+import tag_index
+from database import DATABASE, get_db_connection
+
+ENABLED = os.environ.get('WARM_UP', '1') != '0'
+
+
+def read_ahead(path):
+    """Start reading `path` into the OS page cache, where supported (Linux)."""
+    if not hasattr(os, 'posix_fadvise') or not os.path.exists(path):
+        return
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+    finally:
+        os.close(fd)
+
+
+def warm_up(app):
+    """Build this process's caches; returns {step: milliseconds}."""
+    timings = {}
+    if not ENABLED:
+        return timings
+
+    def step(name, fn):
+        started = time.perf_counter()
+        fn()
+        timings[name] = round((time.perf_counter() - started) * 1000, 1)
+
+    step('read_ahead', lambda: read_ahead(DATABASE))
+    conn = get_db_connection()
+    try:
+        step('catalog', lambda: catalog.get_catalog(conn))
+        step('facets', lambda: facets.get_index(conn))
+        step('tag_index', tag_index.get_index)
+        with app.app_context():
+            step('first_page', lambda: app.json.dumps(catalog.list_page(conn, page=1)))
+    finally:
+        conn.close()
+    return timings
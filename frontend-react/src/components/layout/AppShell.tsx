@@ -4,8 +4,11 @@ import { Header } from './Header';
 import { NavTabs } from './NavTabs';
 import { LoginDialog } from '@/features/auth/components/LoginDialog';
 import { ErrorBoundary } from '@/components/common/ErrorBoundary';
+import { useChangeFeed } from '@/hooks/useChangeFeed';
 
 export function AppShell() {
+  useChangeFeed();
+
   return (
     <div className="min-h-full bg-background text-foreground">
       <Header />
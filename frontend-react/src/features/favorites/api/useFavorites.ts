@@ -17,7 +17,15 @@ export function useFavorites({ page = 1, search = null, tag = null }: FavoriteFi
     queryFn: () =>
       api(
         '/favorites',
-        { query: { page, per_page: 20, search: search ?? undefined, tag: tag ?? undefined } },
+        {
+          query: {
+            page,
+            per_page: 20,
+            search: search ?? undefined,
+            fuzzy: search ? 1 : undefined,
+            tag: tag ?? undefined,
+          },
+        },
         RecipeListResponseSchema,
       ),
     enabled: isAuthenticated,
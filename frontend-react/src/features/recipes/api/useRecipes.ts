@@ -19,6 +19,8 @@ export function useRecipes(filters: RecipeListFilters) {
         {
           query: {
             search: filters.search ?? undefined,
+            // typo- and diacritic-tolerant, best matches first
+            fuzzy: filters.search ? 1 : undefined,
             tag: filters.tag ?? undefined,
             page,
             per_page: perPage,
@@ -5,6 +5,7 @@ import { Card, CardContent } from '@/components/ui/card';
 import { FavoriteButton } from '@/features/favorites/components/FavoriteButton';
 import { AddToPlannerDialog } from '@/features/planner/components/AddToPlannerDialog';
 import { formatNumber } from '@/lib/utils/format';
+import { thumbnailUrl } from '@/lib/utils/images';
 import type { Recipe } from '@/lib/api/schemas';
 
 interface RecipeCardProps {
@@ -28,7 +29,7 @@ export function RecipeCard({ recipe, isSelectMode, isSelected, onToggle }: Recip
       <div className="relative aspect-video bg-muted">
         {recipe.image_url ? (
           <img
-            src={recipe.image_url}
+            src={thumbnailUrl(recipe.image_url, 640)}
             alt={recipe.name}
             loading="lazy"
             className="h-full w-full object-cover"
@@ -0,0 +1,82 @@
+import { useEffect } from 'react';
+import { useQueryClient } from '@tanstack/react-query';
+import { api } from '@/lib/api/client';
+import { qk } from '@/lib/query/keys';
+import { useAuth } from '@/features/auth/context/AuthContext';
+
+interface ChangesResponse {
+  revision: number;
+  has_more: boolean;
+  reset: boolean;
+  recipes: { upserted: unknown[]; deleted: number[] };
+  favorites: { added: number[]; removed: number[] };
+  meal_plans: { upserted: unknown[]; deleted: number[] };
+}
+
+// How long the server may hold a request open, and the pause before asking
+// again after an answer with nothing new (the server was too busy to wait)
+// or an error
+const WAIT_SECONDS = 25;
+const RETRY_MS = 5000;
+
+const sleep = (ms: number) => new Promise((resolve) => setTimeout(resolve, ms));
+
+/**
+ * Long-polls /api/changes for the delta since the last revision and
+ * refetches only the queries it touches — instead of polling the full lists.
+ */
+export function useChangeFeed() {
+  const queryClient = useQueryClient();
+  const { isAuthenticated } = useAuth();
+
+  useEffect(() => {
+    if (!isAuthenticated) return;
+    let stopped = false;
+
+    const run = async () => {
+      // Start from now: the queries were just fetched
+      let since: number | null = null;
+      while (!stopped) {
+        try {
+          if (since === null) {
+            since = (await api<ChangesResponse>('/changes', { query: { since: 'latest' } })).revision;
+          }
+          let recipes = false;
+          let favorites = false;
+          let mealPlans = false;
+          let delta = await api<ChangesResponse>('/changes', { query: { since, wait: WAIT_SECONDS } });
+          for (;;) {
+            if (delta.reset) {
+              recipes = favorites = mealPlans = true;
+              break;
+            }
+            recipes ||= delta.recipes.upserted.length > 0 || delta.recipes.deleted.length > 0;
+            favorites ||= delta.favorites.added.length > 0 || delta.favorites.removed.length > 0;
+            mealPlans ||= delta.meal_plans.upserted.length > 0 || delta.meal_plans.deleted.length > 0;
+            if (!delta.has_more) break;
+            delta = await api<ChangesResponse>('/changes', { query: { since: delta.revision } });
+          }
+          const moved = delta.revision !== since;
+          since = delta.revision;
+          if (stopped) return;
+
+          if (recipes) {
+            void queryClient.invalidateQueries({ queryKey: qk.recipes.all });
+            void queryClient.invalidateQueries({ queryKey: qk.recipeTags });
+            void queryClient.invalidateQueries({ queryKey: qk.statistics });
+          }
+          if (recipes || favorites) void queryClient.invalidateQueries({ queryKey: qk.favorites.all });
+          if (recipes || mealPlans) void queryClient.invalidateQueries({ queryKey: qk.mealPlans });
+          if (!moved) await sleep(RETRY_MS);
+        } catch {
+          await sleep(RETRY_MS);
+        }
+      }
+    };
+    void run();
+
+    return () => {
+      stopped = true;
+    };
+  }, [isAuthenticated, queryClient]);
+}
@@ -11,7 +11,7 @@ export interface ApiOptions extends Omit<RequestInit, 'body'> {
   query?: Record<string, string | number | boolean | null | undefined>;
 }
 
-function buildUrl(path: string, query?: ApiOptions['query']) {
+export function buildUrl(path: string, query?: ApiOptions['query']) {
   const url = `${BASE}${path}`;
   if (!query) return url;
   const params = new URLSearchParams();
@@ -4,7 +4,7 @@ export const CATEGORIES = ['breakfast', 'lunch', 'dinner', 'snack'] as const;
 export type Category = (typeof CATEGORIES)[number];
 export const CategorySchema = z.enum(CATEGORIES);
 
-/** Backend stores instructions/tags as JSON-stringified arrays. */
+/** Backend sends instructions/tags as arrays (older versions sent JSON strings). */
 const JsonStringArray = z
   .union([z.string(), z.array(z.string()), z.null()])
   .transform<string[]>((v) => {
@@ -137,7 +137,7 @@ export const CreateRecipeInputSchema = z.object({
   name: z.string().min(1),
   description: z.string().optional(),
   category: CategorySchema.nullable().optional(),
-  image_url: z.string().url().optional().or(z.literal('')),
+  image_url: z.string().url().optional().or(z.literal('')).or(z.string().startsWith('/media/')),
   source_url: z.string().url().optional().or(z.literal('')),
   difficulty: z.string().optional(),
   prep_time_minutes: z.number().int().nonnegative().optional(),
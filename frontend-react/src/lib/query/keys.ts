@@ -19,5 +19,6 @@ export const qk = {
     ids: ['favorites', 'ids'] as const,
     list: (filters: { page: number; search?: string | null; tag?: string | null }) => ['favorites', 'list', filters] as const,
   },
+  mealPlans: ['meal-plan'] as const,
   mealPlan: (date: string) => ['meal-plan', date] as const,
 };
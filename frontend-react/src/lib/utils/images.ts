@@ -0,0 +1,11 @@
+/** Local images are served from /media/<sha256>.<ext> (see backend/images.py). */
+const LOCAL_IMAGE = /^\/media\/([0-9a-f]{64})\.[a-z]+$/;
+
+/**
+ * Thumbnail URL for a recipe image at the given width (160, 320 or 640).
+ * Remote URLs are returned unchanged - we can only resize images we store.
+ */
+export function thumbnailUrl(imageUrl: string, size: 160 | 320 | 640): string {
+  const match = LOCAL_IMAGE.exec(imageUrl);
+  return match ? `/media/${match[1]}_${size}.webp` : imageUrl;
+}
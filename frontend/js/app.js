@@ -292,7 +292,10 @@ function createRecipeDetailHTML(recipe) {
 
     let instructions = [];
     try {
-        instructions = JSON.parse(recipe.instructions || '[]');
+        // The API sends an array now; older responses had a JSON string
+        instructions = Array.isArray(recipe.instructions)
+            ? recipe.instructions
+            : JSON.parse(recipe.instructions || '[]');
     } catch (e) {
         console.error('Invalid instructions JSON:', e);
     }